@@ -8,9 +8,18 @@ CREATE TABLE IF NOT EXISTS folder_state (
     last_checked    INTEGER NOT NULL,      -- epoch (formerly last_seen)
     last_processed  INTEGER,               -- epoch, NULL = needs processing (formerly archived_at)
     processing_time INTEGER,               -- time taken for archiving in seconds
-    processing_status TEXT,                -- 'success', 'failed', 'pending', NULL if never attempted
+    processing_status TEXT,                -- 'success', 'failed', 'pending', 'deferred' (no space for the archive), 'on_demand' (served by on-demand archives), NULL if never attempted
     error_message   TEXT,               -- error message if processing failed
-    detailed_error_message TEXT -- detailed error message if processing failed
+    detailed_error_message TEXT, -- detailed error message if processing failed
+    compression_policy TEXT,               -- share of the data per compression policy, e.g. "store 71% / default 29%"
+    compression_ratio REAL,                -- compressed size / original size of the last archive
+    archive_sha256  TEXT,                  -- SHA-256 of the last archive, computed while writing it
+    archive_size    INTEGER,               -- size of the last archive in bytes
+    input_size      INTEGER,               -- bytes of file data archived
+    archive_parts   TEXT,                  -- JSON [{"path", "size", "sha256"}] of a multi-part archive
+    storage_tier    TEXT,                  -- 'cold' once recompressed at a high level, 'cold_failed', NULL as archived
+    recompressed_at INTEGER,               -- epoch of the last recompression attempt
+    queue_reason    TEXT                   -- 'new', 'changed' or 'retry': why the scanner last queued or deferred it
 );
 
 CREATE TABLE IF NOT EXISTS potree_metacloud_state (
@@ -23,5 +32,122 @@ CREATE TABLE IF NOT EXISTS potree_metacloud_state (
     processing_status TEXT,                  -- 'success', 'failed', 'pending', NULL if never attempted (formerly conversion_status)
     error_message     TEXT,                  -- error message if conversion failed
     detailed_error_message TEXT, -- detailed error message if processing failed
+    input_points      INTEGER,               -- points in the LAS/LAZ files the .metacloud references
+    input_size        INTEGER,               -- bytes of those files
+    FOREIGN KEY (mission_key) REFERENCES folder_state(mission_key)
+);
+CREATE TABLE IF NOT EXISTS potree_input_state (
+    mission_key     TEXT NOT NULL,
+    input_path      TEXT NOT NULL,         -- point cloud file as listed in POINTS_FILES, relative to the mission
+    fp              TEXT NOT NULL,         -- fingerprint of its path, size and modification time
+    size_bytes      INTEGER NOT NULL,
+    mod_time        REAL NOT NULL,
+    points          INTEGER,               -- point count from its LAS/LAZ header, NULL if not read
+    PRIMARY KEY (mission_key, input_path),
+    FOREIGN KEY (mission_key) REFERENCES potree_metacloud_state(mission_key)
+);
+CREATE TABLE IF NOT EXISTS copc_state (
+    mission_key       TEXT PRIMARY KEY,      -- e.g. "0003_EPFL"
+    fp                TEXT,                  -- fingerprint of the point cloud files the .metacloud lists
+    output_path       TEXT,                  -- where the .copc.laz file is stored
+    last_checked      INTEGER NOT NULL,      -- epoch timestamp of last check
+    last_processed    INTEGER,               -- epoch timestamp of last conversion
+    processing_time   INTEGER,               -- time taken for conversion in seconds
+    processing_status TEXT,                  -- 'success', 'failed', 'pending', 'empty', NULL if never attempted
+    error_message     TEXT,                  -- error message if conversion failed
+    detailed_error_message TEXT,             -- detailed error message if processing failed
+    input_points      INTEGER,               -- points in the LAS/LAZ files the .metacloud references
+    input_size        INTEGER,               -- bytes of those files
+    output_size       INTEGER,               -- bytes of the .copc.laz file
     FOREIGN KEY (mission_key) REFERENCES folder_state(mission_key)
-);
\ No newline at end of file
+);
+CREATE TABLE IF NOT EXISTS folder_manifest (
+    folder_key      TEXT PRIMARY KEY,      -- same key as folder_state
+    fp              TEXT NOT NULL,         -- fingerprint the manifest was built for
+    file_count      INTEGER NOT NULL,
+    total_size      INTEGER NOT NULL,      -- sum of file sizes in bytes
+    manifest        BLOB NOT NULL,         -- gzip of "path\tsize\tmtime" lines, sorted by path
+    updated_at      INTEGER NOT NULL,      -- epoch of last upload
+    FOREIGN KEY (folder_key) REFERENCES folder_state(folder_key)
+);
+
+CREATE TABLE IF NOT EXISTS archived_file (
+    id              INTEGER PRIMARY KEY,
+    folder_key      TEXT NOT NULL,         -- folder_state key the file belongs to
+    path            TEXT NOT NULL,         -- full path from the LiDAR root, e.g. "mission/folder/strip_0421.laz"
+    size            INTEGER NOT NULL       -- file size in bytes
+);
+
+CREATE INDEX IF NOT EXISTS idx_archived_file_folder_key ON archived_file(folder_key);
+
+-- Trigram full-text index over archived_file.path (substring search)
+CREATE VIRTUAL TABLE IF NOT EXISTS archived_file_fts USING fts5(
+    path,
+    content='archived_file',
+    content_rowid='id',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS archived_file_ai AFTER INSERT ON archived_file BEGIN
+    INSERT INTO archived_file_fts(rowid, path) VALUES (new.id, new.path);
+END;
+
+CREATE TRIGGER IF NOT EXISTS archived_file_ad AFTER DELETE ON archived_file BEGIN
+    INSERT INTO archived_file_fts(archived_file_fts, rowid, path) VALUES ('delete', old.id, old.path);
+END;
+
+CREATE TABLE IF NOT EXISTS archive_chain (
+    folder_key      TEXT NOT NULL,         -- same key as folder_state
+    seq             INTEGER NOT NULL,      -- 0 for the base archive, 1.. for deltas
+    archive_path    TEXT NOT NULL,
+    archive_size    INTEGER NOT NULL,      -- compressed size in bytes
+    file_count      INTEGER NOT NULL,      -- files stored in this archive
+    deleted_count   INTEGER NOT NULL,      -- tombstones stored in this archive
+    created_at      INTEGER NOT NULL,      -- epoch
+    archive_sha256  TEXT,                  -- SHA-256 of this archive (of its parts, for a multi-part base)
+    PRIMARY KEY (folder_key, seq),
+    FOREIGN KEY (folder_key) REFERENCES folder_state(folder_key)
+);
+
+CREATE TABLE IF NOT EXISTS compression_benchmark (
+    run_id          TEXT NOT NULL,         -- one run of compression/benchmark.py
+    folder          TEXT NOT NULL,         -- sample folder
+    data_kind       TEXT NOT NULL,         -- extension holding most of its bytes, e.g. "laz"
+    variant         TEXT NOT NULL,         -- e.g. "zstd -3 x4" or "shell tar|pigz"
+    codec           TEXT NOT NULL,         -- 'gzip', 'zstd' or 'lz4'
+    level           INTEGER NOT NULL,
+    threads         INTEGER NOT NULL,
+    input_size      INTEGER NOT NULL,      -- bytes of file data archived
+    archive_size    INTEGER NOT NULL,      -- compressed size in bytes
+    elapsed         REAL NOT NULL,         -- wall time in seconds
+    peak_rss_mb     REAL NOT NULL,         -- peak memory of the archiving processes
+    created_at      INTEGER NOT NULL,      -- epoch
+    PRIMARY KEY (run_id, folder, variant)
+);
+
+CREATE TABLE IF NOT EXISTS archive_request (
+    folder_key      TEXT NOT NULL,         -- same key as folder_state
+    requested_at    INTEGER NOT NULL,      -- epoch of the download
+    source          TEXT NOT NULL          -- 'archive', 'cache' or 'stream' (made on demand)
+);
+
+CREATE INDEX IF NOT EXISTS idx_archive_request_folder_key ON archive_request(folder_key, requested_at);
+
+CREATE TABLE IF NOT EXISTS job_batch_item (
+    job_uid         TEXT NOT NULL,         -- uid of the Indexed Job created by the scanner
+    completion_index INTEGER NOT NULL,     -- index of the pod processing this item
+    job_name        TEXT NOT NULL,
+    kind            TEXT NOT NULL,         -- 'compression' (folder_key) or 'potree' (mission_key)
+    item_key        TEXT NOT NULL,         -- folder_key or mission_key
+    fp              TEXT,                  -- fingerprint the job was queued for
+    created_at      INTEGER NOT NULL,      -- epoch the job was registered
+    status          TEXT NOT NULL,         -- 'queued', 'succeeded' or 'failed', from the pod watch
+    exit_code       INTEGER,               -- exit code of the pod's main container
+    reason          TEXT,                  -- e.g. 'OOMKilled', 'DeadlineExceeded'
+    pod_name        TEXT,
+    finished_at     INTEGER,               -- epoch the pod terminated
+    reconciled      INTEGER NOT NULL DEFAULT 0, -- 1 when the watch wrote the outcome, the pod callback being lost
+    PRIMARY KEY (job_uid, completion_index)
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_batch_item_key ON job_batch_item(kind, item_key);
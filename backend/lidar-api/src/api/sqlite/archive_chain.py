@@ -0,0 +1,120 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import Dict, Any, List, Optional
+import time
+
+from .base import get_db_connection, logger
+from src.config.settings import settings
+
+
+class ArchiveLinkCreate(BaseModel):
+    """Result file written by compression/archive_folder.py --result-file"""
+
+    mode: str  # 'full' or 'delta'
+    seq: int
+    archive_path: str
+    archive_size: int
+    file_count: int
+    deleted_count: int = 0
+    archive_sha256: Optional[str] = None
+
+
+def next_mode(links: List[Dict[str, Any]]) -> str:
+    """Decide whether the next archive of a folder is a delta or a consolidation.
+
+    A new base ('full') is requested when there is no base yet, when the
+    chain holds ARCHIVE_MAX_DELTAS deltas, or when the deltas together weigh
+    more than ARCHIVE_CONSOLIDATION_RATIO of the base.
+    """
+    if not links or links[0]["seq"] != 0:
+        return "full"
+    base_size = links[0]["archive_size"]
+    deltas = links[1:]
+    delta_size = sum(link["archive_size"] for link in deltas)
+    if len(deltas) >= settings.ARCHIVE_MAX_DELTAS:
+        return "full"
+    if delta_size > settings.ARCHIVE_CONSOLIDATION_RATIO * base_size:
+        return "full"
+    return "delta"
+
+
+# Create routers
+public_router = APIRouter()
+internal_router = APIRouter()
+
+
+@public_router.get("/archive_chain/{folder_key:path}", response_model=Dict[str, Any])
+@internal_router.get("/archive_chain/{folder_key:path}", response_model=Dict[str, Any])
+async def get_archive_chain(folder_key: str):
+    """Get the base and delta archives of a folder and the mode of its next archive"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT seq, archive_path, archive_size, file_count, deleted_count,
+           archive_sha256, created_at
+           FROM archive_chain WHERE folder_key = ? ORDER BY seq""",
+        (folder_key,),
+    )
+    links = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+
+    return {
+        "folder_key": folder_key,
+        "links": links,
+        "base_size": links[0]["archive_size"] if links else 0,
+        "delta_size": sum(link["archive_size"] for link in links[1:]),
+        "delta_count": max(0, len(links) - 1),
+        "next_mode": next_mode(links),
+    }
+
+
+@internal_router.post("/archive_chain/{folder_key:path}", response_model=Dict[str, Any])
+def add_archive_link(folder_key: str, link: ArchiveLinkCreate):
+    """Record an archive created for a folder (Internal use only).
+
+    A full archive starts a new chain: the previous base and deltas, which
+    the archiver has removed, are forgotten.
+    """
+    if link.mode not in ("full", "delta"):
+        raise HTTPException(status_code=400, detail=f"Invalid mode: {link.mode}")
+    if (link.mode == "full") != (link.seq == 0):
+        raise HTTPException(
+            status_code=400, detail="seq must be 0 for full archives only"
+        )
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if link.mode == "full":
+            cursor.execute(
+                "DELETE FROM archive_chain WHERE folder_key = ?", (folder_key,)
+            )
+        cursor.execute(
+            """INSERT OR REPLACE INTO archive_chain
+            (folder_key, seq, archive_path, archive_size, file_count, deleted_count,
+             archive_sha256, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                folder_key,
+                link.seq,
+                link.archive_path,
+                link.archive_size,
+                link.file_count,
+                link.deleted_count,
+                link.archive_sha256,
+                int(time.time()),
+            ),
+        )
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error recording archive for {folder_key}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        conn.close()
+
+    logger.info(f"Recorded {link.mode} archive {link.seq} for {folder_key}")
+    return {
+        "message": "Archive recorded successfully",
+        "record": {"folder_key": folder_key, **link.model_dump()},
+    }
@@ -0,0 +1,185 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import Any, Dict, Iterator, List
+import json
+import os
+
+from .base import get_db_connection, logger
+from src.config.settings import settings
+from src.services.seekable_archive import ArchiveIndex, load_index
+
+# Member of a delta archive listing the files deleted since the previous archive
+TOMBSTONE_MEMBER = ".addlidar-tombstones"
+
+
+def local_archive_path(folder_key: str, archive_path: str) -> str:
+    """Map an archive path recorded by the jobs to where the backend mounts the archives"""
+    if not settings.ARCHIVE_ROOT:
+        return archive_path
+    mission = os.path.dirname(folder_key)
+    return os.path.join(settings.ARCHIVE_ROOT, mission, os.path.basename(archive_path))
+
+
+def archive_candidates(folder_key: str) -> List[str]:
+    """Archives that may hold a file of the folder, newest delta first, base last"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT output_path FROM folder_state WHERE folder_key = ?", (folder_key,)
+    )
+    row = cursor.fetchone()
+    if not row:
+        conn.close()
+        raise HTTPException(
+            status_code=404,
+            detail=f"Folder state record not found for folder_key: {folder_key}",
+        )
+    cursor.execute(
+        "SELECT archive_path FROM archive_chain WHERE folder_key = ? ORDER BY seq DESC",
+        (folder_key,),
+    )
+    chain = [link["archive_path"] for link in cursor.fetchall()]
+    conn.close()
+
+    paths = chain or [row["output_path"]]
+    return [local_archive_path(folder_key, path) for path in paths]
+
+
+def read_member(archive_path: str, index: ArchiveIndex, name: str) -> Iterator[bytes]:
+    offset, size = index.members[name]
+    yield from index.read(archive_path, offset, size)
+
+
+def archive_parts(folder_key: str) -> List[Dict[str, Any]]:
+    """Files of the base archive of a folder: its parts, or the archive as a single part"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT output_path, archive_parts, archive_size, archive_sha256
+           FROM folder_state WHERE folder_key = ?""",
+        (folder_key,),
+    )
+    row = cursor.fetchone()
+    conn.close()
+    if not row:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Folder state record not found for folder_key: {folder_key}",
+        )
+
+    if row["archive_parts"]:
+        parts = json.loads(row["archive_parts"])
+    else:
+        parts = [
+            {
+                "path": row["output_path"],
+                "size": row["archive_size"],
+                "sha256": row["archive_sha256"],
+            }
+        ]
+    return [{"part": number, **part} for number, part in enumerate(parts, 1)]
+
+
+# Create routers
+public_router = APIRouter()
+internal_router = APIRouter()
+
+
+@public_router.get("/archive_member/{folder_key:path}")
+@internal_router.get("/archive_member/{folder_key:path}")
+def get_archive_member(
+    folder_key: str,
+    member: str = Query(..., description="Path of the file relative to the folder"),
+):
+    """Stream a single file out of a folder archive.
+
+    Only the compressed frames holding the file are read, using the sidecar
+    index written next to each archive. With differential archives the
+    newest delta holding the file wins, unless a newer delta deleted it.
+    """
+    name = f"{os.path.basename(folder_key)}/{member.strip('/')}"
+
+    for archive_path in archive_candidates(folder_key):
+        index = load_index(archive_path)
+        if index is None and not os.path.isfile(archive_path):
+            raise HTTPException(
+                status_code=404, detail=f"Archive not found: {archive_path}"
+            )
+        if index is None:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Archive has no index, recreate it to extract single files: {archive_path}",
+            )
+
+        if name in index.members:
+            logger.info(f"Streaming {name} from {archive_path}")
+            headers = {
+                "Content-Length": str(index.members[name][1]),
+                "Content-Disposition": f'attachment; filename="{os.path.basename(name)}"',
+            }
+            # Checksum recorded by the archiver, lets clients verify the download
+            if name in index.checksums:
+                headers["X-Content-SHA256"] = index.checksums[name]
+            return StreamingResponse(
+                read_member(archive_path, index, name),
+                media_type="application/octet-stream",
+                headers=headers,
+            )
+
+        if TOMBSTONE_MEMBER in index.members:
+            tombstones = b"".join(read_member(archive_path, index, TOMBSTONE_MEMBER))
+            deleted = tombstones.decode("utf-8", "surrogateescape").splitlines()
+            if member.strip("/") in deleted:
+                break
+
+    raise HTTPException(
+        status_code=404, detail=f"File not found in archives of {folder_key}: {member}"
+    )
+
+
+@public_router.get("/archive_parts/{folder_key:path}", response_model=Dict[str, Any])
+@internal_router.get("/archive_parts/{folder_key:path}", response_model=Dict[str, Any])
+def get_archive_parts(folder_key: str):
+    """List the parts of the base archive of a folder with their checksums.
+
+    Every part holds whole files and can be downloaded, decompressed and
+    extracted on its own, so clients and restore jobs can fetch and unpack
+    them concurrently. A single-file archive is listed as one part.
+    """
+    parts = archive_parts(folder_key)
+    for part in parts:
+        part["url"] = f"/sqlite/archive_part/{folder_key}?part={part['part']}"
+    return {
+        "folder_key": folder_key,
+        "part_count": len(parts),
+        "total_size": sum(part["size"] or 0 for part in parts),
+        "parts": parts,
+    }
+
+
+@public_router.get("/archive_part/{folder_key:path}")
+@internal_router.get("/archive_part/{folder_key:path}")
+def get_archive_part(
+    folder_key: str,
+    part: int = Query(1, ge=1, description="Part number, from 1"),
+):
+    """Download one part of the base archive of a folder (supports Range requests)"""
+    parts = archive_parts(folder_key)
+    if part > len(parts):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Archive of {folder_key} has {len(parts)} parts, not {part}",
+        )
+    path = local_archive_path(folder_key, parts[part - 1]["path"])
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Archive not found: {path}")
+
+    headers = {}
+    if parts[part - 1]["sha256"]:
+        headers["X-Content-SHA256"] = parts[part - 1]["sha256"]
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        filename=os.path.basename(path),
+        headers=headers,
+    )
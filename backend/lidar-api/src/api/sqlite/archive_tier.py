@@ -0,0 +1,216 @@
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
+import json
+import time
+
+from .base import get_db_connection, QueryResult, logger
+from src.config.settings import settings
+
+# storage_tier of folders whose archives were recompressed at a high level,
+# or whose recompression failed (retried once the folder is cold again)
+TIER_COLD = "cold"
+TIER_COLD_FAILED = "cold_failed"
+
+
+class RecompressedArchive(BaseModel):
+    """One archive rewritten by compression/recompress_archive.py"""
+
+    archive_path: str
+    archive_size: int
+    archive_sha256: str
+    source_sha256: str  # SHA-256 of the archive it replaced
+    compression_ratio: float
+    parts: Optional[List[Dict[str, Any]]] = None
+
+
+class RecompressionResult(BaseModel):
+    """Result file of compression/recompress_archive.py, or the error of a failed run"""
+
+    archives: List[RecompressedArchive] = []
+    complete: bool = True  # False when the off-peak window ended first
+    error_message: Optional[str] = None
+
+
+def offpeak_deadline(now: datetime) -> Optional[datetime]:
+    """End of the off-peak window now falls in, or None outside of it.
+
+    The window runs from ARCHIVE_OFFPEAK_START to ARCHIVE_OFFPEAK_END
+    (hours, backend local time) and may span midnight.
+    """
+    start, end = settings.ARCHIVE_OFFPEAK_START, settings.ARCHIVE_OFFPEAK_END
+    if start == end:
+        return None
+    if start < end:
+        inside = start <= now.hour < end
+    else:
+        inside = now.hour >= start or now.hour < end
+    if not inside:
+        return None
+    deadline = now.replace(hour=end, minute=0, second=0, microsecond=0)
+    if deadline <= now:
+        deadline += timedelta(days=1)
+    return deadline
+
+
+# Create routers
+public_router = APIRouter()
+internal_router = APIRouter()
+
+
+@internal_router.get("/recompression_candidates", response_model=QueryResult)
+async def get_recompression_candidates(
+    limit: int = Query(10, ge=1, le=1000),
+):
+    """Folders whose archives should be recompressed at a high level, largest first.
+
+    A folder is cold when no folder of its mission was archived, or found
+    changed by the scanner, for ARCHIVE_COLD_AFTER_DAYS days. Nothing is
+    returned outside the off-peak window; each folder carries the deadline
+    (epoch) at which the window closes.
+    """
+    deadline = offpeak_deadline(datetime.now())
+    if deadline is None:
+        return QueryResult(data=[], count=0)
+    cutoff = int(time.time()) - settings.ARCHIVE_COLD_AFTER_DAYS * 86400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT f.folder_key, f.mission_key, f.output_path, f.archive_size,
+           f.compression_ratio, f.last_processed
+        FROM folder_state f
+        WHERE f.processing_status = 'success'
+          AND (f.storage_tier IS NULL
+               OR (f.storage_tier = ? AND f.recompressed_at < ?))
+          AND NOT EXISTS (
+            SELECT 1 FROM folder_state m
+            WHERE m.mission_key = f.mission_key
+              AND (m.last_processed IS NULL OR m.last_processed >= ?
+                   OR m.processing_status != 'success'))
+          AND NOT EXISTS (
+            SELECT 1 FROM archive_chain a
+            WHERE a.folder_key = f.folder_key AND a.created_at >= ?)
+        ORDER BY f.archive_size DESC
+        LIMIT ?""",
+        (TIER_COLD_FAILED, cutoff, cutoff, cutoff, limit),
+    )
+    data = [
+        {**dict(row), "deadline": int(deadline.timestamp())}
+        for row in cursor.fetchall()
+    ]
+    conn.close()
+
+    return QueryResult(data=data, count=len(data))
+
+
+@internal_router.put(
+    "/recompressed_archive/{folder_key:path}", response_model=Dict[str, Any]
+)
+def record_recompressed_archive(folder_key: str, result: RecompressionResult):
+    """Record the archives of a folder rewritten at a high level (Internal use only).
+
+    Unlike a new archive, this keeps last_processed: the folder stays cold.
+    The archive fields of folder_state describe the base (full) archive of
+    the chain; a complete result that does not include it means a
+    compression job rewrote the folder meanwhile. Every archive_chain row
+    gets the new size and checksum of its archive.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT archive_sha256 FROM folder_state WHERE folder_key = ?", (folder_key,)
+    )
+    row = cursor.fetchone()
+    if not row:
+        conn.close()
+        raise HTTPException(
+            status_code=404,
+            detail=f"Folder state record not found for folder_key: {folder_key}",
+        )
+
+    now = int(time.time())
+    try:
+        if result.error_message is not None:
+            cursor.execute(
+                """UPDATE folder_state SET storage_tier = ?, recompressed_at = ?
+                WHERE folder_key = ?""",
+                (TIER_COLD_FAILED, now, folder_key),
+            )
+            conn.commit()
+            logger.warning(
+                f"Recompression failed for {folder_key}: {result.error_message}"
+            )
+            return {"message": "Recompression failure recorded", "record": None}
+
+        # The base archive folder_state describes, unless a compression job replaced it
+        base = next(
+            (
+                archive
+                for archive in result.archives
+                if archive.source_sha256 == row["archive_sha256"]
+            ),
+            None,
+        )
+        if (
+            result.complete
+            and result.archives
+            and row["archive_sha256"] is not None
+            and base is None
+        ):
+            raise HTTPException(
+                status_code=409,
+                detail=f"Archive of {folder_key} changed since it was recompressed",
+            )
+
+        for archive in result.archives:
+            cursor.execute(
+                """UPDATE archive_chain SET archive_size = ?, archive_sha256 = ?
+                WHERE folder_key = ? AND archive_path = ?""",
+                (
+                    archive.archive_size,
+                    archive.archive_sha256,
+                    folder_key,
+                    archive.archive_path,
+                ),
+            )
+        update_fields = ["recompressed_at = ?"]
+        update_values: List[Any] = [now]
+        if result.complete:
+            update_fields.append("storage_tier = ?")
+            update_values.append(TIER_COLD)
+        if base is not None:
+            update_fields += [
+                "archive_size = ?",
+                "archive_sha256 = ?",
+                "compression_ratio = ?",
+                "archive_parts = ?",
+            ]
+            update_values += [
+                base.archive_size,
+                base.archive_sha256,
+                base.compression_ratio,
+                json.dumps(base.parts) if base.parts else None,
+            ]
+        cursor.execute(
+            f"UPDATE folder_state SET {', '.join(update_fields)} WHERE folder_key = ?",
+            (*update_values, folder_key),
+        )
+        conn.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error recording recompression of {folder_key}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        conn.close()
+
+    logger.info(
+        f"Recorded {len(result.archives)} recompressed archives for {folder_key}"
+    )
+    return {
+        "message": "Recompressed archives recorded successfully",
+        "record": {"folder_key": folder_key, **result.model_dump()},
+    }
@@ -0,0 +1,169 @@
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from typing import Dict, Any, List, Optional
+import time
+
+from .base import get_db_connection, QueryResult, logger
+
+
+class BenchmarkResult(BaseModel):
+    """One archive created by compression/benchmark.py"""
+
+    folder: str
+    data_kind: str  # extension holding most of the folder's bytes, e.g. 'laz'
+    variant: str
+    codec: str  # 'gzip', 'zstd' or 'lz4'
+    level: int
+    threads: int
+    input_size: int
+    archive_size: int
+    elapsed: float
+    peak_rss_mb: float
+
+
+class BenchmarkRun(BaseModel):
+    run_id: str
+    results: List[BenchmarkResult]
+
+
+# Throughput and ratio are derived from the measured sizes and time
+RESULT_COLUMNS = """
+      run_id,
+      folder,
+      data_kind,
+      variant,
+      codec,
+      level,
+      threads,
+      input_size,
+      archive_size,
+      elapsed,
+      peak_rss_mb,
+      input_size / 1048576.0 / elapsed AS throughput_mbps,
+      CAST(archive_size AS REAL) / MAX(input_size, 1) AS ratio,
+      datetime(created_at,'unixepoch') AS created_time
+"""
+
+
+# Create routers
+public_router = APIRouter()
+internal_router = APIRouter()
+
+
+@public_router.get("/compression_benchmark", response_model=QueryResult)
+@internal_router.get("/compression_benchmark", response_model=QueryResult)
+async def get_compression_benchmark(
+    run_id: Optional[str] = Query(None, description="Only the results of this run"),
+    codec: Optional[str] = Query(None, description="Only the results of this codec"),
+    data_kind: Optional[str] = Query(None, description="e.g. las, laz, pcd"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    """Get codec benchmark results, newest run first"""
+    filters, values = [], []
+    for column, value in (
+        ("run_id", run_id),
+        ("codec", codec),
+        ("data_kind", data_kind),
+    ):
+        if value is not None:
+            filters.append(f"{column} = ?")
+            values.append(value)
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""SELECT {RESULT_COLUMNS} FROM compression_benchmark {where}
+        ORDER BY created_at DESC, folder, codec, level, threads
+        LIMIT ? OFFSET ?""",
+        (*values, limit, offset),
+    )
+    data = [dict(row) for row in cursor.fetchall()]
+    cursor.execute(
+        f"SELECT COUNT(*) as count FROM compression_benchmark {where}", values
+    )
+    count = cursor.fetchone()["count"]
+    conn.close()
+
+    return QueryResult(data=data, count=count)
+
+
+@public_router.get("/compression_benchmark/summary", response_model=QueryResult)
+@internal_router.get("/compression_benchmark/summary", response_model=QueryResult)
+async def get_compression_benchmark_summary(
+    run_id: Optional[str] = Query(None, description="Only the results of this run"),
+):
+    """Compare variants per kind of data: overall throughput and ratio, worst peak memory.
+
+    Sizes are summed over the sample folders, so large folders weigh more.
+    """
+    where = "WHERE run_id = ?" if run_id is not None else ""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""SELECT
+          data_kind,
+          variant,
+          codec,
+          level,
+          threads,
+          COUNT(*) AS folders,
+          SUM(input_size) / 1048576.0 / SUM(elapsed) AS throughput_mbps,
+          CAST(SUM(archive_size) AS REAL) / MAX(SUM(input_size), 1) AS ratio,
+          MAX(peak_rss_mb) AS peak_rss_mb
+        FROM compression_benchmark {where}
+        GROUP BY data_kind, variant, codec, level, threads
+        ORDER BY data_kind, ratio""",
+        (run_id,) if run_id is not None else (),
+    )
+    data = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+
+    return QueryResult(data=data, count=len(data))
+
+
+@internal_router.post("/compression_benchmark", response_model=Dict[str, Any])
+def add_compression_benchmark(run: BenchmarkRun):
+    """Record the results of a benchmark run (Internal use only)"""
+    created_at = int(time.time())
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(
+            """INSERT OR REPLACE INTO compression_benchmark
+            (run_id, folder, data_kind, variant, codec, level, threads,
+             input_size, archive_size, elapsed, peak_rss_mb, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [
+                (
+                    run.run_id,
+                    result.folder,
+                    result.data_kind,
+                    result.variant,
+                    result.codec,
+                    result.level,
+                    result.threads,
+                    result.input_size,
+                    result.archive_size,
+                    result.elapsed,
+                    result.peak_rss_mb,
+                    created_at,
+                )
+                for result in run.results
+            ],
+        )
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error recording benchmark run {run.run_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        conn.close()
+
+    logger.info(f"Recorded {len(run.results)} benchmark results for run {run.run_id}")
+    return {
+        "message": "Benchmark results recorded successfully",
+        "run_id": run.run_id,
+        "count": len(run.results),
+    }
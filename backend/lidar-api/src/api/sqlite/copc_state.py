@@ -0,0 +1,258 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import BaseModel
+from typing import Dict, Any, Optional
+import os
+import time
+
+from .base import get_db_connection, QueryResult, logger
+from .potree_output import potree_etag, potree_version, ranged_file_response
+from src.config.settings import settings
+
+COPC_COLUMNS = """
+      mission_key,
+      fp,
+      output_path,
+      last_checked,
+      last_processed,
+      processing_time,
+      processing_status,
+      error_message,
+      detailed_error_message,
+      input_points,
+      input_size,
+      output_size,
+      datetime(last_checked,'unixepoch') AS last_checked_time,
+      datetime(last_processed,'unixepoch') AS last_processed_time"""
+
+
+class CopcStateUpdate(BaseModel):
+    fingerprint: Optional[str] = None
+    processing_status: Optional[str]  # 'success', 'failed', 'empty'
+    processing_time: Optional[int] = None
+    error_message: Optional[str] = None
+    detailed_error_message: Optional[str] = None
+    output_size: Optional[int] = None
+
+
+class CopcStateCreate(BaseModel):
+    mission_key: str
+    fingerprint: str
+    output_path: str
+    processing_status: Optional[str] = "pending"
+    input_points: Optional[int] = None
+    input_size: Optional[int] = None
+
+
+def copc_file_path(mission_key: str, output_path: Optional[str]) -> str:
+    """Map the output path recorded by the scanner to where the backend mounts it"""
+    if settings.COPC_ROOT and output_path:
+        return os.path.join(settings.COPC_ROOT, os.path.basename(output_path))
+    return output_path or ""
+
+
+# Create routers
+public_router = APIRouter()
+internal_router = APIRouter()
+
+
+@public_router.get("/copc_state", response_model=QueryResult)
+@internal_router.get("/copc_state", response_model=QueryResult)
+async def get_copc_state(
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    """Get COPC conversion state information"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""SELECT {COPC_COLUMNS}
+        FROM copc_state
+        ORDER BY last_checked DESC
+        LIMIT ? OFFSET ?""",
+        (limit, offset),
+    )
+    data = [dict(row) for row in cursor.fetchall()]
+    cursor.execute("SELECT COUNT(*) as count FROM copc_state")
+    count = cursor.fetchone()["count"]
+    conn.close()
+
+    return QueryResult(data=data, count=count)
+
+
+@public_router.get("/copc_state/{mission_key}", response_model=Dict[str, Any])
+@internal_router.get("/copc_state/{mission_key}", response_model=Dict[str, Any])
+async def get_copc_state_by_mission(mission_key: str):
+    """Get COPC conversion state for a specific mission"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT {COPC_COLUMNS} FROM copc_state WHERE mission_key = ?",
+        (mission_key,),
+    )
+    row = cursor.fetchone()
+    conn.close()
+    if not row:
+        raise HTTPException(
+            status_code=404,
+            detail=f"COPC state not found for mission: {mission_key}",
+        )
+
+    return dict(row)
+
+
+@internal_router.post("/copc_state", response_model=Dict[str, Any])
+def create_copc_state(create_data: CopcStateCreate):
+    """Create or reset the COPC state of a mission queued for conversion (Internal use only)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    current_time = int(time.time())
+    try:
+        cursor.execute(
+            """INSERT INTO copc_state
+            (mission_key, fp, output_path, last_checked, last_processed, processing_status,
+             input_points, input_size)
+            VALUES (?, ?, ?, ?, NULL, ?, ?, ?)
+            ON CONFLICT(mission_key) DO UPDATE SET
+            fp = excluded.fp,
+            output_path = excluded.output_path,
+            last_checked = excluded.last_checked,
+            processing_status = excluded.processing_status,
+            input_points = excluded.input_points,
+            input_size = excluded.input_size""",
+            (
+                create_data.mission_key,
+                create_data.fingerprint,
+                create_data.output_path,
+                current_time,
+                create_data.processing_status,
+                create_data.input_points,
+                create_data.input_size,
+            ),
+        )
+        conn.commit()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error creating COPC state: {str(e)}"
+        )
+    finally:
+        conn.close()
+
+    return {
+        "message": "COPC state created successfully",
+        "mission_key": create_data.mission_key,
+    }
+
+
+@internal_router.put("/copc_state/{mission_key:path}", response_model=Dict[str, Any])
+def update_copc_state(mission_key: str, update_data: CopcStateUpdate):
+    """Record the outcome of a COPC conversion (Internal use only)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT mission_key FROM copc_state WHERE mission_key = ?", (mission_key,)
+    )
+    if not cursor.fetchone():
+        conn.close()
+        raise HTTPException(
+            status_code=404,
+            detail=f"COPC state record not found for mission_key: {mission_key}",
+        )
+
+    update_fields = ["last_processed = ?", "processing_status = ?"]
+    update_values = [int(time.time()), update_data.processing_status]
+    for column, value in (
+        ("fp", update_data.fingerprint),
+        ("processing_time", update_data.processing_time),
+        ("error_message", update_data.error_message),
+        ("detailed_error_message", update_data.detailed_error_message),
+        ("output_size", update_data.output_size),
+    ):
+        if value is not None:
+            update_fields.append(f"{column} = ?")
+            update_values.append(value)
+        elif update_data.processing_status == "success" and column.endswith(
+            "error_message"
+        ):
+            # Clear error messages on success
+            update_fields.append(f"{column} = NULL")
+    update_values.append(mission_key)
+
+    cursor.execute(
+        f"UPDATE copc_state SET {', '.join(update_fields)} WHERE mission_key = ?",
+        update_values,
+    )
+    conn.commit()
+    conn.close()
+    logger.info(f"COPC state of {mission_key}: {update_data.processing_status}")
+
+    return {"message": "COPC state updated successfully", "mission_key": mission_key}
+
+
+@internal_router.patch(
+    "/copc_state/{mission_key:path}/last_checked", response_model=Dict[str, Any]
+)
+def update_copc_last_checked(mission_key: str):
+    """Update only the last_checked timestamp of a mission's COPC state (Internal use only)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "UPDATE copc_state SET last_checked = ? WHERE mission_key = ?",
+        (int(time.time()), mission_key),
+    )
+    conn.commit()
+    updated = cursor.rowcount
+    conn.close()
+    if not updated:
+        raise HTTPException(
+            status_code=404,
+            detail=f"COPC state record not found for mission_key: {mission_key}",
+        )
+
+    return {"message": "COPC state last_checked updated successfully"}
+
+
+@public_router.get("/copc/{mission_key}")
+@internal_router.get("/copc/{mission_key}")
+def get_copc_file(
+    request: Request,
+    mission_key: str,
+    v: Optional[str] = Query(None, description="X-Copc-Version of an earlier response"),
+):
+    """Serve the COPC file of a mission, for streaming with byte ranges.
+
+    Readers fetch the header and hierarchy pages first, then only the
+    chunks of the level of detail they need. Like the Potree files, the
+    ETag changes with every conversion and ?v= makes responses immutable.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT fp, output_path, processing_status, last_processed
+           FROM copc_state WHERE mission_key = ?""",
+        (mission_key,),
+    )
+    row = cursor.fetchone()
+    conn.close()
+    if not row or row["processing_status"] != "success":
+        raise HTTPException(
+            status_code=404, detail=f"No COPC conversion of mission: {mission_key}"
+        )
+    path = copc_file_path(mission_key, row["output_path"])
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"COPC file not found: {path}")
+
+    version = potree_version(row["fp"], row["last_processed"])
+    etag = potree_etag(row["fp"], row["last_processed"], os.path.basename(path))
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": (
+            "public, max-age=31536000, immutable"
+            if v == version
+            else f"public, max-age={settings.POTREE_CACHE_MAX_AGE}"
+        ),
+        "X-Copc-Version": version,
+    }
+    return ranged_file_response(
+        request, path, etag, headers, "application/vnd.laszip+copc"
+    )
@@ -0,0 +1,185 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Any, Iterable, Tuple
+import os
+import tarfile
+import time
+import zstandard
+
+from .archive_member import TOMBSTONE_MEMBER, archive_candidates, read_member
+from .base import get_db_connection, QueryResult, logger
+from src.services.seekable_archive import load_index
+
+# Upper bound for the total reported by a search, so common substrings stay fast
+SEARCH_COUNT_CAP = 10000
+
+
+def index_folder_files(folder_key: str, entries: Iterable[Tuple[str, int]]) -> int:
+    """Replace the indexed file paths of a folder.
+
+    Args:
+        folder_key: folder_state key the files belong to
+        entries: (path relative to the folder, size in bytes) pairs
+
+    Returns:
+        Number of files indexed
+    """
+    start = time.monotonic()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        # One transaction per folder: readers never see a half-indexed folder
+        cursor.execute("DELETE FROM archived_file WHERE folder_key = ?", (folder_key,))
+        cursor.executemany(
+            "INSERT INTO archived_file (folder_key, path, size) VALUES (?, ?, ?)",
+            (
+                (folder_key, f"{folder_key}/{rel_path}", size)
+                for rel_path, size in entries
+            ),
+        )
+        cursor.execute(
+            "SELECT COUNT(*) AS count FROM archived_file WHERE folder_key = ?",
+            (folder_key,),
+        )
+        count = cursor.fetchone()["count"]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    logger.info(
+        f"Indexed {count} file paths for {folder_key} in {time.monotonic() - start:.2f}s"
+    )
+    return count
+
+
+def list_archive_members(archive_path: str) -> Iterable[Tuple[str, int]]:
+    """List regular files of a folder archive as (path relative to the folder, size).
+
+    Archives are created with `tar -C <mission> <folder>`, so the first path
+    component of every member is the folder name and is stripped. Both
+    .tar.gz and .tar.zst archives are supported.
+    """
+    with open(archive_path, "rb") as f:
+        if archive_path.endswith(".zst"):
+            stream = zstandard.ZstdDecompressor().stream_reader(f)
+            mode = "r|"
+        else:
+            stream, mode = f, "r|*"
+        with tarfile.open(fileobj=stream, mode=mode) as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                _, _, rel_path = member.name.partition("/")
+                if rel_path:
+                    yield rel_path, member.size
+
+
+def fts_phrase(query: str) -> str:
+    """Quote a user query as a single FTS5 phrase (substring match with trigrams)"""
+    return '"' + query.replace('"', '""') + '"'
+
+
+# Create routers
+public_router = APIRouter()
+internal_router = APIRouter()
+
+
+@public_router.get("/file_index/search", response_model=QueryResult)
+@internal_router.get("/file_index/search", response_model=QueryResult)
+async def search_file_index(
+    q: str = Query(..., min_length=3, description="Substring of the file path"),
+    limit: int = Query(100, ge=1, le=1000),
+    after: int = Query(
+        0, ge=0, description="Return matches after this id (the last id of a page)"
+    ),
+) -> QueryResult:
+    """Find which archive contains a file, by substring of its path
+
+    Matches come in index order and are paged by id, so a page never sorts or
+    skips over the whole match set.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    query = """
+    SELECT
+      f.id,
+      f.folder_key,
+      f.path,
+      f.size,
+      s.output_path,
+      s.processing_status
+    FROM archived_file_fts
+    JOIN archived_file f ON f.id = archived_file_fts.rowid
+    LEFT JOIN folder_state s ON s.folder_key = f.folder_key
+    WHERE archived_file_fts MATCH ? AND archived_file_fts.rowid > ?
+    ORDER BY archived_file_fts.rowid
+    LIMIT ?
+    """
+    phrase = fts_phrase(q)
+    cursor.execute(query, (phrase, after, limit))
+    rows = cursor.fetchall()
+
+    cursor.execute(
+        """SELECT COUNT(*) AS count FROM (
+           SELECT 1 FROM archived_file_fts WHERE archived_file_fts MATCH ? LIMIT ?
+           )""",
+        (phrase, SEARCH_COUNT_CAP),
+    )
+    count = cursor.fetchone()["count"]
+    conn.close()
+
+    return QueryResult(data=[dict(row) for row in rows], count=count)
+
+
+def archive_chain_files(folder_key: str) -> Dict[str, int]:
+    """Files of a folder as stored by its archives: the base, then each delta.
+
+    Members are read from the sidecar index of each archive (or part set);
+    an archive without index is listed by reading it, which only legacy
+    single-file archives need. Delta tombstones remove deleted files.
+    """
+    files: Dict[str, int] = {}
+    for archive_path in reversed(archive_candidates(folder_key)):
+        index = load_index(archive_path)
+        if index is None:
+            if not os.path.isfile(archive_path):
+                raise HTTPException(
+                    status_code=404, detail=f"Archive not found: {archive_path}"
+                )
+            files.update(list_archive_members(archive_path))
+            continue
+
+        if TOMBSTONE_MEMBER in index.members:
+            tombstones = b"".join(read_member(archive_path, index, TOMBSTONE_MEMBER))
+            for rel_path in tombstones.decode("utf-8", "surrogateescape").splitlines():
+                files.pop(rel_path, None)
+        for name, (_, size) in index.members.items():
+            _, _, rel_path = name.partition("/")
+            if rel_path:
+                files[rel_path] = size
+    return files
+
+
+@internal_router.post(
+    "/file_index/{folder_key:path}/from_archive", response_model=Dict[str, Any]
+)
+def index_from_archive(folder_key: str):
+    """Rebuild the index of a folder from its archives (Internal use only).
+
+    Fallback for folders without a scanner manifest. The base archive and
+    its deltas are listed from their sidecar indexes, so only archives
+    without index are read.
+    """
+    try:
+        files = archive_chain_files(folder_key)
+        count = index_folder_files(folder_key, files.items())
+    except tarfile.TarError as e:
+        raise HTTPException(status_code=500, detail=f"Error reading archive: {str(e)}")
+
+    return {
+        "message": "File index rebuilt from archive",
+        "record": {"folder_key": folder_key, "file_count": count},
+    }
@@ -0,0 +1,186 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import Any, Dict, Optional
+import os
+import time
+
+from .base import get_db_connection, QueryResult, logger
+from .archive_member import local_archive_path
+from src.config.settings import settings
+from src.services.folder_stream import (
+    STREAM_EXTENSIONS,
+    compressed,
+    get_archive_cache,
+    tar_stream,
+)
+
+
+def record_request(folder_key: str, source: str) -> int:
+    """Record a download of a folder archive.
+
+    Returns:
+        Requests of the folder within ARCHIVE_POPULAR_DAYS, this one included
+    """
+    now = int(time.time())
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO archive_request (folder_key, requested_at, source) VALUES (?, ?, ?)",
+            (folder_key, now, source),
+        )
+        conn.commit()
+        cursor.execute(
+            """SELECT COUNT(*) AS count FROM archive_request
+            WHERE folder_key = ? AND requested_at >= ?""",
+            (folder_key, now - settings.ARCHIVE_POPULAR_DAYS * 86400),
+        )
+        return cursor.fetchone()["count"]
+    finally:
+        conn.close()
+
+
+def precomputed_archive(
+    row: Dict[str, Any], folder_key: str, codec: str
+) -> Optional[str]:
+    """Archive written by a compression job, if it is one file holding the whole folder"""
+    if row["processing_status"] != "success" or row["archive_parts"]:
+        return None
+    if not row["output_path"].endswith(STREAM_EXTENSIONS[codec]):
+        return None
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT COUNT(*) AS count FROM archive_chain WHERE folder_key = ? AND seq > 0",
+        (folder_key,),
+    )
+    deltas = cursor.fetchone()["count"]
+    conn.close()
+    path = local_archive_path(folder_key, row["output_path"])
+    return path if not deltas and os.path.isfile(path) else None
+
+
+# Create routers
+public_router = APIRouter()
+internal_router = APIRouter()
+
+
+@public_router.get("/folder_archive/{folder_key:path}")
+@internal_router.get("/folder_archive/{folder_key:path}")
+def get_folder_archive(
+    folder_key: str,
+    codec: str = Query("zstd", description="'zstd' for a .tar.zst, 'none' for a .tar"),
+):
+    """Download a whole folder as a tar archive, made on demand if needed.
+
+    The archive written by the compression job is sent when there is one.
+    Otherwise a tar is streamed straight from the LiDAR folder while it is
+    read, without writing an archive first. Folders requested at least
+    ARCHIVE_POPULAR_REQUESTS times within ARCHIVE_POPULAR_DAYS are also kept
+    in a size-bounded LRU cache. The X-Archive-Source header tells which.
+    """
+    if codec not in STREAM_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid codec: {codec}")
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT fp, output_path, processing_status, archive_parts
+           FROM folder_state WHERE folder_key = ?""",
+        (folder_key,),
+    )
+    row = cursor.fetchone()
+    conn.close()
+    if not row:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Folder state record not found for folder_key: {folder_key}",
+        )
+
+    filename = os.path.basename(folder_key) + STREAM_EXTENSIONS[codec]
+    media_type = "application/zstd" if codec == "zstd" else "application/x-tar"
+
+    archive = precomputed_archive(dict(row), folder_key, codec)
+    if archive is not None:
+        record_request(folder_key, "archive")
+        return FileResponse(
+            archive,
+            media_type=media_type,
+            filename=filename,
+            headers={"X-Archive-Source": "archive"},
+        )
+
+    cache = get_archive_cache(
+        settings.ARCHIVE_CACHE_DIR, int(settings.ARCHIVE_CACHE_MAX_GB * 1024**3)
+    )
+    cached = cache.get(folder_key, row["fp"], codec) if cache else None
+    if cached is not None:
+        record_request(folder_key, "cache")
+        return FileResponse(
+            cached,
+            media_type=media_type,
+            filename=filename,
+            headers={"X-Archive-Source": "cache"},
+        )
+
+    if not settings.LIDAR_ROOT:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No archive of {folder_key}, and on-demand archives are disabled",
+        )
+    folder = os.path.join(settings.LIDAR_ROOT, folder_key)
+    if not os.path.isdir(folder):
+        raise HTTPException(status_code=404, detail=f"Folder not found: {folder_key}")
+
+    requests = record_request(folder_key, "stream")
+    # Entries streamed, to only cache an archive of the contents row["fp"] names
+    listing = []
+    chunks = compressed(tar_stream(folder, listing), codec)
+    if cache is not None and requests >= settings.ARCHIVE_POPULAR_REQUESTS:
+        chunks = cache.store(chunks, folder_key, row["fp"], codec, listing)
+    logger.info(f"Streaming on-demand archive of {folder_key} ({requests} requests)")
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Archive-Source": "stream",
+        },
+    )
+
+
+@public_router.get("/archive_demand", response_model=QueryResult)
+@internal_router.get("/archive_demand", response_model=QueryResult)
+async def get_archive_demand(
+    days: Optional[int] = Query(
+        None, ge=1, description="Window in days (default: ARCHIVE_POPULAR_DAYS)"
+    ),
+    min_requests: int = Query(1, ge=1, description="Only folders requested this often"),
+    limit: int = Query(100, ge=1, le=10000),
+):
+    """Folder archive downloads per folder, most requested first.
+
+    The scanner pre-archives only the folders requested at least
+    --archive-min-requests times; the others are streamed on demand.
+    """
+    since = int(time.time()) - (days or settings.ARCHIVE_POPULAR_DAYS) * 86400
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT
+          folder_key,
+          COUNT(*) AS requests,
+          SUM(source = 'stream') AS streamed,
+          MAX(requested_at) AS last_requested,
+          datetime(MAX(requested_at),'unixepoch') AS last_requested_time
+        FROM archive_request
+        WHERE requested_at >= ?
+        GROUP BY folder_key
+        HAVING COUNT(*) >= ?
+        ORDER BY requests DESC, last_requested DESC
+        LIMIT ?""",
+        (since, min_requests, limit),
+    )
+    data = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+
+    return QueryResult(data=data, count=len(data))
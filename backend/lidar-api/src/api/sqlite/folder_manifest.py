@@ -0,0 +1,331 @@
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, Header
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Any, List, Tuple
+from collections import OrderedDict
+import gzip
+import threading
+import time
+import zlib
+
+from .base import get_db_connection, QueryResult, logger
+from .file_index import index_folder_files
+from src.config.settings import settings
+
+
+class DirectoryIndex:
+    """In-memory view of a folder manifest with per-directory aggregates.
+
+    Built once per (folder_key, fingerprint) and kept in an LRU cache, so that
+    browsing a folder with millions of files only decompresses its manifest on
+    the first request.
+    """
+
+    def __init__(self, manifest: bytes):
+        # directory path ("" for the folder root) -> sorted child directory names
+        self.subdirs: Dict[str, List[str]] = {}
+        # directory path -> sorted (name, size, mtime) of the files it contains
+        self.files: Dict[str, List[Tuple[str, int, float]]] = {"": []}
+        # directory path -> [total_size, file_count, latest_mtime] of its subtree
+        self.aggregates: Dict[str, List[float]] = {"": [0, 0, 0.0]}
+
+        children: Dict[str, set] = {"": set()}
+        for rel_path, size, mtime in parse_manifest(manifest):
+            parent, _, name = rel_path.rpartition("/")
+            self.files.setdefault(parent, []).append((name, size, mtime))
+
+            # Walk up the ancestors, registering directories and summing sizes
+            directory = parent
+            while True:
+                totals = self.aggregates.setdefault(directory, [0, 0, 0.0])
+                totals[0] += size
+                totals[1] += 1
+                totals[2] = max(totals[2], mtime)
+                if not directory:
+                    break
+                up, _, dir_name = directory.rpartition("/")
+                children.setdefault(up, set()).add(dir_name)
+                directory = up
+
+        for directory, names in children.items():
+            self.subdirs[directory] = sorted(names)
+        for listing in self.files.values():
+            listing.sort()
+
+    def exists(self, directory: str) -> bool:
+        return directory in self.aggregates
+
+    def count(self, directory: str) -> int:
+        return len(self.subdirs.get(directory, [])) + len(self.files.get(directory, []))
+
+    def listing(self, directory: str, limit: int, offset: int) -> List[Dict[str, Any]]:
+        """Return one page of a directory: subdirectories first, then files"""
+        subdirs = self.subdirs.get(directory, [])
+        files = self.files.get(directory, [])
+        prefix = f"{directory}/" if directory else ""
+
+        entries = []
+        for name in subdirs[offset : offset + limit]:
+            size, count, mtime = self.aggregates[prefix + name]
+            entries.append(
+                {
+                    "name": name,
+                    "type": "directory",
+                    "size_bytes": size,
+                    "file_count": count,
+                    "mtime": mtime,
+                }
+            )
+
+        file_offset = max(0, offset - len(subdirs))
+        for name, size, mtime in files[
+            file_offset : file_offset + limit - len(entries)
+        ]:
+            entries.append(
+                {
+                    "name": name,
+                    "type": "file",
+                    "size_bytes": size,
+                    "file_count": 1,
+                    "mtime": mtime,
+                }
+            )
+        return entries
+
+
+def parse_manifest(manifest: bytes) -> List[Tuple[str, int, float]]:
+    """Decode a manifest uploaded by the scanner into (path, size, mtime) tuples"""
+    text = gzip.decompress(manifest).decode("utf-8", "surrogateescape")
+    entries = []
+    for line in text.splitlines():
+        if not line:
+            continue
+        # Split from the right so tabs inside file names are kept
+        rel_path, size, mtime = line.rsplit("\t", 2)
+        entries.append((rel_path, int(size), float(mtime)))
+    return entries
+
+
+# LRU of DirectoryIndex keyed by (folder_key, fp)
+_index_cache: "OrderedDict[Tuple[str, str], DirectoryIndex]" = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def get_directory_index(folder_key: str) -> DirectoryIndex:
+    """Load the DirectoryIndex of a folder, from cache when its fingerprint is unchanged"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT fp FROM folder_manifest WHERE folder_key = ?", (folder_key,))
+    row = cursor.fetchone()
+    if not row:
+        conn.close()
+        raise HTTPException(
+            status_code=404,
+            detail=f"No file manifest found for folder_key: {folder_key}",
+        )
+
+    cache_key = (folder_key, row["fp"])
+    with _index_cache_lock:
+        if cache_key in _index_cache:
+            _index_cache.move_to_end(cache_key)
+            conn.close()
+            return _index_cache[cache_key]
+
+    cursor.execute(
+        "SELECT manifest FROM folder_manifest WHERE folder_key = ?", (folder_key,)
+    )
+    manifest = cursor.fetchone()["manifest"]
+    conn.close()
+
+    start = time.monotonic()
+    index = DirectoryIndex(manifest)
+    logger.info(
+        f"Built directory index for {folder_key} in {time.monotonic() - start:.2f}s"
+    )
+
+    with _index_cache_lock:
+        _index_cache[cache_key] = index
+        _index_cache.move_to_end(cache_key)
+        while len(_index_cache) > settings.MANIFEST_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def store_folder_manifest(
+    folder_key: str, fp: str, manifest: bytes
+) -> List[Tuple[str, int, float]]:
+    """Validate a gzip-compressed manifest and store it, returning its entries"""
+    try:
+        entries = parse_manifest(manifest)
+    except (OSError, EOFError, ValueError, zlib.error) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid manifest: {str(e)}")
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """INSERT INTO folder_manifest
+        (folder_key, fp, file_count, total_size, manifest, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(folder_key) DO UPDATE SET
+        fp = excluded.fp,
+        file_count = excluded.file_count,
+        total_size = excluded.total_size,
+        manifest = excluded.manifest,
+        updated_at = excluded.updated_at""",
+        (
+            folder_key,
+            fp,
+            len(entries),
+            sum(size for _, size, _ in entries),
+            manifest,
+            int(time.time()),
+        ),
+    )
+    conn.commit()
+    conn.close()
+    return entries
+
+
+# Create routers
+public_router = APIRouter()
+internal_router = APIRouter()
+
+
+@internal_router.put(
+    "/folder_manifest/{folder_key:path}", response_model=Dict[str, Any]
+)
+async def put_folder_manifest(
+    folder_key: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    x_fingerprint: str = Header(...),
+):
+    """Store the gzip-compressed file manifest of a folder (Internal use only).
+
+    The file path search index is refreshed from the same entries once the
+    response has been sent.
+    """
+    manifest = await request.body()
+    # Decompressing and storing block: keep them off the event loop so other
+    # requests, and the write backpressure accounting, see this one in flight
+    entries = await run_in_threadpool(
+        store_folder_manifest, folder_key, x_fingerprint, manifest
+    )
+    file_count = len(entries)
+    total_size = sum(size for _, size, _ in entries)
+
+    background_tasks.add_task(
+        index_folder_files,
+        folder_key,
+        [(rel_path, size) for rel_path, size, _ in entries],
+    )
+
+    return {
+        "message": "Folder manifest stored successfully",
+        "record": {
+            "folder_key": folder_key,
+            "fp": x_fingerprint,
+            "file_count": file_count,
+            "total_size": total_size,
+            "compressed_size": len(manifest),
+        },
+    }
+
+
+@public_router.get("/folder_manifest/{folder_key:path}", response_model=Dict[str, Any])
+@internal_router.get(
+    "/folder_manifest/{folder_key:path}", response_model=Dict[str, Any]
+)
+async def get_folder_manifest(folder_key: str):
+    """Get manifest metadata (without the file list) for a folder"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT folder_key, fp, file_count, total_size, updated_at,
+           length(manifest) AS compressed_size
+           FROM folder_manifest WHERE folder_key = ?""",
+        (folder_key,),
+    )
+    row = cursor.fetchone()
+    conn.close()
+
+    if not row:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No file manifest found for folder_key: {folder_key}",
+        )
+
+    return dict(row)
+
+
+@public_router.get("/browse", response_model=QueryResult)
+@internal_router.get("/browse", response_model=QueryResult)
+@public_router.get("/browse/{path:path}", response_model=QueryResult)
+@internal_router.get("/browse/{path:path}", response_model=QueryResult)
+def browse(
+    path: str = "",
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+) -> QueryResult:
+    """Browse the LiDAR tree without touching the NAS.
+
+    The two top levels (missions and their folders) come from folder_state,
+    anything below a folder is served from its stored file manifest. A plain
+    def, so FastAPI runs it in its threadpool: decompressing a manifest and
+    indexing millions of entries must not block the event loop.
+    """
+    parts = [part for part in path.split("/") if part]
+
+    if len(parts) >= 2:
+        folder_key = "/".join(parts[:2])
+        directory = "/".join(parts[2:])
+        index = get_directory_index(folder_key)
+        if not index.exists(directory):
+            raise HTTPException(status_code=404, detail=f"Directory not found: {path}")
+        return QueryResult(
+            data=index.listing(directory, limit, offset),
+            count=index.count(directory),
+        )
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    if not parts:
+        # Missions, aggregated over their folders
+        query = """
+        SELECT
+          mission_key AS name,
+          'directory' AS type,
+          SUM(size_kb) * 1024 AS size_bytes,
+          SUM(file_count) AS file_count,
+          MAX(last_checked) AS mtime
+        FROM folder_state
+        GROUP BY mission_key
+        ORDER BY mission_key
+        LIMIT ? OFFSET ?
+        """
+        count_query = "SELECT COUNT(DISTINCT mission_key) AS count FROM folder_state"
+        params: Tuple = ()
+    else:
+        # Level-2 folders of one mission
+        query = """
+        SELECT
+          substr(folder_key, length(mission_key) + 2) AS name,
+          'directory' AS type,
+          size_kb * 1024 AS size_bytes,
+          file_count,
+          last_checked AS mtime
+        FROM folder_state
+        WHERE mission_key = ?
+        ORDER BY folder_key
+        LIMIT ? OFFSET ?
+        """
+        count_query = "SELECT COUNT(*) AS count FROM folder_state WHERE mission_key = ?"
+        params = (parts[0],)
+
+    cursor.execute(query, params + (limit, offset))
+    rows = cursor.fetchall()
+    cursor.execute(count_query, params)
+    count = cursor.fetchone()["count"]
+    conn.close()
+
+    return QueryResult(data=[dict(row) for row in rows], count=count)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+import json
 import time
 
 from .base import get_db_connection, QueryResult, logger
@@ -20,14 +21,34 @@ class FolderStateResponse(BaseModel):
     processing_status: Optional[str]
     error_message: Optional[str]
     detailed_error_message: Optional[str]
+    compression_policy: Optional[str] = None
+    compression_ratio: Optional[float] = None
+    archive_sha256: Optional[str] = None
+    archive_size: Optional[int] = None
+    input_size: Optional[int] = None
+    storage_tier: Optional[str] = None
+    queue_reason: Optional[str] = None
 
 
 class FolderStateUpdate(BaseModel):
     fingerprint: Optional[str] = None
-    processing_status: Optional[str]  # 'success', 'failed', 'empty'
+    # 'success', 'failed', 'empty', 'deferred', 'on_demand'
+    processing_status: Optional[str]
     processing_time: Optional[int] = None
     error_message: Optional[str] = None
     detailed_error_message: Optional[str] = None
+    compression_policy: Optional[str] = None
+    compression_ratio: Optional[float] = None
+    archive_sha256: Optional[str] = None
+    archive_size: Optional[int] = None
+    input_size: Optional[int] = None
+    # [{"path", "size", "sha256"}] of a multi-part archive
+    archive_parts: Optional[List[Dict[str, Any]]] = None
+    queue_reason: Optional[str] = None  # 'new', 'changed', 'retry'
+    # Base archive path, which changes with the archive codec
+    output_path: Optional[str] = None
+    # 'full' or 'delta': a delta leaves the metadata of the base archive alone
+    archive_mode: Optional[str] = None
 
 
 class FolderStateCreate(BaseModel):
@@ -38,6 +59,7 @@ class FolderStateCreate(BaseModel):
     file_count: int
     output_path: str
     processing_status: Optional[str] = "pending"
+    queue_reason: Optional[str] = None
 
 
 # Create routers
@@ -70,6 +92,13 @@ async def get_folder_state(
       processing_status,
       error_message,
       detailed_error_message,
+      compression_policy,
+      compression_ratio,
+      archive_sha256,
+      archive_size,
+      input_size,
+      storage_tier,
+      queue_reason,
       datetime(last_checked,'unixepoch') AS last_checked_time,
       datetime(last_processed,'unixepoch') AS last_processed_time
     FROM folder_state
@@ -94,7 +123,7 @@ async def get_folder_state(
 
 
 @internal_router.put("/folder_state/{folder_key:path}", response_model=Dict[str, Any])
-async def update_folder_state(folder_key: str, update_data: FolderStateUpdate):
+def update_folder_state(folder_key: str, update_data: FolderStateUpdate):
     """Update folder state record (Internal use only)"""
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -141,6 +170,50 @@ async def update_folder_state(folder_key: str, update_data: FolderStateUpdate):
         if update_data.processing_status == "success":
             update_fields.append("detailed_error_message = NULL")
 
+    # The archive fields describe the base archive; the checksum and size of
+    # a delta are recorded in archive_chain instead, and its ratio would
+    # misestimate the size of the next full archive
+    base_archive = update_data.archive_mode != "delta"
+
+    if base_archive and update_data.compression_policy is not None:
+        update_fields.append("compression_policy = ?")
+        update_values.append(update_data.compression_policy)
+
+    if base_archive and update_data.compression_ratio is not None:
+        update_fields.append("compression_ratio = ?")
+        update_values.append(update_data.compression_ratio)
+
+    if base_archive and update_data.archive_sha256 is not None:
+        update_fields.append("archive_sha256 = ?")
+        update_values.append(update_data.archive_sha256)
+
+    if base_archive and update_data.archive_size is not None:
+        update_fields.append("archive_size = ?")
+        update_values.append(update_data.archive_size)
+
+    if base_archive and update_data.input_size is not None:
+        update_fields.append("input_size = ?")
+        update_values.append(update_data.input_size)
+
+    if update_data.queue_reason is not None:
+        update_fields.append("queue_reason = ?")
+        update_values.append(update_data.queue_reason)
+
+    if update_data.output_path is not None:
+        update_fields.append("output_path = ?")
+        update_values.append(update_data.output_path)
+
+    if base_archive and update_data.archive_parts is not None:
+        update_fields.append("archive_parts = ?")
+        update_values.append(json.dumps(update_data.archive_parts))
+    elif base_archive and update_data.archive_size is not None:
+        # A new single-file archive replaces the parts of the previous one
+        update_fields.append("archive_parts = NULL")
+
+    if base_archive and update_data.archive_size is not None:
+        # A new archive is written with fast settings
+        update_fields.append("storage_tier = NULL")
+
     # Add folder_key for WHERE clause
     update_values.append(folder_key)
 
@@ -156,7 +229,9 @@ async def update_folder_state(folder_key: str, update_data: FolderStateUpdate):
     # Return updated record
     cursor.execute(
         """SELECT folder_key, mission_key, fp, processing_status, 
-           processing_time, error_message, detailed_error_message, last_processed 
+           processing_time, error_message, detailed_error_message, last_processed,
+           compression_policy, compression_ratio, archive_sha256, archive_size,
+           input_size, output_path
            FROM folder_state WHERE folder_key = ?""",
         (folder_key,),
     )
@@ -200,6 +275,12 @@ async def get_folder_state_by_subpath(
       processing_status,
       error_message,
       detailed_error_message,
+      compression_policy,
+      compression_ratio,
+      archive_sha256,
+      archive_size,
+      input_size,
+      queue_reason,
       datetime(last_checked,'unixepoch') AS last_checked_time,
       datetime(last_processed,'unixepoch') AS last_processed_time
     FROM folder_state
@@ -253,6 +334,12 @@ async def get_folder_state_by_mission(
       processing_status,
       error_message,
       detailed_error_message,
+      compression_policy,
+      compression_ratio,
+      archive_sha256,
+      archive_size,
+      input_size,
+      queue_reason,
       datetime(last_checked,'unixepoch') AS last_checked_time,
       datetime(last_processed,'unixepoch') AS last_processed_time
     FROM folder_state
@@ -281,7 +368,7 @@ async def get_folder_state_by_mission(
 
 
 @internal_router.post("/folder_state", response_model=Dict[str, Any])
-async def create_folder_state(create_data: FolderStateCreate):
+def create_folder_state(create_data: FolderStateCreate):
     """Create new folder state record (Internal use only)"""
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -291,8 +378,8 @@ async def create_folder_state(create_data: FolderStateCreate):
     try:
         cursor.execute(
             """INSERT INTO folder_state
-            (folder_key, mission_key, fp, size_kb, file_count, last_checked, last_processed, processing_status, output_path)
-            VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?)
+            (folder_key, mission_key, fp, size_kb, file_count, last_checked, last_processed, processing_status, output_path, queue_reason)
+            VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?, ?)
             ON CONFLICT(folder_key) DO UPDATE SET
             mission_key = excluded.mission_key,
             fp = excluded.fp,
@@ -301,7 +388,8 @@ async def create_folder_state(create_data: FolderStateCreate):
             last_checked = excluded.last_checked,
             last_processed = NULL,
             processing_status = excluded.processing_status,
-            output_path = excluded.output_path""",
+            output_path = excluded.output_path,
+            queue_reason = excluded.queue_reason""",
             (
                 create_data.folder_key,
                 create_data.mission_key,
@@ -311,6 +399,7 @@ async def create_folder_state(create_data: FolderStateCreate):
                 current_time,
                 create_data.processing_status,
                 create_data.output_path,
+                create_data.queue_reason,
             ),
         )
         conn.commit()
@@ -338,7 +427,7 @@ async def create_folder_state(create_data: FolderStateCreate):
 @internal_router.patch(
     "/folder_state/{folder_key:path}/last_checked", response_model=Dict[str, Any]
 )
-async def update_folder_state_last_checked(folder_key: str):
+def update_folder_state_last_checked(folder_key: str):
     """Update only the last_checked timestamp for folder state (Internal use only)"""
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -11,6 +11,58 @@ from .potree_metacloud_state import (
     public_router as potree_metacloud_public,
     internal_router as potree_metacloud_internal,
 )
+from .potree_input_state import (
+    public_router as potree_input_public,
+    internal_router as potree_input_internal,
+)
+from .potree_output import (
+    public_router as potree_output_public,
+    internal_router as potree_output_internal,
+)
+from .copc_state import (
+    public_router as copc_state_public,
+    internal_router as copc_state_internal,
+)
+from .folder_manifest import (
+    public_router as folder_manifest_public,
+    internal_router as folder_manifest_internal,
+)
+from .file_index import (
+    public_router as file_index_public,
+    internal_router as file_index_internal,
+)
+from .archive_chain import (
+    public_router as archive_chain_public,
+    internal_router as archive_chain_internal,
+)
+from .archive_member import (
+    public_router as archive_member_public,
+    internal_router as archive_member_internal,
+)
+from .folder_archive import (
+    public_router as folder_archive_public,
+    internal_router as folder_archive_internal,
+)
+from .archive_tier import (
+    public_router as archive_tier_public,
+    internal_router as archive_tier_internal,
+)
+from .io_slots import (
+    public_router as io_slots_public,
+    internal_router as io_slots_internal,
+)
+from .job_progress import (
+    public_router as job_progress_public,
+    internal_router as job_progress_internal,
+)
+from .job_batch import (
+    public_router as job_batch_public,
+    internal_router as job_batch_internal,
+)
+from .compression_benchmark import (
+    public_router as compression_benchmark_public,
+    internal_router as compression_benchmark_internal,
+)
 from .base import (
     public_router as general_public,
     internal_router as general_internal,
@@ -19,7 +71,6 @@ from .base import (
 # Import settings
 from src.config.settings import settings
 
-
 # Create main routers with original prefix to maintain compatibility
 public_router = APIRouter(
     prefix="/sqlite",
@@ -37,10 +88,36 @@ internal_router = APIRouter(
 public_router.include_router(general_public)
 public_router.include_router(folder_state_public)
 public_router.include_router(potree_metacloud_public)
+public_router.include_router(potree_input_public)
+public_router.include_router(potree_output_public)
+public_router.include_router(copc_state_public)
+public_router.include_router(folder_manifest_public)
+public_router.include_router(file_index_public)
+public_router.include_router(archive_chain_public)
+public_router.include_router(archive_member_public)
+public_router.include_router(folder_archive_public)
+public_router.include_router(archive_tier_public)
+public_router.include_router(io_slots_public)
+public_router.include_router(job_progress_public)
+public_router.include_router(job_batch_public)
+public_router.include_router(compression_benchmark_public)
 
 internal_router.include_router(general_internal)
 internal_router.include_router(folder_state_internal)
 internal_router.include_router(potree_metacloud_internal)
+internal_router.include_router(potree_input_internal)
+internal_router.include_router(potree_output_internal)
+internal_router.include_router(copc_state_internal)
+internal_router.include_router(folder_manifest_internal)
+internal_router.include_router(file_index_internal)
+internal_router.include_router(archive_chain_internal)
+internal_router.include_router(archive_member_internal)
+internal_router.include_router(folder_archive_internal)
+internal_router.include_router(archive_tier_internal)
+internal_router.include_router(io_slots_internal)
+internal_router.include_router(job_progress_internal)
+internal_router.include_router(job_batch_internal)
+internal_router.include_router(compression_benchmark_internal)
 
 
 # Shared endpoints that combine data from both tables
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from typing import Dict, Any
+
+from .base import logger
+from src.services.io_governor import io_governor
+
+# Jobs sharing the NAS through the fts-addlidar volume
+IO_SLOT_KINDS = {"compression", "recompression", "potree", "copc"}
+
+
+class IoSlotReport(BaseModel):
+    """Throughput a slot holder read from and wrote to the NAS since its last report"""
+
+    kind: str
+    mb_per_s: float = Field(ge=0)
+
+
+def check_kind(kind: str) -> None:
+    if kind not in IO_SLOT_KINDS:
+        raise HTTPException(status_code=400, detail=f"Invalid job kind: {kind}")
+
+
+# Create routers
+public_router = APIRouter()
+internal_router = APIRouter()
+
+
+@internal_router.post("/io_slots/{holder}", response_model=Dict[str, Any])
+async def acquire_io_slot(
+    holder: str,
+    kind: str = Query(
+        ..., description="'compression', 'recompression', 'potree' or 'copc'"
+    ),
+):
+    """Acquire a NAS concurrency slot for a job pod (Internal use only).
+
+    Answers 429 with Retry-After while all slots are busy. The pod then
+    reports its throughput with PUT at least every IO_SLOT_LEASE_TTL
+    seconds and releases the slot with DELETE when it stops reading.
+    """
+    check_kind(kind)
+    if not io_governor.acquire(holder, kind):
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "All NAS I/O slots are busy, retry later"},
+            headers={"Retry-After": str(io_governor.retry_after)},
+        )
+    logger.info(f"I/O slot granted to {holder} ({kind})")
+    return {"holder": holder, "kind": kind, "slots": io_governor.slots}
+
+
+@internal_router.put("/io_slots/{holder}", response_model=Dict[str, Any])
+async def report_io_slot(holder: str, report: IoSlotReport):
+    """Report the MB/s a slot holder moves on the NAS (Internal use only)"""
+    check_kind(report.kind)
+    io_governor.report(holder, report.kind, report.mb_per_s)
+    return {"holder": holder, "slots": io_governor.slots}
+
+
+@internal_router.delete("/io_slots/{holder}", response_model=Dict[str, Any])
+async def release_io_slot(holder: str):
+    """Release the NAS concurrency slot of a job pod (Internal use only)"""
+    if not io_governor.release(holder):
+        raise HTTPException(status_code=404, detail=f"No I/O slot held by {holder}")
+    logger.info(f"I/O slot released by {holder}")
+    return {"message": "I/O slot released", "holder": holder}
+
+
+@internal_router.get("/io_slots", response_model=Dict[str, Any])
+async def get_io_slots():
+    """Slots handed out by the NAS I/O governor and the throughput they reach"""
+    return io_governor.stats()
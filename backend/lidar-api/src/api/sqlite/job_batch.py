@@ -0,0 +1,219 @@
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from typing import Dict, Any, List, Optional
+import time
+
+from .base import get_db_connection, QueryResult, logger
+from src.config.settings import settings
+
+# State table and key column of the items of each job kind
+JOB_KIND_TABLES = {
+    "compression": ("folder_state", "folder_key"),
+    "potree": ("potree_metacloud_state", "mission_key"),
+    "copc": ("copc_state", "mission_key"),
+}
+
+
+class JobBatchCreate(BaseModel):
+    """Indexed Job created by the scanner: item i is processed by completion index i"""
+
+    job_uid: str
+    job_name: str
+    kind: str  # 'compression', 'potree' or 'copc'
+    items: List[List[str]]  # [key, fingerprint] per completion index
+
+
+def record_job_outcomes(outcomes: List[Dict[str, Any]]) -> int:
+    """Record the terminated pods seen by the job watch in one transaction.
+
+    Each outcome carries job_uid, completion_index, pod_name, status
+    ('succeeded' or 'failed'), exit_code, reason, started_at and
+    finished_at. When the folder or mission is still 'pending' with the
+    fingerprint the job was queued for, the pod's own callback never
+    arrived and the outcome is written to its state table instead.
+
+    Returns:
+        Number of items whose state was reconciled from the watch
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    reconciled = 0
+    try:
+        for outcome in outcomes:
+            cursor.execute(
+                """SELECT kind, item_key, fp, finished_at FROM job_batch_item
+                WHERE job_uid = ? AND completion_index = ?""",
+                (outcome["job_uid"], outcome["completion_index"]),
+            )
+            item = cursor.fetchone()
+            # Jobs not registered by the scanner, or an earlier attempt of the index
+            if item is None or (item["finished_at"] or 0) > outcome["finished_at"]:
+                continue
+            cursor.execute(
+                """UPDATE job_batch_item
+                SET status = ?, exit_code = ?, reason = ?, pod_name = ?, finished_at = ?
+                WHERE job_uid = ? AND completion_index = ?""",
+                (
+                    outcome["status"],
+                    outcome["exit_code"],
+                    outcome["reason"],
+                    outcome["pod_name"],
+                    outcome["finished_at"],
+                    outcome["job_uid"],
+                    outcome["completion_index"],
+                ),
+            )
+
+            table, key_column = JOB_KIND_TABLES[item["kind"]]
+            cursor.execute(
+                f"SELECT fp, processing_status FROM {table} WHERE {key_column} = ?",
+                (item["item_key"],),
+            )
+            state = cursor.fetchone()
+            if (
+                state is None
+                or state["processing_status"] != "pending"
+                or state["fp"] != item["fp"]
+            ):
+                continue
+
+            processing_time = outcome["finished_at"] - (
+                outcome["started_at"] or outcome["finished_at"]
+            )
+            if outcome["status"] == "succeeded":
+                cursor.execute(
+                    f"""UPDATE {table} SET processing_status = 'success',
+                    processing_time = ?, last_processed = ?,
+                    error_message = NULL, detailed_error_message = NULL
+                    WHERE {key_column} = ?""",
+                    (processing_time, outcome["finished_at"], item["item_key"]),
+                )
+            else:
+                cursor.execute(
+                    f"""UPDATE {table} SET processing_status = 'failed',
+                    processing_time = ?, last_processed = ?, error_message = ?
+                    WHERE {key_column} = ?""",
+                    (
+                        processing_time,
+                        outcome["finished_at"],
+                        f"Pod {outcome['pod_name']} exited with code "
+                        f"{outcome['exit_code']} ({outcome['reason'] or 'no reason'})",
+                        item["item_key"],
+                    ),
+                )
+            cursor.execute(
+                """UPDATE job_batch_item SET reconciled = 1
+                WHERE job_uid = ? AND completion_index = ?""",
+                (outcome["job_uid"], outcome["completion_index"]),
+            )
+            reconciled += 1
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return reconciled
+
+
+# Create routers
+public_router = APIRouter()
+internal_router = APIRouter()
+
+
+@internal_router.post("/job_batch", response_model=Dict[str, Any])
+def create_job_batch(batch: JobBatchCreate):
+    """Register the items of an Indexed Job created by the scanner (Internal use only).
+
+    The backend's job watch links the pods of the Job to these items by
+    completion index. Batches older than JOB_BATCH_RETENTION_DAYS are
+    dropped.
+    """
+    if batch.kind not in JOB_KIND_TABLES:
+        raise HTTPException(status_code=400, detail=f"Invalid job kind: {batch.kind}")
+    now = int(time.time())
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(
+            """INSERT OR REPLACE INTO job_batch_item
+            (job_uid, completion_index, job_name, kind, item_key, fp, created_at, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 'queued')""",
+            [
+                (batch.job_uid, index, batch.job_name, batch.kind, key, fp, now)
+                for index, (key, fp) in enumerate(batch.items)
+            ],
+        )
+        cursor.execute(
+            "DELETE FROM job_batch_item WHERE created_at < ?",
+            (now - settings.JOB_BATCH_RETENTION_DAYS * 86400,),
+        )
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error registering job {batch.job_name}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        conn.close()
+
+    logger.info(
+        f"Registered {batch.kind} job {batch.job_name} ({batch.job_uid}) "
+        f"with {len(batch.items)} items"
+    )
+    return {"message": "Job batch registered", "job_uid": batch.job_uid}
+
+
+@public_router.get("/job_batches", response_model=QueryResult)
+@internal_router.get("/job_batches", response_model=QueryResult)
+async def get_job_batches(
+    kind: Optional[str] = Query(None, description="'compression', 'potree' or 'copc'"),
+    limit: int = Query(20, ge=1, le=1000),
+):
+    """Jobs created by the scanner with their items per status, most recent first"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT
+          job_uid,
+          job_name,
+          kind,
+          MIN(created_at) AS created_at,
+          datetime(MIN(created_at),'unixepoch') AS created_time,
+          COUNT(*) AS items,
+          SUM(status = 'queued') AS queued,
+          SUM(status = 'succeeded') AS succeeded,
+          SUM(status = 'failed') AS failed,
+          SUM(reconciled) AS reconciled,
+          MAX(finished_at) AS last_finished
+        FROM job_batch_item
+        WHERE ? IS NULL OR kind = ?
+        GROUP BY job_uid
+        ORDER BY created_at DESC
+        LIMIT ?""",
+        (kind, kind, limit),
+    )
+    data = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+
+    return QueryResult(data=data, count=len(data))
+
+
+@public_router.get("/job_batch/{job_uid}", response_model=QueryResult)
+@internal_router.get("/job_batch/{job_uid}", response_model=QueryResult)
+async def get_job_batch(job_uid: str):
+    """Items of one job, by completion index"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT completion_index, item_key, fp, status, exit_code, reason,
+           pod_name, finished_at, reconciled
+        FROM job_batch_item WHERE job_uid = ?
+        ORDER BY completion_index""",
+        (job_uid,),
+    )
+    data = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    if not data:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_uid}")
+
+    return QueryResult(data=data, count=len(data))
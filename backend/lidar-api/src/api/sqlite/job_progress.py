@@ -0,0 +1,91 @@
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+from typing import Dict, Any, Optional
+
+from .base import QueryResult
+from src.services.job_progress import job_progress
+
+# Jobs reporting their progress, and what their key is
+JOB_KINDS = {
+    "compression": "folder_key",
+    "potree": "mission_key",
+    "copc": "mission_key",
+}
+
+
+class JobProgressReport(BaseModel):
+    """Progress of a running job, counted since it started"""
+
+    pod: Optional[str] = None
+    bytes_read: int = Field(ge=0)
+    bytes_written: int = Field(ge=0)
+    bytes_total: Optional[int] = None  # Bytes to read, when known
+    members_done: Optional[int] = None  # Tar entries written (compression)
+    members_total: Optional[int] = None
+    percent: Optional[float] = None  # Progress printed by PotreeConverter
+    eta_seconds: Optional[float] = None
+
+
+def check_kind(kind: str) -> None:
+    if kind not in JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"Invalid job kind: {kind}")
+
+
+# Create routers
+public_router = APIRouter()
+internal_router = APIRouter()
+
+
+@internal_router.put("/job_progress/{kind}/{key:path}", response_model=Dict[str, Any])
+async def report_job_progress(kind: str, key: str, report: JobProgressReport):
+    """Record the progress of a running compression or Potree job (Internal use only).
+
+    Pods call this every --progress-interval seconds; reports are kept in
+    memory for JOB_PROGRESS_TTL seconds after the last one.
+    """
+    check_kind(kind)
+    job_progress.report(kind, key, report.model_dump())
+    return {"message": "Progress recorded", "kind": kind, "key": key}
+
+
+@public_router.get("/job_progress", response_model=QueryResult)
+@internal_router.get("/job_progress", response_model=QueryResult)
+async def list_job_progress(
+    kind: Optional[str] = Query(None, description="'compression' or 'potree'"),
+    stalled: Optional[bool] = Query(None, description="Only stalled, or running, jobs"),
+):
+    """Progress of the running jobs, most recently updated first.
+
+    A job is stalled when it moved no bytes for JOB_PROGRESS_STALL_AFTER
+    seconds, or stopped reporting.
+    """
+    if kind is not None:
+        check_kind(kind)
+    data = [
+        row
+        for row in job_progress.rows(kind)
+        if stalled is None or row["stalled"] == stalled
+    ]
+    return QueryResult(data=data, count=len(data))
+
+
+@public_router.get("/job_progress_summary", response_model=QueryResult)
+@internal_router.get("/job_progress_summary", response_model=QueryResult)
+async def get_job_progress_summary():
+    """Running jobs and their aggregate read and write rates per kind"""
+    data = job_progress.summary()
+    return QueryResult(data=data, count=len(data))
+
+
+@public_router.get("/job_progress/{kind}/{key:path}", response_model=Dict[str, Any])
+@internal_router.get("/job_progress/{kind}/{key:path}", response_model=Dict[str, Any])
+async def get_job_progress(kind: str, key: str):
+    """Last progress report of one job"""
+    check_kind(kind)
+    row = job_progress.get(kind, key)
+    if row is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No progress reported for {JOB_KINDS[kind]}: {key}",
+        )
+    return row
@@ -0,0 +1,103 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import Dict, Any, List, Optional
+
+from .base import get_db_connection, QueryResult, logger
+
+
+class PotreeInput(BaseModel):
+    input_path: str
+    fp: str
+    size_bytes: int
+    mod_time: float
+    points: Optional[int] = None
+
+
+class PotreeInputSet(BaseModel):
+    inputs: List[PotreeInput]
+    # Fingerprint of the .metacloud the inputs were read from, recorded on the
+    # mission when given (an edit that left its POINTS_FILES unchanged)
+    fingerprint: Optional[str] = None
+
+
+# Create routers
+public_router = APIRouter()
+internal_router = APIRouter()
+
+
+@public_router.get("/potree_input_state/{mission_key:path}", response_model=QueryResult)
+@internal_router.get(
+    "/potree_input_state/{mission_key:path}", response_model=QueryResult
+)
+async def get_potree_input_state(mission_key: str):
+    """Point cloud files a mission was last queued for conversion with"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT input_path, fp, size_bytes, mod_time, points
+        FROM potree_input_state WHERE mission_key = ?
+        ORDER BY input_path""",
+        (mission_key,),
+    )
+    data = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+
+    return QueryResult(data=data, count=len(data))
+
+
+@internal_router.put(
+    "/potree_input_state/{mission_key:path}", response_model=Dict[str, Any]
+)
+def put_potree_input_state(mission_key: str, input_set: PotreeInputSet):
+    """Replace the input set of a mission in one transaction (Internal use only)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT mission_key FROM potree_metacloud_state WHERE mission_key = ?",
+            (mission_key,),
+        )
+        if not cursor.fetchone():
+            raise HTTPException(
+                status_code=404,
+                detail=f"Potree metacloud state record not found for mission_key: {mission_key}",
+            )
+        cursor.execute(
+            "DELETE FROM potree_input_state WHERE mission_key = ?", (mission_key,)
+        )
+        cursor.executemany(
+            """INSERT INTO potree_input_state
+            (mission_key, input_path, fp, size_bytes, mod_time, points)
+            VALUES (?, ?, ?, ?, ?, ?)""",
+            [
+                (
+                    mission_key,
+                    item.input_path,
+                    item.fp,
+                    item.size_bytes,
+                    item.mod_time,
+                    item.points,
+                )
+                for item in input_set.inputs
+            ],
+        )
+        if input_set.fingerprint is not None:
+            cursor.execute(
+                "UPDATE potree_metacloud_state SET fp = ? WHERE mission_key = ?",
+                (input_set.fingerprint, mission_key),
+            )
+        conn.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error storing inputs of mission {mission_key}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        conn.close()
+
+    return {
+        "message": "Potree input state stored",
+        "mission_key": mission_key,
+        "inputs": len(input_set.inputs),
+    }
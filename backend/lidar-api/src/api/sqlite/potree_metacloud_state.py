@@ -1,9 +1,11 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
 import time
 
 from .base import get_db_connection, QueryResult, logger
+from .potree_output import potree_output_dir
+from src.services.potree_precompress import precompress_potree_output
 
 
 # Pydantic models specific to potree metacloud
@@ -17,6 +19,8 @@ class PotreeMetacloudStateResponse(BaseModel):
     processing_status: Optional[str]
     error_message: Optional[str]
     detailed_error_message: Optional[str]
+    input_points: Optional[int] = None
+    input_size: Optional[int] = None
 
 
 class PotreeMetacloudStateUpdate(BaseModel):
@@ -25,6 +29,8 @@ class PotreeMetacloudStateUpdate(BaseModel):
     processing_time: Optional[int] = None
     error_message: Optional[str] = None
     detailed_error_message: Optional[str] = None
+    input_points: Optional[int] = None  # Sized by the scanner when queueing
+    input_size: Optional[int] = None
 
 
 class PotreeMetacloudStateCreate(BaseModel):
@@ -32,6 +38,8 @@ class PotreeMetacloudStateCreate(BaseModel):
     fingerprint: str
     output_path: str
     processing_status: Optional[str] = "pending"
+    input_points: Optional[int] = None
+    input_size: Optional[int] = None
 
 
 # Create routers
@@ -61,6 +69,8 @@ async def get_potree_metacloud_state(
       processing_status,
       error_message,
       detailed_error_message,
+      input_points,
+      input_size,
       datetime(last_checked,'unixepoch') AS last_checked_time,
       datetime(last_processed,'unixepoch') AS last_processed_time
     FROM potree_metacloud_state
@@ -87,19 +97,25 @@ async def get_potree_metacloud_state(
 @internal_router.put(
     "/potree_metacloud_state/{mission_key:path}", response_model=Dict[str, Any]
 )
-async def update_potree_metacloud_state(
-    mission_key: str, update_data: PotreeMetacloudStateUpdate
+def update_potree_metacloud_state(
+    mission_key: str,
+    update_data: PotreeMetacloudStateUpdate,
+    background_tasks: BackgroundTasks,
 ):
-    """Update potree metacloud state record (Internal use only)"""
+    """Update potree metacloud state record (Internal use only).
+
+    A successful conversion gets precompressed copies of its metadata.json in the background.
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
 
     # Check if record exists
     cursor.execute(
-        "SELECT mission_key FROM potree_metacloud_state WHERE mission_key = ?",
+        "SELECT mission_key, output_path FROM potree_metacloud_state WHERE mission_key = ?",
         (mission_key,),
     )
-    if not cursor.fetchone():
+    existing = cursor.fetchone()
+    if not existing:
         conn.close()
         raise HTTPException(
             status_code=404,
@@ -137,6 +153,14 @@ async def update_potree_metacloud_state(
         if update_data.processing_status == "success":
             update_fields.append("detailed_error_message = NULL")
 
+    if update_data.input_points is not None:
+        update_fields.append("input_points = ?")
+        update_values.append(update_data.input_points)
+
+    if update_data.input_size is not None:
+        update_fields.append("input_size = ?")
+        update_values.append(update_data.input_size)
+
     # Add mission_key for WHERE clause
     update_values.append(mission_key)
 
@@ -159,6 +183,12 @@ async def update_potree_metacloud_state(
     updated_record = cursor.fetchone()
     conn.close()
 
+    if update_data.processing_status == "success":
+        background_tasks.add_task(
+            precompress_potree_output,
+            potree_output_dir(mission_key, existing["output_path"]),
+        )
+
     return {
         "message": "Potree metacloud state updated successfully",
         "record": dict(updated_record),
@@ -188,6 +218,8 @@ async def get_potree_metacloud_state_by_mission(mission_key: str):
       processing_status,
       error_message,
       detailed_error_message,
+      input_points,
+      input_size,
       datetime(last_checked,'unixepoch') AS last_checked_time,
       datetime(last_processed,'unixepoch') AS last_processed_time
     FROM potree_metacloud_state
@@ -209,7 +241,7 @@ async def get_potree_metacloud_state_by_mission(mission_key: str):
 
 
 @internal_router.post("/potree_metacloud_state", response_model=Dict[str, Any])
-async def create_potree_metacloud_state(create_data: PotreeMetacloudStateCreate):
+def create_potree_metacloud_state(create_data: PotreeMetacloudStateCreate):
     """Create new potree metacloud state record (Internal use only)"""
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -219,20 +251,25 @@ async def create_potree_metacloud_state(create_data: PotreeMetacloudStateCreate)
     try:
         cursor.execute(
             """INSERT INTO potree_metacloud_state
-            (mission_key, fp, output_path, last_checked, last_processed, processing_status)
-            VALUES (?, ?, ?, ?, NULL, ?)
+            (mission_key, fp, output_path, last_checked, last_processed, processing_status,
+             input_points, input_size)
+            VALUES (?, ?, ?, ?, NULL, ?, ?, ?)
             ON CONFLICT(mission_key) DO UPDATE SET
             fp = excluded.fp,
             output_path = excluded.output_path,
             last_checked = excluded.last_checked,
             last_processed = NULL,
-            processing_status = excluded.processing_status""",
+            processing_status = excluded.processing_status,
+            input_points = excluded.input_points,
+            input_size = excluded.input_size""",
             (
                 create_data.mission_key,
                 create_data.fingerprint,
                 create_data.output_path,
                 current_time,
                 create_data.processing_status,
+                create_data.input_points,
+                create_data.input_size,
             ),
         )
         conn.commit()
@@ -261,7 +298,7 @@ async def create_potree_metacloud_state(create_data: PotreeMetacloudStateCreate)
     "/potree_metacloud_state/{mission_key:path}/last_checked",
     response_model=Dict[str, Any],
 )
-async def update_potree_metacloud_last_checked(mission_key: str):
+def update_potree_metacloud_last_checked(mission_key: str):
     """Update only the last_checked timestamp for potree metacloud state (Internal use only)"""
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -0,0 +1,218 @@
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from typing import Any, Dict, Optional
+import hashlib
+import mimetypes
+import os
+
+from .base import get_db_connection
+from src.config.settings import settings
+from src.services.potree_precompress import (
+    precompress_potree_output,
+    precompressed_variant,
+)
+from src.services.range_cache import parse_range, potree_range_cache, read_file_range
+
+
+def potree_output_dir(mission_key: str, output_path: Optional[str]) -> str:
+    """Map the output path recorded by the scanner to where the backend mounts it"""
+    if settings.POTREE_ROOT:
+        return os.path.join(settings.POTREE_ROOT, mission_key)
+    return output_path or ""
+
+
+def resolve_output_file(output_dir: str, file_path: str) -> Optional[str]:
+    """Real path of a file inside a Potree output directory, or None if it would escape it"""
+    if any(part in ("", ".", "..") for part in file_path.split("/")):
+        return None
+    root = os.path.realpath(output_dir)
+    path = os.path.realpath(os.path.join(root, file_path))
+    if os.path.commonpath([path, root]) != root:
+        return None
+    return path
+
+
+def potree_etag(fp: str, last_processed: Optional[int], file_path: str) -> str:
+    """Strong ETag of one output file of one conversion"""
+    digest = hashlib.sha256(f"{fp}|{last_processed}|{file_path}".encode("utf-8"))
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def potree_version(fp: str, last_processed: Optional[int]) -> str:
+    """Value of ?v= that makes the URLs of a conversion immutable"""
+    return hashlib.sha256(f"{fp}|{last_processed}".encode("utf-8")).hexdigest()[:16]
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [tag.strip() for tag in header.split(",")]
+
+
+def ranged_file_response(
+    request: Request, path: str, etag: str, headers: Dict[str, str], media_type: str
+) -> Response:
+    """Answer a GET of a file with 304, 206 for a single byte range, 416 or 200.
+
+    Ranges up to potree_range_cache.max_entry bytes come from the
+    in-memory LRU; larger ones are streamed from the file.
+    """
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    size = os.path.getsize(path)
+    byte_range = None
+    # If-Range: send the range only if the client's copy is still current
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+
+    status_code = 200
+    start, end = 0, size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    if end - start + 1 <= potree_range_cache.max_entry:
+        data = potree_range_cache.read(path, etag, start, end) if size else b""
+        return Response(
+            data, status_code=status_code, media_type=media_type, headers=headers
+        )
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        read_file_range(path, start, end),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+# Create routers
+public_router = APIRouter()
+internal_router = APIRouter()
+
+
+@public_router.get("/potree_output/{mission_key}", response_model=Dict[str, Any])
+@internal_router.get("/potree_output/{mission_key}", response_model=Dict[str, Any])
+async def get_potree_output(mission_key: str):
+    """Version of the current Potree conversion of a mission, to add as ?v= to its file URLs"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT fp, processing_status, last_processed
+           FROM potree_metacloud_state WHERE mission_key = ?""",
+        (mission_key,),
+    )
+    row = cursor.fetchone()
+    conn.close()
+    if not row or row["processing_status"] != "success":
+        raise HTTPException(
+            status_code=404, detail=f"No Potree conversion of mission: {mission_key}"
+        )
+    return {
+        "mission_key": mission_key,
+        "version": potree_version(row["fp"], row["last_processed"]),
+        "last_processed": row["last_processed"],
+    }
+
+
+@public_router.get("/potree_output/{mission_key}/{file_path:path}")
+@internal_router.get("/potree_output/{mission_key}/{file_path:path}")
+def get_potree_file(
+    request: Request,
+    mission_key: str,
+    file_path: str,
+    v: Optional[str] = Query(None, description="Conversion version, see above"),
+):
+    """Serve a file of a mission's Potree output (metadata.json, hierarchy.bin, octree.bin).
+
+    Single byte ranges are answered with 206 and small ranges are served
+    from an in-memory LRU, as the viewer reads octree.bin and hierarchy.bin
+    node by node. Whole files are sent Brotli or gzip encoded when a
+    precompressed copy exists and the client accepts it. ETags change with
+    every conversion; requests carrying the current ?v= version are
+    cacheable forever, others for POTREE_CACHE_MAX_AGE seconds.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT fp, output_path, processing_status, last_processed
+           FROM potree_metacloud_state WHERE mission_key = ?""",
+        (mission_key,),
+    )
+    row = cursor.fetchone()
+    conn.close()
+    if not row or row["processing_status"] != "success":
+        raise HTTPException(
+            status_code=404, detail=f"No Potree conversion of mission: {mission_key}"
+        )
+    path = resolve_output_file(
+        potree_output_dir(mission_key, row["output_path"]), file_path
+    )
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
+
+    etag = potree_etag(row["fp"], row["last_processed"], file_path)
+    immutable = v is not None and v == potree_version(row["fp"], row["last_processed"])
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": (
+            "public, max-age=31536000, immutable"
+            if immutable
+            else f"public, max-age={settings.POTREE_CACHE_MAX_AGE}"
+        ),
+        "Vary": "Accept-Encoding",
+    }
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    # Whole-file requests get a precompressed copy when the client accepts one;
+    # byte ranges always address the uncompressed file
+    variant = None
+    if "range" not in request.headers:
+        variant = precompressed_variant(path, request.headers.get("accept-encoding"))
+    if variant is not None:
+        encoding, path = variant
+        etag = f'{etag[:-1]}-{encoding}"'
+        headers["ETag"] = etag
+        headers["Content-Encoding"] = encoding
+
+    return ranged_file_response(request, path, etag, headers, media_type)
+
+
+@internal_router.post(
+    "/potree_output/{mission_key}/precompress", response_model=Dict[str, Any]
+)
+def precompress_potree(mission_key: str, background_tasks: BackgroundTasks):
+    """Write precompressed copies of a mission's Potree output in the background (Internal use only)
+
+    Done after every successful conversion; this reruns it, e.g. for outputs
+    converted before precompression existed.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT output_path, processing_status FROM potree_metacloud_state WHERE mission_key = ?",
+        (mission_key,),
+    )
+    row = cursor.fetchone()
+    conn.close()
+    if not row or row["processing_status"] != "success":
+        raise HTTPException(
+            status_code=404, detail=f"No Potree conversion of mission: {mission_key}"
+        )
+    directory = potree_output_dir(mission_key, row["output_path"])
+    background_tasks.add_task(precompress_potree_output, directory)
+    return {"message": "Precompression scheduled", "directory": directory}
+
+
+@public_router.get("/potree_range_cache", response_model=Dict[str, Any])
+@internal_router.get("/potree_range_cache", response_model=Dict[str, Any])
+async def get_potree_range_cache():
+    """Hits, misses and size of the in-memory cache of Potree byte ranges"""
+    return potree_range_cache.stats()
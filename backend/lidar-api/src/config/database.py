@@ -5,6 +5,32 @@ from .settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Columns added after a table was first released: CREATE TABLE IF NOT EXISTS
+# does not add them to existing databases
+ADDED_COLUMNS = [
+    ("folder_state", "compression_policy", "TEXT"),
+    ("folder_state", "compression_ratio", "REAL"),
+    ("folder_state", "archive_sha256", "TEXT"),
+    ("folder_state", "archive_size", "INTEGER"),
+    ("folder_state", "input_size", "INTEGER"),
+    ("folder_state", "archive_parts", "TEXT"),
+    ("folder_state", "storage_tier", "TEXT"),
+    ("folder_state", "recompressed_at", "INTEGER"),
+    ("folder_state", "queue_reason", "TEXT"),
+    ("archive_chain", "archive_sha256", "TEXT"),
+    ("potree_metacloud_state", "input_points", "INTEGER"),
+    ("potree_metacloud_state", "input_size", "INTEGER"),
+]
+
+
+def add_missing_columns(cursor: sqlite3.Cursor) -> None:
+    """Add the columns of ADDED_COLUMNS that an existing database lacks"""
+    for table, column, column_type in ADDED_COLUMNS:
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+            logger.info(f"Added column '{column}' to table '{table}'")
+
 
 def initialize_database():
     """Initialize database with required tables from persist_state.sql"""
@@ -32,6 +58,7 @@ def initialize_database():
 
         # Execute the schema (CREATE TABLE IF NOT EXISTS statements)
         cursor.executescript(schema_sql)
+        add_missing_columns(cursor)
         conn.commit()
 
         logger.info(f"Database initialized successfully at {db_path}")
@@ -41,7 +68,18 @@ def initialize_database():
         tables = cursor.fetchall()
         table_names = [table[0] for table in tables]
 
-        expected_tables = ["folder_state", "potree_metacloud_state"]
+        expected_tables = [
+            "folder_state",
+            "potree_metacloud_state",
+            "potree_input_state",
+            "copc_state",
+            "folder_manifest",
+            "archived_file",
+            "archive_chain",
+            "compression_benchmark",
+            "archive_request",
+            "job_batch_item",
+        ]
         for table in expected_tables:
             if table in table_names:
                 logger.info(f"Table '{table}' exists and is ready")
@@ -15,6 +15,56 @@ class Settings(BaseSettings):
     PVC_NAME: str = "lidar-data-pvc"  # Default to our created PVC
     JOB_TIMEOUT: int = 300  # Timeout in seconds for job completion
     DEFAULT_OUTPUT_ROOT: str = "/output"  # Default root path based on environment
+    MANIFEST_CACHE_SIZE: int = 16  # Folder manifests kept decoded for browsing
+    WRITE_MAX_INFLIGHT: int = 32  # Concurrent internal writes before answering 429
+    WRITE_MAX_LATENCY_MS: int = 2000  # Average write latency before answering 429
+    WRITE_RETRY_AFTER: int = 5  # Retry-After (seconds) sent with 429 responses
+    ARCHIVE_MAX_DELTAS: int = 10  # Delta archives before a folder is consolidated
+    ARCHIVE_ROOT: str = (
+        ""  # Mount point of the LiDAR-Zips volume, empty to use recorded archive paths
+    )
+    ARCHIVE_CONSOLIDATION_RATIO: float = (
+        0.5  # Consolidate once deltas reach this share of the base size
+    )
+    LIDAR_ROOT: str = (
+        ""  # Mount point of the LiDAR folders, empty to disable on-demand archives
+    )
+    ARCHIVE_CACHE_DIR: str = ""  # Cache of popular on-demand archives, empty to disable
+    ARCHIVE_CACHE_MAX_GB: float = 100.0  # Size of the cache before LRU eviction
+    ARCHIVE_POPULAR_REQUESTS: int = 3  # Requests making a folder popular (cached)
+    ARCHIVE_POPULAR_DAYS: int = 30  # Window in which requests are counted
+    ARCHIVE_COLD_AFTER_DAYS: int = (
+        180  # Unchanged days before a mission's archives are recompressed
+    )
+    ARCHIVE_OFFPEAK_START: int = 22  # Hour (local time) the recompression window opens
+    ARCHIVE_OFFPEAK_END: int = 6  # Hour (local time) the recompression window closes
+    IO_SLOTS_INITIAL: int = 4  # NAS-reading jobs allowed at once before AIMD tuning
+    IO_SLOTS_MIN: int = 1  # Fewest NAS-reading jobs the governor lets run
+    IO_SLOTS_MAX: int = 8  # Most NAS-reading jobs the governor lets run
+    IO_SLOT_LEASE_TTL: int = 180  # Seconds without a report before a slot is reclaimed
+    IO_SLOT_WINDOW: int = 120  # Seconds of throughput reports per AIMD step
+    IO_SLOT_RETRY_AFTER: int = (
+        30  # Retry-After (seconds) sent to jobs waiting for a slot
+    )
+    JOB_PROGRESS_TTL: int = 900  # Seconds a job's last progress report is kept
+    JOB_PROGRESS_MAX_ENTRIES: int = 1000  # Jobs tracked before the oldest are dropped
+    JOB_PROGRESS_STALL_AFTER: int = 300  # Seconds without bytes moved before a stall
+    JOB_WATCH_NAMESPACE: str = (
+        ""  # Namespace of the scanner's Jobs, empty to disable the pod watch
+    )
+    JOB_WATCH_FLUSH_SECONDS: float = 5.0  # Seconds between batched outcome writes
+    JOB_BATCH_RETENTION_DAYS: int = 30  # Days registered Jobs are kept
+    POTREE_ROOT: str = (
+        ""  # Mount point of the Potree outputs, empty to use recorded paths
+    )
+    POTREE_RANGE_CACHE_MB: int = 256  # Hot byte ranges of Potree files kept in memory
+    POTREE_RANGE_CACHE_MAX_KB: int = 1024  # Largest range (or whole file) cached
+    POTREE_CACHE_MAX_AGE: int = 3600  # max-age of Potree files requested without ?v=
+    POTREE_PRECOMPRESS_MAX_MB: int = (
+        1024  # Largest Potree file given Brotli/gzip copies
+    )
+    POTREE_BROTLI_QUALITY: int = 9  # Brotli quality of the precompressed copies
+    COPC_ROOT: str = ""  # Mount point of the COPC files, empty to use recorded paths
 
 
 settings = Settings()
@@ -13,6 +13,8 @@ from src.api.sqlite.index import public_router as sqlite_public_router
 from src.api.sqlite.index import internal_router as sqlite_internal_router
 from src.config.settings import settings
 from src.config.database import initialize_database
+from src.services.backpressure import backpressure_middleware, write_backpressure
+from src.services.job_watch import start_job_watch
 
 
 @asynccontextmanager
@@ -25,6 +27,8 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logging.error(f"Failed to initialize database during startup: {e}")
         raise
+    # Record the outcome of the scanner's jobs, even when their callbacks are lost
+    start_job_watch()
 
     yield
 
@@ -43,6 +47,10 @@ internal_app = FastAPI(
 )
 
 
+# Push back on the write endpoints used by the scanner and job pods
+internal_app.middleware("http")(backpressure_middleware)
+
+
 # Shared exception handler
 @public_app.exception_handler(ValidationError)
 @internal_app.exception_handler(ValidationError)
@@ -73,7 +81,11 @@ async def get_internal_index():
 
 @internal_app.get("/health")
 async def internal_health():
-    return {"status": "healthy", "service": "internal"}
+    return {
+        "status": "healthy",
+        "service": "internal",
+        "write_backpressure": write_backpressure.stats(),
+    }
 
 
 @public_app.get("/health")
@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from typing import Dict, Any
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# Writes that are never rejected: I/O slot acquire/report/release and job
+# progress reports are cheap, and rejecting them would leak slots or stall
+# the jobs that are already running
+EXEMPT_PATHS = ("/sqlite/io_slots/", "/sqlite/job_progress/")
+
+
+class WriteBackpressure:
+    """Admission control for the internal write endpoints.
+
+    Tracks how many writes are in flight and an exponentially weighted
+    moving average of their latency. When either passes its threshold new
+    writes are rejected with 429 and a Retry-After header, so the scanner and
+    the compression/potree pods back off instead of piling up until their
+    30 s client timeout.
+    """
+
+    def __init__(
+        self,
+        max_inflight: int,
+        max_latency_ms: float,
+        retry_after: int,
+        alpha: float = 0.2,
+    ):
+        self.max_inflight = max_inflight
+        self.max_latency_ms = max_latency_ms
+        self.retry_after = retry_after
+        self.alpha = alpha
+        self.inflight = 0
+        self.latency_ms = 0.0
+        self.last_sample = 0.0
+        self.rejected = 0
+        # A write let through to measure a stale high latency is in flight
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def overloaded(self) -> bool:
+        """Whether a new write should be rejected right now"""
+        if self.inflight >= self.max_inflight:
+            return True
+        if self.latency_ms <= self.max_latency_ms:
+            return False
+        # A high average only counts while it is fresh: after Retry-After
+        # seconds without completed writes, a single probe is let through and
+        # the others wait until a completed write has measured the latency
+        recent = time.monotonic() - self.last_sample < self.retry_after
+        return recent or self.probing
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.overloaded():
+                self.rejected += 1
+                return False
+            if self.latency_ms > self.max_latency_ms:
+                self.probing = True
+            self.inflight += 1
+            return True
+
+    def release(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.inflight -= 1
+            self.latency_ms += self.alpha * (elapsed_ms - self.latency_ms)
+            self.last_sample = time.monotonic()
+            self.probing = False
+
+    def headers(self) -> Dict[str, str]:
+        """Load hints sent with every write response"""
+        return {
+            "X-Write-Queue-Depth": str(self.inflight),
+            "X-Write-Latency-Ms": str(int(self.latency_ms)),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inflight": self.inflight,
+            "latency_ms": round(self.latency_ms, 1),
+            "rejected": self.rejected,
+            "probing": self.probing,
+            "max_inflight": self.max_inflight,
+            "max_latency_ms": self.max_latency_ms,
+        }
+
+
+write_backpressure = WriteBackpressure(
+    max_inflight=settings.WRITE_MAX_INFLIGHT,
+    max_latency_ms=settings.WRITE_MAX_LATENCY_MS,
+    retry_after=settings.WRITE_RETRY_AFTER,
+)
+
+
+async def backpressure_middleware(request: Request, call_next):
+    """HTTP middleware applying write_backpressure to write requests"""
+    if request.method not in WRITE_METHODS:
+        return await call_next(request)
+    path = request.url.path.removeprefix(request.scope.get("root_path", ""))
+    if path.startswith(EXEMPT_PATHS):
+        return await call_next(request)
+
+    if not write_backpressure.try_acquire():
+        logger.warning(
+            f"Rejecting {request.method} {request.url.path}: write backend overloaded "
+            f"({write_backpressure.stats()})"
+        )
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Backend is overloaded, retry later"},
+            headers={
+                "Retry-After": str(write_backpressure.retry_after),
+                **write_backpressure.headers(),
+            },
+        )
+
+    start = time.monotonic()
+    try:
+        response = await call_next(request)
+    finally:
+        write_backpressure.release((time.monotonic() - start) * 1000)
+
+    response.headers.update(write_backpressure.headers())
+    return response
@@ -0,0 +1,227 @@
+import glob
+import hashlib
+import logging
+import os
+import tarfile
+import threading
+from stat import S_ISDIR, S_ISLNK, S_ISREG
+from typing import Iterator, List, Optional, Tuple
+
+import zstandard
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from a file, and handed to the client, at a time
+CHUNK_SIZE = 1024 * 1024
+# zstd level of streamed archives: the client is waiting, favour speed
+STREAM_LEVEL = 3
+# File extension of a streamed archive for each codec
+STREAM_EXTENSIONS = {"zstd": ".tar.zst", "none": ".tar"}
+
+
+def folder_entries(folder: str) -> Iterator[Tuple[str, str]]:
+    """(path, arcname) of a folder and everything below it, in archive order.
+
+    This is the order of compression/archive_folder.py: each directory
+    followed by its sorted children, symlinks not followed, members named
+    after the folder like `tar -C <parent> <folder>` would name them.
+    """
+    stack = [(folder, os.path.basename(folder.rstrip("/")))]
+    while stack:
+        path, arcname = stack.pop()
+        yield path, arcname
+        if os.path.isdir(path) and not os.path.islink(path):
+            children = sorted(os.listdir(path), reverse=True)
+            stack.extend(
+                (os.path.join(path, name), f"{arcname}/{name}") for name in children
+            )
+
+
+def listing_fingerprint(listing: List[Tuple[str, int, float]]) -> str:
+    """Fingerprint of a folder listing, computed like the scanner's.
+
+    Args:
+        listing: (path relative to the folder, size, mtime) of every
+            non-directory entry, as lstat reports them
+    """
+    hasher = hashlib.sha256()
+    for rel_path, size, mtime in sorted(listing):
+        hasher.update(f"{rel_path}|{size}|{mtime}\n".encode("utf-8", "surrogateescape"))
+    return hasher.hexdigest()
+
+
+def tar_stream(
+    folder: str, listing: Optional[List[Tuple[str, int, float]]] = None
+) -> Iterator[bytes]:
+    """Tar of a folder, produced chunk by chunk while the files are read.
+
+    Headers are built like tarfile does (PAX format), but file data is
+    yielded in CHUNK_SIZE pieces instead of being buffered, so memory use
+    does not depend on file sizes. A file that shrinks while it is read is
+    padded with zeros and one that grows is cut, as GNU tar does, so the
+    stream stays a valid tar.
+
+    When listing is given, the entries the scanner fingerprints (everything
+    but directories and symlinks to them) are appended to it as they are
+    archived, so the contents actually streamed can be fingerprinted.
+    """
+    for path, arcname in folder_entries(folder):
+        try:
+            st = os.lstat(path)
+        except FileNotFoundError:
+            continue
+        if listing is not None and not S_ISDIR(st.st_mode):
+            if not (S_ISLNK(st.st_mode) and os.path.isdir(path)):
+                _, _, rel_path = arcname.partition("/")
+                listing.append((rel_path, st.st_size, st.st_mtime))
+        info = tarfile.TarInfo(arcname)
+        info.mtime = int(st.st_mtime)
+        info.mode = st.st_mode & 0o7777
+        info.uid, info.gid = st.st_uid, st.st_gid
+        if S_ISDIR(st.st_mode):
+            info.type = tarfile.DIRTYPE
+        elif S_ISLNK(st.st_mode):
+            info.type = tarfile.SYMTYPE
+            info.linkname = os.readlink(path)
+        elif S_ISREG(st.st_mode):
+            info.size = st.st_size
+        else:
+            logger.warning(f"Skipping unsupported file type: {path}")
+            continue
+        yield info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+        if not info.isreg():
+            continue
+
+        remaining = info.size
+        with open(path, "rb") as f:
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    logger.warning(f"File shrank while streaming: {path}")
+                    chunk = bytes(min(CHUNK_SIZE, remaining))
+                remaining -= len(chunk)
+                yield chunk
+        if info.size % tarfile.BLOCKSIZE:
+            yield bytes(tarfile.BLOCKSIZE - info.size % tarfile.BLOCKSIZE)
+    # End-of-archive marker: two zero blocks
+    yield bytes(2 * tarfile.BLOCKSIZE)
+
+
+def compressed(chunks: Iterator[bytes], codec: str) -> Iterator[bytes]:
+    """Compress a stream of chunks with codec ('zstd' or 'none')"""
+    if codec == "none":
+        yield from chunks
+        return
+    compressor = zstandard.ZstdCompressor(level=STREAM_LEVEL).compressobj()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class ArchiveCache:
+    """Size-bounded LRU cache of streamed folder archives.
+
+    Entries are files named after the folder and the fingerprint of the
+    contents they were made from, so a folder that changes misses the
+    cache. Their mtime is the time of last use: once the cache holds more
+    than max_bytes, the least recently used entries are deleted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _prefix(self, folder_key: str) -> str:
+        digest = hashlib.sha256(folder_key.encode("utf-8", "surrogateescape"))
+        return os.path.join(self.directory, digest.hexdigest()[:16])
+
+    def path(self, folder_key: str, fp: str, codec: str) -> str:
+        return f"{self._prefix(folder_key)}-{fp[:16]}{STREAM_EXTENSIONS[codec]}"
+
+    def get(self, folder_key: str, fp: str, codec: str) -> Optional[str]:
+        """Path of the cached archive, marked as just used, or None"""
+        path = self.path(folder_key, fp, codec)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def store(
+        self,
+        chunks: Iterator[bytes],
+        folder_key: str,
+        fp: str,
+        codec: str,
+        listing: Optional[List[Tuple[str, int, float]]] = None,
+    ) -> Iterator[bytes]:
+        """Pass chunks through, keeping a copy that is cached once complete.
+
+        An interrupted stream (client gone, read error) is not cached, and
+        neither is one whose listing, filled by tar_stream while it ran,
+        does not have the fingerprint fp it would be cached under.
+        """
+        path = self.path(folder_key, fp, codec)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        complete = False
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            complete = listing is None or listing_fingerprint(listing) == fp
+            if not complete:
+                logger.info(
+                    f"Not caching archive of {folder_key}: the folder differs "
+                    f"from its scanned fingerprint"
+                )
+        finally:
+            if not complete and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        if not complete:
+            return
+        os.replace(tmp_path, path)
+        # Archives of the previous contents of the folder
+        for stale in glob.glob(glob.escape(self._prefix(folder_key)) + "-*"):
+            if stale != path and not stale.endswith(".tmp"):
+                os.remove(stale)
+        logger.info(f"Cached archive of {folder_key}: {path}")
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete the least recently used archives until the cache fits max_bytes"""
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                logger.info(f"Evicted cached archive: {path}")
+
+
+_archive_cache: Optional[ArchiveCache] = None
+_archive_cache_lock = threading.Lock()
+
+
+def get_archive_cache(directory: str, max_bytes: int) -> Optional[ArchiveCache]:
+    """The archive cache in directory, None when caching is disabled"""
+    global _archive_cache
+    if not directory:
+        return None
+    with _archive_cache_lock:
+        if _archive_cache is None or _archive_cache.directory != directory:
+            _archive_cache = ArchiveCache(directory, max_bytes)
+        return _archive_cache
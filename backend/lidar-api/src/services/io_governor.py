@@ -0,0 +1,185 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class IoGovernor:
+    """Concurrency slots for the jobs reading the LiDAR NAS.
+
+    Compression, recompression and Potree pods acquire a slot before they
+    start reading and report the MB/s they move while they hold it. Every
+    window the aggregate throughput of the slot holders decides the number
+    of slots, AIMD style: while all slots are busy and throughput did not
+    drop, one more slot is handed out (additive increase); when throughput
+    falls although at least as many slots are busy as in the previous
+    window, the NAS is past its knee and the slots are cut by
+    decrease_factor (multiplicative decrease). A slot whose holder stopped
+    reporting for lease_ttl seconds is reclaimed.
+
+    State is kept in memory: after a backend restart, pods still running
+    re-register their slot with their next report.
+    """
+
+    def __init__(
+        self,
+        initial_slots: int,
+        min_slots: int,
+        max_slots: int,
+        lease_ttl: int,
+        window: int,
+        retry_after: int,
+        drop_tolerance: float = 0.1,
+        decrease_factor: float = 0.75,
+    ):
+        self.limit = float(initial_slots)
+        self.min_slots = min_slots
+        self.max_slots = max_slots
+        self.lease_ttl = lease_ttl
+        self.window = window
+        self.retry_after = retry_after
+        self.drop_tolerance = drop_tolerance
+        self.decrease_factor = decrease_factor
+        self.leases: Dict[str, Dict[str, Any]] = {}
+        self.waiting: Dict[str, float] = {}
+        self.window_start = time.monotonic()
+        self.last_throughput: Optional[float] = None
+        self.last_busy = 0
+        self.throughput = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self._lock = threading.Lock()
+
+    @property
+    def slots(self) -> int:
+        return max(self.min_slots, int(self.limit))
+
+    def _expire(self, now: float) -> None:
+        for holder, lease in list(self.leases.items()):
+            if now - lease["renewed_at"] > self.lease_ttl:
+                logger.warning(f"Reclaiming I/O slot of {holder}: no report")
+                del self.leases[holder]
+        for holder, seen in list(self.waiting.items()):
+            if now - seen > 2 * self.retry_after:
+                del self.waiting[holder]
+
+    def _adjust(self, now: float) -> None:
+        """Close the current window and move the slot count"""
+        if now - self.window_start < self.window:
+            return
+        self.window_start = now
+        rates = [
+            lease["rate_sum"] / lease["samples"]
+            for lease in self.leases.values()
+            if lease["samples"]
+        ]
+        for lease in self.leases.values():
+            lease["rate_sum"], lease["samples"] = 0.0, 0
+        if not rates:
+            return
+
+        busy = len(self.leases)
+        throughput = sum(rates)
+        previous, previous_busy = self.last_throughput, self.last_busy
+        self.throughput = throughput
+        self.last_throughput, self.last_busy = throughput, busy
+        if (
+            previous is not None
+            and busy >= previous_busy
+            and throughput < previous * (1 - self.drop_tolerance)
+        ):
+            self.limit = max(self.min_slots, self.limit * self.decrease_factor)
+            self.decreases += 1
+            logger.info(
+                f"NAS throughput fell to {throughput:.1f} MB/s from {previous:.1f} MB/s "
+                f"with {busy} slots busy, I/O slots reduced to {self.slots}"
+            )
+        elif busy >= self.slots and self.limit < self.max_slots:
+            self.limit = min(self.max_slots, self.limit + 1)
+            self.increases += 1
+            logger.info(
+                f"NAS throughput {throughput:.1f} MB/s with all slots busy, "
+                f"I/O slots raised to {self.slots}"
+            )
+
+    def acquire(self, holder: str, kind: str) -> bool:
+        """Give holder a slot if one is free. Acquiring a held slot renews it."""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            self._adjust(now)
+            if holder not in self.leases:
+                if len(self.leases) >= self.slots:
+                    self.waiting[holder] = now
+                    return False
+                self.leases[holder] = {
+                    "kind": kind,
+                    "acquired_at": time.time(),
+                    "rate_sum": 0.0,
+                    "samples": 0,
+                    "mb_per_s": None,
+                }
+                self.waiting.pop(holder, None)
+            self.leases[holder]["renewed_at"] = now
+            return True
+
+    def report(self, holder: str, kind: str, mb_per_s: float) -> None:
+        """Record the throughput of a slot holder, re-registering a forgotten slot"""
+        with self._lock:
+            now = time.monotonic()
+            lease = self.leases.setdefault(
+                holder,
+                {
+                    "kind": kind,
+                    "acquired_at": time.time(),
+                    "rate_sum": 0.0,
+                    "samples": 0,
+                },
+            )
+            lease["renewed_at"] = now
+            lease["mb_per_s"] = mb_per_s
+            lease["rate_sum"] += mb_per_s
+            lease["samples"] += 1
+            self._expire(now)
+            self._adjust(now)
+
+    def release(self, holder: str) -> bool:
+        with self._lock:
+            self.waiting.pop(holder, None)
+            return self.leases.pop(holder, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                "slots": self.slots,
+                "busy": len(self.leases),
+                "waiting": len(self.waiting),
+                "throughput_mb_per_s": round(self.throughput, 1),
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "min_slots": self.min_slots,
+                "max_slots": self.max_slots,
+                "holders": {
+                    holder: {
+                        "kind": lease["kind"],
+                        "acquired_at": int(lease["acquired_at"]),
+                        "mb_per_s": lease["mb_per_s"],
+                    }
+                    for holder, lease in self.leases.items()
+                },
+            }
+
+
+io_governor = IoGovernor(
+    initial_slots=settings.IO_SLOTS_INITIAL,
+    min_slots=settings.IO_SLOTS_MIN,
+    max_slots=settings.IO_SLOTS_MAX,
+    lease_ttl=settings.IO_SLOT_LEASE_TTL,
+    window=settings.IO_SLOT_WINDOW,
+    retry_after=settings.IO_SLOT_RETRY_AFTER,
+)
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config.settings import settings
+
+# Fields a job reports, in the order they are stored
+PROGRESS_FIELDS = (
+    "pod",
+    "bytes_read",
+    "bytes_written",
+    "bytes_total",
+    "members_done",
+    "members_total",
+    "percent",
+    "eta_seconds",
+)
+
+
+class JobProgressTable:
+    """Latest progress report of each running compression and Potree job.
+
+    Kept in memory only, as one tuple per job keyed by (kind, key), in
+    least recently updated order. Jobs that stopped reporting for ttl
+    seconds are dropped, and the oldest ones once max_entries is reached.
+    Read and write rates are measured between two consecutive reports.
+    """
+
+    def __init__(self, ttl: int, max_entries: int, stall_after: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stall_after = stall_after
+        # (kind, key) -> (started_at, updated_at, moved_at, read_rate, write_rate, fields)
+        self._jobs: "OrderedDict[Tuple[str, str], Tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        while self._jobs:
+            job, entry = next(iter(self._jobs.items()))
+            if now - entry[1] <= self.ttl and len(self._jobs) <= self.max_entries:
+                break
+            del self._jobs[job]
+
+    def report(self, kind: str, key: str, report: Dict[str, Any]) -> None:
+        fields = tuple(report.get(name) for name in PROGRESS_FIELDS)
+        now = time.time()
+        with self._lock:
+            previous = self._jobs.pop((kind, key), None)
+            started_at, moved_at, read_rate, write_rate = now, now, None, None
+            if previous is not None:
+                started_at, updated_at, moved_at, read_rate, write_rate, old = previous
+                elapsed = now - updated_at
+                read = fields[1] - old[1]
+                written = fields[2] - old[2]
+                # A restarted job starts counting again: keep the previous rates
+                if elapsed > 0 and read >= 0 and written >= 0:
+                    read_rate, write_rate = read / elapsed, written / elapsed
+                if read > 0 or written > 0:
+                    moved_at = now
+            self._jobs[(kind, key)] = (
+                started_at,
+                now,
+                moved_at,
+                read_rate,
+                write_rate,
+                fields,
+            )
+            self._expire(now)
+
+    def _row(self, job: Tuple[str, str], entry: Tuple, now: float) -> Dict[str, Any]:
+        started_at, updated_at, moved_at, read_rate, write_rate, fields = entry
+        row: Dict[str, Any] = {"kind": job[0], "key": job[1]}
+        row.update(zip(PROGRESS_FIELDS, fields))
+        row.update(
+            {
+                "started_at": int(started_at),
+                "updated_at": int(updated_at),
+                "read_mb_per_s": (
+                    round(read_rate / 1024**2, 2) if read_rate is not None else None
+                ),
+                "write_mb_per_s": (
+                    round(write_rate / 1024**2, 2) if write_rate is not None else None
+                ),
+                # No bytes moved for stall_after seconds, or no report at all
+                "stalled": now - moved_at > self.stall_after,
+            }
+        )
+        return row
+
+    def get(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            entry = self._jobs.get((kind, key))
+            return self._row((kind, key), entry, now) if entry else None
+
+    def rows(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Reports of running jobs, most recently updated first"""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            return [
+                self._row(job, entry, now)
+                for job, entry in reversed(self._jobs.items())
+                if kind is None or job[0] == kind
+            ]
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Jobs and measured rates per kind, for capacity planning"""
+        kinds: Dict[str, Dict[str, Any]] = {}
+        for row in self.rows():
+            totals = kinds.setdefault(
+                row["kind"],
+                {
+                    "kind": row["kind"],
+                    "jobs": 0,
+                    "stalled": 0,
+                    "read_mb_per_s": 0.0,
+                    "write_mb_per_s": 0.0,
+                },
+            )
+            totals["jobs"] += 1
+            totals["stalled"] += row["stalled"]
+            totals["read_mb_per_s"] += row["read_mb_per_s"] or 0.0
+            totals["write_mb_per_s"] += row["write_mb_per_s"] or 0.0
+        for totals in kinds.values():
+            totals["read_mb_per_s_per_job"] = round(
+                totals["read_mb_per_s"] / totals["jobs"], 2
+            )
+            totals["read_mb_per_s"] = round(totals["read_mb_per_s"], 2)
+            totals["write_mb_per_s"] = round(totals["write_mb_per_s"], 2)
+        return list(kinds.values())
+
+
+job_progress = JobProgressTable(
+    ttl=settings.JOB_PROGRESS_TTL,
+    max_entries=settings.JOB_PROGRESS_MAX_ENTRIES,
+    stall_after=settings.JOB_PROGRESS_STALL_AFTER,
+)
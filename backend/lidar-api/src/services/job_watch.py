@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from src.api.sqlite.job_batch import record_job_outcomes
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Label the scanner puts on its Jobs and their pods
+SCANNER_LABEL_SELECTOR = "app.kubernetes.io/managed-by=addlidar-scanner"
+COMPLETION_INDEX_ANNOTATION = "batch.kubernetes.io/job-completion-index"
+
+
+def pod_outcome(pod) -> Optional[Dict[str, Any]]:
+    """Outcome of a terminated pod of an Indexed Job, None while it runs"""
+    if pod.status.phase not in ("Succeeded", "Failed"):
+        return None
+    annotations = pod.metadata.annotations or {}
+    owner = next(
+        (ref for ref in pod.metadata.owner_references or [] if ref.kind == "Job"),
+        None,
+    )
+    if owner is None or COMPLETION_INDEX_ANNOTATION not in annotations:
+        return None
+
+    # The main container, or the init container that failed before it
+    terminated = None
+    for status in (pod.status.container_statuses or []) + (
+        pod.status.init_container_statuses or []
+    ):
+        if status.state and status.state.terminated:
+            terminated = status.state.terminated
+            if pod.status.phase == "Succeeded" or terminated.exit_code != 0:
+                break
+    finished = terminated.finished_at if terminated else None
+    started = terminated.started_at if terminated else pod.status.start_time
+    return {
+        "job_uid": owner.uid,
+        "completion_index": int(annotations[COMPLETION_INDEX_ANNOTATION]),
+        "pod_name": pod.metadata.name,
+        "status": "succeeded" if pod.status.phase == "Succeeded" else "failed",
+        "exit_code": terminated.exit_code if terminated else None,
+        # e.g. OOMKilled for a container, DeadlineExceeded or Evicted for the pod
+        "reason": (terminated.reason if terminated else None) or pod.status.reason,
+        "started_at": int(started.timestamp()) if started else None,
+        "finished_at": int(finished.timestamp()) if finished else int(time.time()),
+    }
+
+
+class JobWatch:
+    """Reconcile the pods of the scanner's Jobs into the database.
+
+    A single watch on the pods labelled by the scanner collects the exit
+    code of every terminated pod; the outcomes are written every
+    flush_interval seconds in one transaction (record_job_outcomes). The
+    pods still report their result themselves: the watch only fills in
+    the items whose callback was lost.
+    """
+
+    def __init__(self, namespace: str, flush_interval: float):
+        self.namespace = namespace
+        self.flush_interval = flush_interval
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.seen: Dict[str, str] = {}
+        self.reconciled = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        for target in (self._watch, self._flush_loop):
+            threading.Thread(target=target, daemon=True).start()
+        logger.info(
+            f"Watching pods '{SCANNER_LABEL_SELECTOR}' in namespace {self.namespace}"
+        )
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _collect(self, pod) -> None:
+        outcome = pod_outcome(pod)
+        if outcome is None:
+            return
+        with self._lock:
+            # Relists and later events of a terminated pod repeat its outcome
+            if self.seen.get(pod.metadata.uid) == pod.status.phase:
+                return
+            self.seen[pod.metadata.uid] = pod.status.phase
+            self.pending[pod.metadata.uid] = outcome
+
+    def _watch(self) -> None:
+        from kubernetes import client, config, watch
+        from kubernetes.client.exceptions import ApiException
+
+        try:
+            config.load_incluster_config()
+        except config.ConfigException:
+            config.load_kube_config()
+        core_v1 = client.CoreV1Api()
+
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                # List first so pods that ended while not watching are included
+                pods = core_v1.list_namespaced_pod(
+                    self.namespace, label_selector=SCANNER_LABEL_SELECTOR
+                )
+                for pod in pods.items:
+                    self._collect(pod)
+                with self._lock:
+                    live = {pod.metadata.uid for pod in pods.items}
+                    self.seen = {
+                        uid: phase for uid, phase in self.seen.items() if uid in live
+                    }
+                w = watch.Watch()
+                for event in w.stream(
+                    core_v1.list_namespaced_pod,
+                    self.namespace,
+                    label_selector=SCANNER_LABEL_SELECTOR,
+                    resource_version=pods.metadata.resource_version,
+                    timeout_seconds=300,
+                ):
+                    if self._stop.is_set():
+                        w.stop()
+                        break
+                    if event["type"] in ("ADDED", "MODIFIED"):
+                        self._collect(event["object"])
+                backoff = 1
+            except ApiException as e:
+                # 410 Gone: the resource version expired, relist right away
+                if e.status != 410:
+                    logger.warning(f"Job watch error, retrying in {backoff}s: {e}")
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, 60)
+            except Exception as e:
+                logger.warning(f"Job watch error, retrying in {backoff}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        try:
+            reconciled = record_job_outcomes(list(pending.values()))
+        except Exception as e:
+            logger.error(f"Could not record {len(pending)} job outcomes: {e}")
+            # Retry with the next flush, unless newer outcomes arrived meanwhile
+            with self._lock:
+                for uid, outcome in pending.items():
+                    self.pending.setdefault(uid, outcome)
+            return
+        self.reconciled += reconciled
+        logger.info(
+            f"Recorded {len(pending)} job outcomes, {reconciled} without a pod callback"
+        )
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+_job_watch: Optional[JobWatch] = None
+
+
+def start_job_watch() -> Optional[JobWatch]:
+    """Start watching the scanner's Jobs, unless JOB_WATCH_NAMESPACE is empty"""
+    global _job_watch
+    if not settings.JOB_WATCH_NAMESPACE or _job_watch is not None:
+        return _job_watch
+    _job_watch = JobWatch(
+        settings.JOB_WATCH_NAMESPACE, settings.JOB_WATCH_FLUSH_SECONDS
+    )
+    _job_watch.start()
+    return _job_watch
@@ -0,0 +1,102 @@
+import gzip
+import logging
+import os
+from typing import Dict, Optional, Set
+
+import brotli
+
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Potree 2 outputs that get precompressed copies. The viewer fetches only
+# metadata.json whole; it reads hierarchy.bin and octree.bin with Range
+# requests, which are never served encoded, so copies of them would go unused
+PRECOMPRESSED_FILES = ("metadata.json",)
+# Content-Encoding -> suffix of the precompressed copy, in order of preference
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# A copy is kept only if it saves at least this share of the file
+MIN_SAVING = 0.1
+CHUNK_SIZE = 1024 * 1024
+
+
+def accepted_encodings(header: Optional[str]) -> Set[str]:
+    """Codings of an Accept-Encoding header with a non-zero q-value"""
+    encodings = set()
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            encodings.add(coding.strip().lower())
+    return encodings
+
+
+def precompressed_variant(path: str, accept_encoding: Optional[str]):
+    """(encoding, path) of the preferred up-to-date precompressed copy, or None"""
+    accepted = accepted_encodings(accept_encoding)
+    for encoding, suffix in ENCODING_SUFFIXES.items():
+        if encoding not in accepted:
+            continue
+        try:
+            # A copy older than the file is left over from a previous conversion
+            if os.path.getmtime(path + suffix) >= os.path.getmtime(path):
+                return encoding, path + suffix
+        except OSError:
+            continue
+    return None
+
+
+def _compress_file(path: str, encoding: str) -> int:
+    """Write the precompressed copy of path, returning its size"""
+    tmp_path = f"{path}{ENCODING_SUFFIXES[encoding]}.tmp"
+    with open(path, "rb") as src:
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=settings.POTREE_BROTLI_QUALITY)
+            with open(tmp_path, "wb") as dst:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    dst.write(compressor.process(chunk))
+                dst.write(compressor.finish())
+        else:
+            with gzip.open(tmp_path, "wb", compresslevel=9) as dst:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    dst.write(chunk)
+    os.replace(tmp_path, path + ENCODING_SUFFIXES[encoding])
+    return os.path.getsize(path + ENCODING_SUFFIXES[encoding])
+
+
+def precompress_potree_output(directory: str) -> Dict[str, Dict[str, int]]:
+    """Write Brotli and gzip copies of the files of a Potree output.
+
+    Files above POTREE_PRECOMPRESS_MAX_MB are skipped, and copies that save
+    less than MIN_SAVING are removed.
+
+    Returns:
+        file name -> {encoding: size} of the copies kept
+    """
+    kept: Dict[str, Dict[str, int]] = {}
+    for name in PRECOMPRESSED_FILES:
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            continue
+        size = os.path.getsize(path)
+        if size > settings.POTREE_PRECOMPRESS_MAX_MB * 1024**2:
+            logger.info(f"Not precompressing {path}: {size // 1024**2} MB")
+            continue
+        for encoding, suffix in ENCODING_SUFFIXES.items():
+            try:
+                compressed_size = _compress_file(path, encoding)
+            except Exception as e:
+                logger.error(f"Failed to write {encoding} copy of {path}: {e}")
+                continue
+            if compressed_size > size * (1 - MIN_SAVING):
+                os.remove(path + suffix)
+                continue
+            kept.setdefault(name, {})[encoding] = compressed_size
+        logger.info(f"Precompressed {path} ({size} bytes): {kept.get(name, {})}")
+    return kept
@@ -0,0 +1,111 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from src.config.settings import settings
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range Range header into inclusive (start, end).
+
+    Returns None when the whole file should be sent: no header, a unit
+    other than bytes, several ranges, or a malformed range, which RFC 9110
+    says to ignore. Raises ValueError when a well-formed range cannot be
+    satisfied (416).
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes=") :].strip()
+    if "," in spec:
+        return None
+    first, sep, last = spec.partition("-")
+    first, last = first.strip(), last.strip()
+    if not sep or not (first or last):
+        return None
+    if not first:
+        # Suffix range: the last n bytes
+        if not last.isdigit():
+            return None
+        if int(last) == 0 or size == 0:
+            raise ValueError(f"Unsatisfiable range: {header}")
+        return max(0, size - int(last)), size - 1
+    if not first.isdigit() or (last and not last.isdigit()):
+        return None
+    if last and int(last) < int(first):
+        return None
+    start = int(first)
+    if start >= size:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+class ByteRangeCache:
+    """In-memory LRU of byte ranges read from files.
+
+    Keyed by (path, etag, start, end), so a file rewritten under a new
+    ETag misses the cache and its old ranges age out. Only ranges up to
+    max_entry bytes are kept, within max_bytes in total.
+    """
+
+    def __init__(self, max_bytes: int, max_entry: int):
+        self.max_bytes = max_bytes
+        self.max_entry = max_entry
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str, int, int], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read(self, path: str, etag: str, start: int, end: int) -> bytes:
+        """Bytes start..end (inclusive) of path, from the cache when possible"""
+        key = (path, etag, start, end)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            data = f.read(end - start + 1)
+
+        if len(data) <= self.max_entry:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = data
+                    self.size += len(data)
+                while self.size > self.max_bytes and self._entries:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.size -= len(evicted)
+        return data
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def read_file_range(path: str, start: int, end: int, chunk_size: int = 1024 * 1024):
+    """Stream bytes start..end (inclusive) of a file"""
+    remaining = end - start + 1
+    with open(path, "rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            data = f.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+potree_range_cache = ByteRangeCache(
+    max_bytes=settings.POTREE_RANGE_CACHE_MB * 1024**2,
+    max_entry=settings.POTREE_RANGE_CACHE_MAX_KB * 1024,
+)
@@ -0,0 +1,126 @@
+import bisect
+import gzip
+import json
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import zstandard
+
+logger = logging.getLogger(__name__)
+
+# Suffix of the sidecar index written by compression/archive_folder.py
+INDEX_SUFFIX = ".index.json.gz"
+# Archives whose parsed index is kept in memory
+INDEX_CACHE_SIZE = 32
+
+
+class ArchiveIndex:
+    """Parsed sidecar index of a framed archive.
+
+    The archive is a concatenation of independently compressed zstd frames or
+    gzip members. The index gives, for every frame, its uncompressed and
+    compressed offsets and sizes, and for every regular file the offset of
+    its data in the uncompressed tar stream. Multi-part archives also list
+    their part files, compressed offsets counting across parts.
+    """
+
+    def __init__(self, index: Dict):
+        self.codec: str = index["codec"]
+        self.frames: List[Tuple[int, int, int, int]] = [
+            tuple(frame) for frame in index["frames"]
+        ]
+        self.frame_starts = [frame[0] for frame in self.frames]
+        # Version 2 indexes append the SHA-256 of each member
+        self.members: Dict[str, Tuple[int, int]] = {
+            member[0]: (member[1], member[2]) for member in index["members"]
+        }
+        self.checksums: Dict[str, str] = {
+            member[0]: member[3] for member in index["members"] if len(member) > 3
+        }
+        # (file name, compressed offset, size) of every part
+        self.parts: List[Tuple[str, int, int]] = [
+            (name, offset, size) for name, offset, size, *_ in index.get("parts", [])
+        ]
+        self.part_starts = [part[1] for part in self.parts]
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data, 31)
+
+    def locate(self, archive_path: str, compressed_offset: int) -> Tuple[str, int]:
+        """File holding a compressed offset (the archive or a part) and the offset in it"""
+        if not self.parts:
+            return archive_path, compressed_offset
+        i = max(0, bisect.bisect_right(self.part_starts, compressed_offset) - 1)
+        name, part_start, _ = self.parts[i]
+        return (
+            os.path.join(os.path.dirname(archive_path), name),
+            compressed_offset - part_start,
+        )
+
+    def read(self, archive_path: str, offset: int, size: int) -> Iterator[bytes]:
+        """Yield size bytes of the tar stream starting at offset, one frame at a time"""
+        end = offset + size
+        i = max(0, bisect.bisect_right(self.frame_starts, offset) - 1)
+        path, fileobj = None, None
+        try:
+            while offset < end and i < len(self.frames):
+                frame_start, frame_size, compressed_offset, compressed_size = (
+                    self.frames[i]
+                )
+                frame_path, file_offset = self.locate(archive_path, compressed_offset)
+                if frame_path != path:
+                    if fileobj is not None:
+                        fileobj.close()
+                    path, fileobj = frame_path, open(frame_path, "rb")
+                fileobj.seek(file_offset)
+                data = self.decompress(fileobj.read(compressed_size))
+                chunk = data[
+                    offset
+                    - frame_start : min(end, frame_start + frame_size)
+                    - frame_start
+                ]
+                yield chunk
+                offset += len(chunk)
+                i += 1
+        finally:
+            if fileobj is not None:
+                fileobj.close()
+        if offset < end:
+            raise ValueError("Archive index does not cover the requested range")
+
+
+# LRU of ArchiveIndex keyed by (archive path, index mtime)
+_index_cache: "OrderedDict[Tuple[str, float], ArchiveIndex]" = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def load_index(archive_path: str) -> Optional[ArchiveIndex]:
+    """Load the sidecar index of an archive, None when the archive has none"""
+    path = archive_path + INDEX_SUFFIX
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+    cache_key = (archive_path, mtime)
+    with _index_cache_lock:
+        if cache_key in _index_cache:
+            _index_cache.move_to_end(cache_key)
+            return _index_cache[cache_key]
+
+    with gzip.open(path, "rt", encoding="utf-8", errors="surrogateescape") as f:
+        index = ArchiveIndex(json.load(f))
+    logger.info(f"Loaded archive index of {archive_path}: {len(index.members)} files")
+
+    with _index_cache_lock:
+        _index_cache[cache_key] = index
+        _index_cache.move_to_end(cache_key)
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
@@ -0,0 +1,35 @@
+import pytest
+
+from src.api.sqlite.archive_chain import next_mode
+from src.config.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def chain_limits(monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_MAX_DELTAS", 3)
+    monkeypatch.setattr(settings, "ARCHIVE_CONSOLIDATION_RATIO", 0.5)
+
+
+def link(seq, size):
+    return {"seq": seq, "archive_size": size}
+
+
+def test_first_archive_is_full():
+    assert next_mode([]) == "full"
+
+
+def test_chain_without_base_is_consolidated():
+    assert next_mode([link(1, 10)]) == "full"
+
+
+def test_small_chain_gets_a_delta():
+    assert next_mode([link(0, 1000)]) == "delta"
+    assert next_mode([link(0, 1000), link(1, 100), link(2, 100)]) == "delta"
+
+
+def test_too_many_deltas_are_consolidated():
+    assert next_mode([link(0, 1000), link(1, 1), link(2, 1), link(3, 1)]) == "full"
+
+
+def test_heavy_deltas_are_consolidated():
+    assert next_mode([link(0, 1000), link(1, 300), link(2, 201)]) == "full"
@@ -0,0 +1,52 @@
+import types
+
+import pytest
+
+from src.services import backpressure
+from src.services.backpressure import WriteBackpressure
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic clock of the admission control, moved by the test"""
+    now = types.SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(
+        backpressure, "time", types.SimpleNamespace(monotonic=lambda: now.value)
+    )
+    return now
+
+
+def make_backpressure():
+    return WriteBackpressure(
+        max_inflight=3, max_latency_ms=100, retry_after=5, alpha=1.0
+    )
+
+
+def test_writes_are_limited_in_flight(clock):
+    limiter = make_backpressure()
+    assert all(limiter.try_acquire() for _ in range(3))
+    assert not limiter.try_acquire()
+    limiter.release(10)
+    assert limiter.try_acquire()
+
+
+def test_single_probe_after_a_slow_window(clock):
+    limiter = make_backpressure()
+    limiter.try_acquire()
+    limiter.release(500)
+    assert not limiter.try_acquire()
+
+    # The window expired: one probe, the others keep getting 429
+    clock.value += 5
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    assert limiter.stats()["probing"]
+
+    # Still slow: rejected for another window
+    limiter.release(300)
+    assert not limiter.try_acquire()
+
+    clock.value += 5
+    assert limiter.try_acquire()
+    limiter.release(20)
+    assert limiter.try_acquire() and limiter.try_acquire()
@@ -0,0 +1,45 @@
+import gzip
+
+from src.api.sqlite.folder_manifest import DirectoryIndex, parse_manifest
+
+
+def make_manifest(entries):
+    lines = "".join(f"{path}\t{size}\t{mtime}\n" for path, size, mtime in entries)
+    return gzip.compress(lines.encode("utf-8"))
+
+
+MANIFEST = make_manifest(
+    [
+        ("a/x.las", 100, 10.0),
+        ("a/b/y.las", 50, 30.0),
+        ("readme.txt", 5, 20.0),
+        ("tab\tname.csv", 1, 1.0),
+    ]
+)
+
+
+def test_parse_manifest_keeps_tabs_in_names():
+    assert ("tab\tname.csv", 1, 1.0) in parse_manifest(MANIFEST)
+
+
+def test_directory_aggregates():
+    index = DirectoryIndex(MANIFEST)
+    assert index.aggregates[""] == [156, 4, 30.0]
+    assert index.aggregates["a"] == [150, 2, 30.0]
+    assert index.aggregates["a/b"] == [50, 1, 30.0]
+    assert not index.exists("missing")
+
+
+def test_listing_pages_directories_before_files():
+    index = DirectoryIndex(MANIFEST)
+    assert index.count("") == 3
+
+    first = index.listing("", limit=2, offset=0)
+    assert [(e["name"], e["type"]) for e in first] == [
+        ("a", "directory"),
+        ("readme.txt", "file"),
+    ]
+    assert first[0]["size_bytes"] == 150
+
+    second = index.listing("", limit=2, offset=2)
+    assert [e["name"] for e in second] == ["tab\tname.csv"]
@@ -0,0 +1,83 @@
+import types
+
+import pytest
+
+from src.services import io_governor
+from src.services.io_governor import IoGovernor
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Monotonic clock of the governor, moved by the test"""
+    now = types.SimpleNamespace(value=0.0)
+    fake_time = types.SimpleNamespace(
+        monotonic=lambda: now.value, time=lambda: 1_700_000_000 + now.value
+    )
+    monkeypatch.setattr(io_governor, "time", fake_time)
+    return now
+
+
+def make_governor():
+    return IoGovernor(
+        initial_slots=2,
+        min_slots=1,
+        max_slots=4,
+        lease_ttl=60,
+        window=10,
+        retry_after=30,
+    )
+
+
+def test_slots_are_limited(clock):
+    governor = make_governor()
+    assert governor.acquire("a", "compression")
+    assert governor.acquire("b", "potree")
+    assert not governor.acquire("c", "compression")
+    # Acquiring a held slot renews it
+    assert governor.acquire("a", "compression")
+    assert governor.stats()["waiting"] == 1
+
+    assert governor.release("a")
+    assert not governor.release("a")
+    assert governor.acquire("c", "compression")
+
+
+def test_slots_grow_while_busy_and_shrink_when_throughput_drops(clock):
+    governor = make_governor()
+    governor.acquire("a", "compression")
+    governor.acquire("b", "compression")
+    clock.value = 5
+    governor.report("a", "compression", 100.0)
+    governor.report("b", "compression", 100.0)
+
+    # All slots busy and no drop: one more slot
+    clock.value = 10
+    governor.report("a", "compression", 100.0)
+    assert governor.slots == 3
+    assert governor.acquire("c", "compression")
+
+    # As many slots busy, but the NAS moves less: cut by decrease_factor
+    clock.value = 20
+    governor.report("a", "compression", 50.0)
+    assert governor.slots == 2
+    assert governor.stats()["increases"] == 1
+    assert governor.stats()["decreases"] == 1
+
+
+def test_silent_holders_are_reclaimed(clock):
+    governor = make_governor()
+    governor.acquire("a", "compression")
+    governor.acquire("b", "compression")
+    clock.value = 30
+    governor.report("b", "compression", 10.0)
+
+    clock.value = 80
+    stats = governor.stats()
+    assert stats["busy"] == 1
+    assert list(stats["holders"]) == ["b"]
+
+
+def test_report_reregisters_a_forgotten_slot(clock):
+    governor = make_governor()
+    governor.report("a", "potree", 20.0)
+    assert governor.stats()["holders"]["a"]["kind"] == "potree"
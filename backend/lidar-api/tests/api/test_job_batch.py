@@ -0,0 +1,83 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from src.api.sqlite.job_batch import record_job_outcomes
+
+SCHEMA = Path(__file__).parents[2] / "persist_state.sql"
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    path = tmp_path / "state.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA.read_text())
+    conn.executemany(
+        """INSERT INTO folder_state
+        (folder_key, mission_key, fp, output_path, size_kb, file_count,
+         last_checked, processing_status)
+        VALUES (?, 'm', ?, '', 1, 1, 0, ?)""",
+        [("m/pending", "fp1", "pending"), ("m/done", "fp2", "success")],
+    )
+    conn.executemany(
+        """INSERT INTO job_batch_item
+        (job_uid, completion_index, job_name, kind, item_key, fp, created_at, status)
+        VALUES ('uid', ?, 'compression', 'compression', ?, ?, 0, 'queued')""",
+        [(0, "m/pending", "fp1"), (1, "m/done", "fp2")],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setenv("DATABASE_PATH", str(path))
+    return path
+
+
+def outcome(index, status="failed", finished_at=200, **fields):
+    return {
+        "job_uid": "uid",
+        "completion_index": index,
+        "pod_name": f"compression-{index}",
+        "status": status,
+        "exit_code": 137 if status == "failed" else 0,
+        "reason": "OOMKilled" if status == "failed" else None,
+        "started_at": 100,
+        "finished_at": finished_at,
+        **fields,
+    }
+
+
+def query(db, sql, *params):
+    conn = sqlite3.connect(db)
+    conn.row_factory = sqlite3.Row
+    row = conn.execute(sql, params).fetchone()
+    conn.close()
+    return row
+
+
+def test_lost_callback_is_reconciled(db):
+    assert record_job_outcomes([outcome(0)]) == 1
+
+    state = query(db, "SELECT * FROM folder_state WHERE folder_key = 'm/pending'")
+    assert state["processing_status"] == "failed"
+    assert state["processing_time"] == 100
+    assert "OOMKilled" in state["error_message"]
+    item = query(db, "SELECT * FROM job_batch_item WHERE completion_index = 0")
+    assert (item["status"], item["reconciled"]) == ("failed", 1)
+
+
+def test_state_written_by_the_pod_is_kept(db):
+    assert record_job_outcomes([outcome(1)]) == 0
+
+    state = query(db, "SELECT * FROM folder_state WHERE folder_key = 'm/done'")
+    assert state["processing_status"] == "success"
+    item = query(db, "SELECT * FROM job_batch_item WHERE completion_index = 1")
+    assert (item["status"], item["reconciled"]) == ("failed", 0)
+
+
+def test_earlier_attempts_and_unknown_jobs_are_ignored(db):
+    record_job_outcomes([outcome(0, status="succeeded", finished_at=300)])
+    assert record_job_outcomes([outcome(0, finished_at=250)]) == 0
+    assert record_job_outcomes([outcome(5), outcome(0, job_uid="other")]) == 0
+
+    item = query(db, "SELECT * FROM job_batch_item WHERE completion_index = 0")
+    assert item["status"] == "succeeded"
@@ -0,0 +1,52 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.sqlite.index import public_router
+from src.config.settings import settings
+
+SCHEMA = Path(__file__).parents[2] / "persist_state.sql"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    output = tmp_path / "potree" / "m"
+    output.mkdir(parents=True)
+    (output / "metadata.json").write_text("{}")
+    (tmp_path / "potree" / "secret.txt").write_text("secret")
+
+    path = tmp_path / "state.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA.read_text())
+    conn.execute(
+        """INSERT INTO potree_metacloud_state
+        (mission_key, fp, output_path, last_checked, last_processed, processing_status)
+        VALUES ('m', 'fp', ?, 0, 1, 'success')""",
+        (str(output),),
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setenv("DATABASE_PATH", str(path))
+    monkeypatch.setattr(settings, "POTREE_ROOT", "")
+
+    app = FastAPI()
+    app.include_router(public_router)
+    return TestClient(app)
+
+
+def test_output_file_is_served(client):
+    response = client.get("/sqlite/potree_output/m/metadata.json")
+    assert response.status_code == 200
+    assert response.text == "{}"
+
+
+@pytest.mark.parametrize(
+    "file_path",
+    ["/etc/passwd", "%2Fetc%2Fpasswd", "..%2Fsecret.txt", "a//metadata.json"],
+)
+def test_paths_outside_the_output_are_refused(client, file_path):
+    response = client.get(f"/sqlite/potree_output/m/{file_path}")
+    assert response.status_code == 404
@@ -0,0 +1,44 @@
+import pytest
+
+from src.services.range_cache import ByteRangeCache, parse_range
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=95-200", 100) == (95, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    # Several ranges: the whole file is sent
+    assert parse_range("bytes=0-1,5-6", 100) is None
+
+
+@pytest.mark.parametrize(
+    "header", ["bytes=5-2", "bytes=a-b", "bytes=5", "bytes=-", "bytes=-x", "items=0-1"]
+)
+def test_parse_range_ignores_malformed_ranges(header):
+    assert parse_range(header, 100) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=100-200", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 100)
+
+
+def test_byte_range_cache_evicts_least_recently_used(tmp_path):
+    path = tmp_path / "octree.bin"
+    path.write_bytes(bytes(range(100)))
+    cache = ByteRangeCache(max_bytes=20, max_entry=10)
+
+    assert cache.read(str(path), '"a"', 0, 9) == bytes(range(10))
+    cache.read(str(path), '"a"', 10, 19)
+    cache.read(str(path), '"a"', 0, 9)
+    cache.read(str(path), '"a"', 20, 29)
+    # Larger than max_entry: read but not kept
+    cache.read(str(path), '"a"', 0, 49)
+
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["size_bytes"] == 20
+    assert stats["hits"] == 1
+    assert (str(path), '"a"', 10, 19) not in cache._entries
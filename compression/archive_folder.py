@@ -0,0 +1,1487 @@
+#!/usr/bin/env python3
+"""
+LiDAR Folder Archiver
+
+Streams a level-2 LiDAR folder into a compressed tar archive. This is the
+Python counterpart of archive_one_folder.sh: the tar stream is cut into
+independently compressed zstd (or gzip) frames, compressed by a pool of
+threads sized from the container's cgroup CPU quota. A sidecar index maps
+every member to its offset in the tar stream and every frame to its offset
+in the archive, so a single file can be extracted by decompressing only the
+frames that hold it.
+
+Each file is classified by extension and, when unknown, by compressing a
+small sample: already-compressed data (LAZ, JPEG, ZIP...) is stored without
+compression, point cloud text and LAS data gets a higher level.
+
+In delta mode only the files added or modified since the previous archive
+are written, next to the base archive, together with tombstones for the
+deleted files. The split is driven by a per-file manifest stored next to
+the base archive.
+
+The archive is written to <archive>.partial and checkpointed periodically
+at file boundaries; a rerun for the same folder contents resumes from the
+last checkpoint, and the archive is published with an atomic rename.
+
+Files are read ahead by a pool of reader threads (small files into a
+bounded memory budget, posix_fadvise hints for large ones) so that folders
+with many small files on NFS are not bound by per-file open latency; they
+are still written in a deterministic order.
+
+With a part size, full archives are written as numbered parts cut at file
+and frame boundaries: each part can be transferred, decompressed and
+extracted on its own, and the concatenated parts are the single archive.
+
+The SHA-256 of the archive and of every member, and the total input size,
+are computed during the same streaming pass: member checksums go to the
+index and to a sha256sum-compatible <archive>.sha256 sidecar.
+"""
+
+import io
+import os
+import re
+import sys
+import glob
+import gzip
+import json
+import time
+import hashlib
+import zlib
+import logging
+import argparse
+import tarfile
+import threading
+import itertools
+import urllib.error
+import urllib.request
+from stat import S_ISREG
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="[%(asctime)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+    handlers=[logging.StreamHandler(sys.stdout)],
+)
+logger = logging.getLogger("archive_folder.py")
+
+# Archive file extension for each codec
+# (lz4 is only used by benchmark.py: the jobs and the backend read zstd and gzip)
+CODEC_EXTENSIONS = {"zstd": ".tar.zst", "gzip": ".tar.gz", "lz4": ".tar.lz4"}
+# Compression policies assigned to files, and their level for each codec
+# (None stores zstd frames as raw blocks)
+POLICY_STORE = "store"
+POLICY_DEFAULT = "default"
+POLICY_HIGH = "high"
+POLICY_LEVELS = {
+    "zstd": {POLICY_STORE: None, POLICY_DEFAULT: 3, POLICY_HIGH: 9},
+    "gzip": {POLICY_STORE: 0, POLICY_DEFAULT: 6, POLICY_HIGH: 9},
+    "lz4": {POLICY_STORE: 0, POLICY_DEFAULT: 0, POLICY_HIGH: 9},
+}
+# Already-compressed formats, stored as is
+STORE_EXTENSIONS = {
+    ".laz",
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".zip",
+    ".gz",
+    ".tgz",
+    ".zst",
+    ".bz2",
+    ".xz",
+    ".7z",
+    ".rar",
+    ".mp4",
+    ".avi",
+    ".mov",
+}
+# Formats that compress well and are worth a higher level
+HIGH_EXTENSIONS = {".las", ".pcd", ".xyz", ".csv", ".txt", ".ply", ".pts", ".asc"}
+# Sample compressed to classify files with other extensions
+PROBE_SIZE = 64 * 1024
+# Files whose sample shrinks by less than this share are stored
+PROBE_MIN_SAVING = 0.05
+# Size of the chunks copied between pipeline stages
+CHUNK_SIZE = 1024 * 1024
+# Member of a delta archive listing the files deleted since the previous archive
+TOMBSTONE_MEMBER = ".addlidar-tombstones"
+# Default uncompressed size of an independently compressed frame
+FRAME_SIZE = 8 * 1024 * 1024
+# A frame is cut early when the policy changes once it holds this much data
+MIN_FRAME_SIZE = 1024 * 1024
+# zstd frame magic number and maximum size of a raw block
+ZSTD_MAGIC = (0xFD2FB528).to_bytes(4, "little")
+ZSTD_BLOCK_SIZE = 128 * 1024
+# Suffix of the sidecar index written next to each archive
+INDEX_SUFFIX = ".index.json.gz"
+# Suffix of the sidecar listing the SHA-256 of every member
+CHECKSUMS_SUFFIX = ".sha256"
+# Default uncompressed tar bytes between checkpoints of an archive being written
+CHECKPOINT_SIZE = 1024 * 1024 * 1024
+# Default reader threads prefetching files, bound by I/O latency rather than CPUs
+READERS = 8
+# Default memory budget of files read ahead, into memory or into the page
+# cache with a posix_fadvise hint for files larger than PREFETCH_FILE_SIZE
+READ_AHEAD = 64 * 1024 * 1024
+# Largest file read into memory ahead
+PREFETCH_FILE_SIZE = 1024 * 1024
+# Entries looked ahead per reader thread
+PREFETCH_DEPTH = 8
+
+
+def format_size(num_bytes: float) -> str:
+    """Convert bytes to human-readable format"""
+    if num_bytes < 1024:
+        return f"{int(num_bytes)} B"
+    for unit in ("KB", "MB", "GB"):
+        num_bytes /= 1024
+        if num_bytes < 1024 or unit == "GB":
+            break
+    return f"{num_bytes:.2f} {unit}"
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """
+    Read the CPU quota of the current cgroup.
+
+    Returns:
+        Number of CPUs allowed by the quota, or None when unlimited/unknown
+    """
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+
+    # cgroup v1: quota is -1 when unlimited
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+
+    return None
+
+
+def default_threads() -> int:
+    """
+    Number of compression threads that fits the pod's CPU allowance.
+
+    Returns:
+        min(CPU affinity, cgroup quota), at least 1
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        # A 1.5 CPU quota gets 1 thread: extra threads only add throttling
+        cpus = min(cpus, max(1, int(limit)))
+    return max(1, cpus)
+
+
+class ProgressWriter:
+    """
+    Write-through file wrapper counting and hashing the bytes that pass through it.
+
+    Placed in front of the output file, its count is the compressed offset
+    at which the next frame starts. When resuming, it starts from the size
+    and hash of the already written prefix.
+    """
+
+    def __init__(self, fileobj: BinaryIO, start: int = 0, sha256=None):
+        self.fileobj = fileobj
+        self.bytes = start
+        self.sha256 = sha256 or hashlib.sha256()
+
+    def write(self, data) -> int:
+        self.fileobj.write(data)
+        self.sha256.update(data)
+        self.bytes += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        self.fileobj.flush()
+
+
+class ProgressReporter:
+    """
+    Periodically log bytes read, bytes written and the current rate.
+
+    With a url, the same figures are also sent there with PUT, with the
+    files archived so far and an ETA estimated from the average rate, for
+    the backend's job progress table. A failed report is only logged.
+    """
+
+    def __init__(
+        self,
+        tar_bytes,
+        out_bytes: ProgressWriter,
+        interval: float,
+        url: Optional[str] = None,
+        bytes_total: Optional[int] = None,
+        members_total: Optional[int] = None,
+    ):
+        self.tar_bytes = tar_bytes
+        self.out_bytes = out_bytes
+        self.interval = interval
+        self.url = url
+        self.bytes_total = bytes_total
+        self.members_total = members_total
+        self.members_done = 0
+        self.start = time.monotonic()
+        # Resumed archives start with bytes already written
+        self.start_bytes = tar_bytes.bytes
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "ProgressReporter":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        if self.url and exc_type is None:
+            # Final figures, so that a finished archive reports all its entries
+            read = self.tar_bytes.bytes
+            elapsed = max(time.monotonic() - self.start, 1e-6)
+            self._send(read, (read - self.start_bytes) / elapsed)
+
+    def _send(self, read: int, average: float) -> None:
+        eta = None
+        if self.bytes_total is not None and average > 0:
+            eta = round(max(0, self.bytes_total - read) / average)
+        body = {
+            "pod": os.environ.get("HOSTNAME"),
+            "bytes_read": read,
+            "bytes_written": self.out_bytes.bytes,
+            "bytes_total": self.bytes_total,
+            "members_done": self.members_done,
+            "members_total": self.members_total,
+            "eta_seconds": eta,
+        }
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="PUT",
+        )
+        try:
+            urllib.request.urlopen(request, timeout=10).close()
+        except (urllib.error.URLError, OSError) as e:
+            logger.warning(f"Could not report progress to {self.url}: {e}")
+
+    def _run(self) -> None:
+        start_bytes = self.start_bytes
+        last_time, last_bytes = self.start, start_bytes
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            read = self.tar_bytes.bytes
+            rate = (read - last_bytes) / (now - last_time)
+            average = (read - start_bytes) / (now - self.start)
+            logger.info(
+                f"Progress: read {format_size(read)}, wrote "
+                f"{format_size(self.out_bytes.bytes)}, "
+                f"{format_size(rate)}/s (avg {format_size(average)}/s)"
+            )
+            if self.url:
+                self._send(read, average)
+            last_time, last_bytes = now, read
+
+
+class PartWriter:
+    """
+    File-like object writing the archive to a single file or to numbered parts.
+
+    With a part_size, next_part is called between tar entries, once the
+    frames before it are written, whenever the current part holds at least
+    part_size bytes: parts hold whole files and whole frames.
+    """
+
+    def __init__(
+        self,
+        path: Callable[[int], str],
+        part_size: int,
+        resume: Optional[Dict[str, Any]] = None,
+        part_sha256=None,
+    ):
+        # Part number (from 0) -> path of its partial file
+        self.path = path
+        self.part_size = part_size
+        # [size, sha256] of every completed part
+        self.parts: List[List[Any]] = (
+            [list(part) for part in resume["parts"]] if resume else []
+        )
+        self.size = resume["part_offset"] if resume else 0
+        # A single archive is already hashed by ProgressWriter
+        self.sha256 = (part_sha256 or hashlib.sha256()) if part_size else None
+        self.fileobj = open(self.path(len(self.parts)), "r+b" if resume else "wb")
+        self.fileobj.seek(self.size)
+
+    def write(self, data) -> int:
+        self.fileobj.write(data)
+        if self.sha256 is not None:
+            self.sha256.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        self.fileobj.flush()
+
+    def fileno(self) -> int:
+        return self.fileobj.fileno()
+
+    def full(self) -> bool:
+        return self.part_size > 0 and self.size >= self.part_size
+
+    def next_part(self) -> None:
+        self.close()
+        self.parts.append([self.size, self.sha256.hexdigest()])
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        self.fileobj = open(self.path(len(self.parts)), "wb")
+        logger.info(f"Starting part {len(self.parts) + 1}")
+
+    def close(self) -> None:
+        if not self.fileobj.closed:
+            self.fileobj.flush()
+            os.fsync(self.fileobj.fileno())
+            self.fileobj.close()
+
+    def finish(self) -> List[List[Any]]:
+        """Close the last part and return the [size, sha256] of every part"""
+        self.close()
+        digest = self.sha256.hexdigest() if self.sha256 is not None else None
+        return self.parts + [[self.size, digest]]
+
+
+def archive_stem(output_file: str) -> str:
+    """Archive path without its codec extension, e.g. /zips/M/F1"""
+    for extension in CODEC_EXTENSIONS.values():
+        if output_file.endswith(extension):
+            return output_file[: -len(extension)]
+    return os.path.splitext(output_file)[0]
+
+
+def part_path(archive_file: str, number: int) -> str:
+    """Part (numbered from 1) of a multi-part archive, e.g. /zips/M/F1.part-0001.tar.zst"""
+    stem = archive_stem(archive_file)
+    return f"{stem}.part-{number:04d}{archive_file[len(stem):]}"
+
+
+def existing_parts(archive_file: str, suffix: str = "") -> List[str]:
+    """Parts of a multi-part archive found on disk (with suffix, e.g. .partial), in order"""
+    stem = archive_stem(archive_file)
+    extension = archive_file[len(stem) :] + suffix
+    pattern = re.compile(
+        re.escape(os.path.basename(stem)) + r"\.part-\d+" + re.escape(extension) + "$"
+    )
+    return sorted(
+        path
+        for path in glob.glob(glob.escape(stem) + ".part-*")
+        if pattern.match(os.path.basename(path))
+    )
+
+
+def archive_exists(archive_file: str) -> bool:
+    """Whether an archive exists, as a single file or as parts listed by its index"""
+    return os.path.exists(archive_file) or os.path.exists(index_path(archive_file))
+
+
+def manifest_path(output_file: str) -> str:
+    """Per-file manifest stored next to the base archive"""
+    return archive_stem(output_file) + ".manifest.gz"
+
+
+def delta_paths(output_file: str) -> List[Tuple[int, str]]:
+    """Existing delta archives of a base archive (any codec) as sorted (seq, path)"""
+    stem = archive_stem(output_file)
+    extensions = "|".join(re.escape(ext) for ext in CODEC_EXTENSIONS.values())
+    pattern = re.compile(
+        re.escape(os.path.basename(stem)) + rf"\.delta-(\d+)(?:{extensions})$"
+    )
+    deltas = []
+    for path in glob.glob(glob.escape(stem) + ".delta-*"):
+        match = pattern.match(os.path.basename(path))
+        if match:
+            deltas.append((int(match.group(1)), path))
+    return sorted(deltas)
+
+
+def scan_folder(source_folder: str) -> Tuple[Dict[str, Tuple[int, float]], int]:
+    """
+    List the files of a folder, with an lstat of each.
+
+    This walk is a metadata pass over the whole folder, as costly as a `du`:
+    its listing drives deltas, the manifest and the checkpoint fingerprint,
+    and is also what the progress totals are taken from.
+
+    Returns:
+        Tuple of (relative path -> (size_bytes, mod_time) of every
+        non-directory entry, number of entries tar_entries yields for the
+        folder, directories and symlinks to directories included)
+    """
+    entries = {}
+    entry_count = 1
+    for root, dirs, files in os.walk(source_folder):
+        # Symlinks to directories are listed in dirs but not walked, and
+        # tar_entries yields them without descending either
+        entry_count += len(dirs) + len(files)
+        for name in files:
+            path = os.path.join(root, name)
+            st = os.lstat(path)
+            entries[os.path.relpath(path, source_folder)] = (st.st_size, st.st_mtime)
+    return entries, entry_count
+
+
+def folder_fingerprint(entries: Dict[str, Tuple[int, float]]) -> str:
+    """Hash of a folder listing, identifying the contents a checkpoint was taken for"""
+    digest = hashlib.sha256()
+    for rel_path in sorted(entries):
+        size, mtime = entries[rel_path]
+        digest.update(
+            f"{rel_path}\t{size}\t{mtime}\n".encode("utf-8", "surrogateescape")
+        )
+    return digest.hexdigest()
+
+
+def read_manifest(path: str) -> Dict[str, Tuple[int, float]]:
+    """Load a manifest written by write_manifest"""
+    with gzip.open(path, "rt", encoding="utf-8", errors="surrogateescape") as f:
+        entries = {}
+        for line in f:
+            # Split from the right so tabs inside file names are kept
+            rel_path, size, mtime = line.rstrip("\n").rsplit("\t", 2)
+            entries[rel_path] = (int(size), float(mtime))
+    return entries
+
+
+def write_manifest(path: str, entries: Dict[str, Tuple[int, float]]) -> None:
+    """
+    Atomically write a manifest: one tab separated "path, size, mtime" line
+    per file, the same format as the scanner's folder manifests.
+    """
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", errors="surrogateescape") as f:
+        for rel_path in sorted(entries):
+            size, mtime = entries[rel_path]
+            f.write(f"{rel_path}\t{size}\t{mtime}\n")
+    os.replace(tmp_path, path)
+
+
+def classify_member(tarinfo: tarfile.TarInfo, fileobj) -> str:
+    """
+    Pick the compression policy of a file.
+
+    Known extensions decide directly; other files larger than PROBE_SIZE are
+    probed by compressing a sample from their middle with fast deflate.
+
+    Returns:
+        POLICY_STORE, POLICY_DEFAULT or POLICY_HIGH
+    """
+    extension = os.path.splitext(tarinfo.name)[1].lower()
+    if extension in STORE_EXTENSIONS:
+        return POLICY_STORE
+    if extension in HIGH_EXTENSIONS:
+        return POLICY_HIGH
+    if fileobj is None or tarinfo.size < PROBE_SIZE:
+        return POLICY_DEFAULT
+
+    position = fileobj.tell()
+    fileobj.seek((tarinfo.size - PROBE_SIZE) // 2)
+    sample = fileobj.read(PROBE_SIZE)
+    fileobj.seek(position)
+    saving = 1 - len(zlib.compress(sample, 1)) / max(len(sample), 1)
+    return POLICY_STORE if saving < PROBE_MIN_SAVING else POLICY_DEFAULT
+
+
+class HashingReader:
+    """Read-through file wrapper hashing the bytes read from it"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.fileobj.read(size)
+        self.sha256.update(data)
+        return data
+
+
+class IndexingTarFile(tarfile.TarFile):
+    """
+    TarFile recording where the data of each regular file starts in the tar
+    stream, and its SHA-256 computed while it is copied.
+    """
+
+    def __init__(self, *args, member_index=None, inodes=None, **kwargs):
+        # (member name, offset of its data in the uncompressed tar stream, size, sha256)
+        self.member_index: List[Tuple[str, int, int, str]] = [
+            tuple(member) for member in member_index or []
+        ]
+        super().__init__(*args, **kwargs)
+        # Files already written, by (inode, device): later hard links to them
+        # are stored as links, also after resuming
+        for ino, dev, name in inodes or []:
+            self.inodes[(ino, dev)] = name
+
+    def addfile(self, tarinfo, fileobj=None) -> None:
+        if tarinfo.isreg() and hasattr(self.fileobj, "set_policy"):
+            self.fileobj.set_policy(classify_member(tarinfo, fileobj))
+        reader = HashingReader(fileobj) if fileobj is not None else None
+        super().addfile(tarinfo, reader)
+        if tarinfo.isreg():
+            # The data sits right before the offset, padded to a 512-byte block
+            padded = -(-tarinfo.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+            sha256 = (reader.sha256 if reader else hashlib.sha256()).hexdigest()
+            self.member_index.append(
+                (tarinfo.name, self.offset - padded, tarinfo.size, sha256)
+            )
+
+
+def tar_entries(
+    source_folder: str, members: Optional[List[str]] = None
+) -> Iterator[Tuple[str, str]]:
+    """
+    List the (path, arcname) pairs to archive, in a deterministic order.
+
+    Without members this is the order of `tar.add(source_folder)`: each
+    directory followed by its sorted children, symlinks not followed. Members
+    are named like `tar -C <parent> <folder>` would name them, so archives
+    are interchangeable with the ones of archive_one_folder.sh.
+
+    Args:
+        source_folder: Folder to archive
+        members: Relative paths to archive, the whole folder when None
+    """
+    folder_name = os.path.basename(source_folder.rstrip("/"))
+    if members is not None:
+        for rel_path in members:
+            yield os.path.join(source_folder, rel_path), f"{folder_name}/{rel_path}"
+        return
+
+    stack = [(source_folder, folder_name)]
+    while stack:
+        path, arcname = stack.pop()
+        yield path, arcname
+        if os.path.isdir(path) and not os.path.islink(path):
+            children = sorted(os.listdir(path), reverse=True)
+            stack.extend(
+                (os.path.join(path, name), f"{arcname}/{name}") for name in children
+            )
+
+
+def fadvise(fd: int, offset: int, length: int, advice_name: str) -> None:
+    """posix_fadvise hint, ignored where unsupported"""
+    advice = getattr(os, advice_name, None)
+    if advice is None or not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, offset, length, advice)
+    except OSError:
+        pass
+
+
+class Prefetcher:
+    """
+    Read tar entries ahead with a pool of threads, yielding them in order.
+
+    For each upcoming entry a reader thread runs lstat (warming the NFS
+    attribute cache) and, for regular files, opens the file: files up to
+    PREFETCH_FILE_SIZE are read into memory while the read-ahead budget
+    allows, larger ones are returned open with a WILLNEED hint so the kernel
+    starts reading them. The pages a hint asks for, up to a reader's share of
+    the budget, are reserved from the same budget until the file is archived,
+    and the hint is skipped when the budget is spent. The budget is reserved
+    without blocking, so a reader never waits on memory held by entries
+    after its own.
+    """
+
+    def __init__(self, readers: int, read_ahead: int):
+        self.readers = readers
+        self.read_ahead = read_ahead
+        self._budget = read_ahead
+        self._lock = threading.Lock()
+
+    def _reserve(self, size: int) -> bool:
+        with self._lock:
+            if size > self._budget:
+                return False
+            self._budget -= size
+            return True
+
+    def _release(self, size: int) -> None:
+        with self._lock:
+            self._budget += size
+
+    def _read(self, path: str):
+        """Prefetch one entry: None, the file contents, or (open file, bytes reserved)"""
+        st = os.lstat(path)
+        if not S_ISREG(st.st_mode):
+            return None
+        f = open(path, "rb")
+        try:
+            if st.st_size <= PREFETCH_FILE_SIZE and self._reserve(st.st_size):
+                try:
+                    data = f.read()
+                except BaseException:
+                    self._release(st.st_size)
+                    raise
+                fadvise(f.fileno(), 0, 0, "POSIX_FADV_DONTNEED")
+                self._release(st.st_size - len(data))
+                f.close()
+                return data
+            fadvise(f.fileno(), 0, 0, "POSIX_FADV_SEQUENTIAL")
+            hint = min(st.st_size, self.read_ahead // max(self.readers, 1))
+            if not self._reserve(hint):
+                return f, 0
+            fadvise(f.fileno(), 0, hint, "POSIX_FADV_WILLNEED")
+            return f, hint
+        except BaseException:
+            f.close()
+            raise
+
+    def _result(self, future):
+        """Result of a prefetch, None when it failed (tar reports the error)"""
+        try:
+            return future.result()
+        except OSError:
+            return None
+
+    def iterate(self, entries: Iterator[Tuple[str, str]]):
+        """Yield (path, arcname, prefetched) in the order of entries"""
+        if self.readers <= 0:
+            for path, arcname in entries:
+                yield path, arcname, None
+            return
+
+        pool = ThreadPoolExecutor(max_workers=self.readers)
+        pending: deque = deque()
+        try:
+            for path, arcname in entries:
+                pending.append((path, arcname, pool.submit(self._read, path)))
+                if len(pending) >= self.readers * PREFETCH_DEPTH:
+                    path, arcname, future = pending.popleft()
+                    yield path, arcname, self._result(future)
+            while pending:
+                path, arcname, future = pending.popleft()
+                yield path, arcname, self._result(future)
+        finally:
+            for _, _, future in pending:
+                if not future.cancel():
+                    self.discard(self._result(future))
+            pool.shutdown(wait=False)
+
+    def open(self, path: str, size: int, prefetched) -> BinaryIO:
+        """File object of a regular file, from its prefetched state when usable"""
+        if isinstance(prefetched, bytes):
+            self._release(len(prefetched))
+            # The file changed since it was read: read it again
+            if len(prefetched) == size:
+                return io.BytesIO(prefetched)
+        elif prefetched is not None:
+            f, reserved = prefetched
+            # Its read-ahead pages are consumed as the file is archived
+            self._release(reserved)
+            return f
+        return open(path, "rb")
+
+    def discard(self, prefetched) -> None:
+        """Free a prefetched entry that is not used"""
+        if isinstance(prefetched, bytes):
+            self._release(len(prefetched))
+        elif prefetched is not None:
+            f, reserved = prefetched
+            self._release(reserved)
+            f.close()
+
+
+def write_tar(
+    entries: Iterator[Tuple[str, str]],
+    fileobj,
+    tombstones: Optional[List[str]] = None,
+    start: int = 0,
+    member_index: Optional[List[Tuple[str, int, int, str]]] = None,
+    on_member: Optional[Callable[[int, IndexingTarFile], None]] = None,
+    prefetcher: Optional[Prefetcher] = None,
+    inodes: Optional[List[Tuple[int, int, str]]] = None,
+) -> List[Tuple[str, int, int, str]]:
+    """
+    Write a tar of entries into fileobj.
+
+    Args:
+        entries: (path, arcname) pairs as returned by tar_entries
+        fileobj: Writable file object receiving the tar stream
+        tombstones: Relative paths of deleted files, stored as TOMBSTONE_MEMBER
+        start: Number of entries already written by a previous, resumed run
+        member_index: Member index of those entries
+        on_member: Called with the number of complete entries and the tar
+            file before each entry is written (checkpoints)
+        prefetcher: Reads entries ahead, entries are read in turn when None
+        inodes: (inode, device, name) of the files among those entries
+
+    Returns:
+        (name, data offset, size, sha256) of every regular file written
+    """
+    # Not a "w|" stream: its internal buffer would delay the policy switches
+    with IndexingTarFile.open(
+        fileobj=fileobj,
+        mode="w",
+        bufsize=CHUNK_SIZE,
+        member_index=member_index,
+        inodes=inodes,
+    ) as tar:
+        prefetcher = prefetcher or Prefetcher(0, 0)
+        prefetched_entries = prefetcher.iterate(itertools.islice(entries, start, None))
+        for position, (path, arcname, prefetched) in enumerate(
+            prefetched_entries, start
+        ):
+            if on_member is not None:
+                on_member(position, tar)
+            # What tar.add(path, arcname, recursive=False) does, reading ahead
+            tarinfo = tar.gettarinfo(path, arcname)
+            if tarinfo is None:
+                logger.warning(f"Skipping unsupported file type: {path}")
+                continue
+            if tarinfo.isreg():
+                with prefetcher.open(path, tarinfo.size, prefetched) as f:
+                    tar.addfile(tarinfo, f)
+                    if not isinstance(f, io.BytesIO):
+                        # Archived data is not read again
+                        fadvise(f.fileno(), 0, 0, "POSIX_FADV_DONTNEED")
+            else:
+                prefetcher.discard(prefetched)
+                tar.addfile(tarinfo)
+        if tombstones is not None:
+            data = "".join(f"{rel_path}\n" for rel_path in tombstones).encode(
+                "utf-8", "surrogateescape"
+            )
+            info = tarfile.TarInfo(TOMBSTONE_MEMBER)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(data))
+    return tar.member_index
+
+
+class FrameWriter:
+    """
+    File-like object cutting the tar stream into independently compressed frames.
+
+    Frames of frame_size uncompressed bytes are compressed by a thread pool
+    (zstd and zlib release the GIL while compressing) and written to out in
+    order. Concatenated frames form a regular .tar.zst / .tar.gz stream.
+
+    A frame is compressed with the policy that contributed most of its bytes;
+    when the policy changes, the current frame is cut early if it already
+    holds MIN_FRAME_SIZE bytes, so large stored and compressed files do not
+    share frames.
+    """
+
+    def __init__(
+        self,
+        out: ProgressWriter,
+        compress: Callable[[bytes, str], bytes],
+        threads: int,
+        frame_size: int,
+        resume: Optional[Dict[str, Any]] = None,
+    ):
+        self.out = out
+        self.compress = compress
+        self.frame_size = frame_size
+        # Uncompressed bytes written so far, including those of a resumed run
+        self.bytes = resume["tar_offset"] if resume else 0
+        # (uncompressed offset, uncompressed size, compressed offset, compressed size)
+        self.frames: List[Tuple[int, int, int, int]] = (
+            [tuple(frame) for frame in resume["frames"]] if resume else []
+        )
+        # policy -> [uncompressed bytes, compressed bytes]
+        self.policy_stats: Dict[str, List[int]] = (
+            resume["policy_stats"] if resume else {}
+        )
+        self.policy = POLICY_DEFAULT
+        self._buffer = bytearray()
+        self._buffer_policies: Dict[str, int] = {}
+        self._submitted = self.bytes
+        self._pending: deque = deque()
+        # Bound the frames held in memory while the output catches up
+        self._max_pending = 2 * threads
+        self._pool = ThreadPoolExecutor(max_workers=threads)
+
+    def set_policy(self, policy: str) -> None:
+        """Compression policy of the bytes written from now on"""
+        if policy != self.policy and len(self._buffer) >= MIN_FRAME_SIZE:
+            self._cut()
+        self.policy = policy
+
+    def write(self, data) -> int:
+        view = memoryview(data)
+        while view:
+            chunk = view[: self.frame_size - len(self._buffer)]
+            self._buffer += chunk
+            self._buffer_policies[self.policy] = self._buffer_policies.get(
+                self.policy, 0
+            ) + len(chunk)
+            view = view[len(chunk) :]
+            if len(self._buffer) >= self.frame_size:
+                self._cut()
+        self.bytes += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.bytes
+
+    def flush(self) -> None:
+        pass
+
+    def _cut(self) -> None:
+        policy = max(self._buffer_policies, key=self._buffer_policies.get)
+        frame = bytes(self._buffer)
+        self._buffer.clear()
+        self._buffer_policies.clear()
+
+        future = self._pool.submit(self.compress, frame, policy)
+        self._pending.append((self._submitted, len(frame), policy, future))
+        self._submitted += len(frame)
+        while len(self._pending) > self._max_pending:
+            self._write_next()
+
+    def _write_next(self) -> None:
+        offset, size, policy, future = self._pending.popleft()
+        data = future.result()
+        self.frames.append((offset, size, self.out.bytes, len(data)))
+        self.out.write(data)
+        stats = self.policy_stats.setdefault(policy, [0, 0])
+        stats[0] += size
+        stats[1] += len(data)
+
+    def drain(self) -> None:
+        """Compress the current partial frame and wait for all frames to be written"""
+        if self._buffer:
+            self._cut()
+        while self._pending:
+            self._write_next()
+
+    def close(self) -> None:
+        try:
+            self.drain()
+        finally:
+            self._pool.shutdown(cancel_futures=True)
+
+
+def zstd_raw_frame(data: bytes) -> bytes:
+    """
+    Wrap data into a zstd frame made of raw (stored) blocks.
+
+    Frame header: single segment with an 8-byte content size, no checksum.
+    """
+    parts = [ZSTD_MAGIC, bytes([0xE0]), len(data).to_bytes(8, "little")]
+    for start in range(0, max(len(data), 1), ZSTD_BLOCK_SIZE):
+        block = data[start : start + ZSTD_BLOCK_SIZE]
+        last = start + ZSTD_BLOCK_SIZE >= len(data)
+        # Block header: last-block bit, block type 0 (raw), block size
+        parts.append(((len(block) << 3) | last).to_bytes(3, "little"))
+        parts.append(block)
+    return b"".join(parts)
+
+
+def zstd_compressor(levels: Dict[str, Optional[int]]) -> Callable[[bytes, str], bytes]:
+    """Compress one frame into a standalone zstd frame at the level of its policy"""
+    if zstandard is None:
+        raise RuntimeError("python zstandard module is not installed")
+    # ZstdCompressor objects must not be shared between threads
+    local = threading.local()
+
+    def compress(frame: bytes, policy: str) -> bytes:
+        level = levels[policy]
+        if level is None:
+            return zstd_raw_frame(frame)
+        if not hasattr(local, "compressors"):
+            local.compressors = {}
+        if level not in local.compressors:
+            local.compressors[level] = zstandard.ZstdCompressor(level=level)
+        return local.compressors[level].compress(frame)
+
+    return compress
+
+
+def gzip_compressor(levels: Dict[str, Optional[int]]) -> Callable[[bytes, str], bytes]:
+    """Compress one frame into a standalone gzip member at the level of its policy"""
+
+    def compress(frame: bytes, policy: str) -> bytes:
+        compressor = zlib.compressobj(levels[policy], zlib.DEFLATED, 31)
+        return compressor.compress(frame) + compressor.flush()
+
+    return compress
+
+
+def lz4_compressor(levels: Dict[str, Optional[int]]) -> Callable[[bytes, str], bytes]:
+    """Compress one frame into a standalone lz4 frame at the level of its policy"""
+    if lz4 is None:
+        raise RuntimeError("python lz4 module is not installed")
+
+    def compress(frame: bytes, policy: str) -> bytes:
+        return lz4.frame.compress(frame, compression_level=levels[policy])
+
+    return compress
+
+
+# Frame compressors selectable with --codec
+COMPRESSORS = {"zstd": zstd_compressor, "gzip": gzip_compressor, "lz4": lz4_compressor}
+
+
+def policy_summary(policy_stats: Dict[str, List[int]]) -> str:
+    """Share of the input handled by each policy, e.g. store 71% / default 29%"""
+    total = sum(stats[0] for stats in policy_stats.values()) or 1
+    return " / ".join(
+        f"{policy} {stats[0] * 100 / total:.0f}%"
+        for policy, stats in sorted(policy_stats.items(), key=lambda item: -item[1][0])
+    )
+
+
+class Checkpointer:
+    """
+    Periodically save the state of an archive being written.
+
+    Called before each tar entry: once size uncompressed bytes have been
+    written since the previous checkpoint, the current frame is cut, all
+    frames are flushed to disk and the offsets, frames, member index and
+    hard link map are saved with the hash of the written prefix.
+    Checkpoints therefore always sit on a frame and tar entry boundary, at
+    positions that only depend on the tar stream, so a resumed run cuts the
+    same frames as an uninterrupted one.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        run: Dict[str, Any],
+        size: int,
+        frames: FrameWriter,
+        out: ProgressWriter,
+    ):
+        self.path = path
+        self.run = run
+        self.size = size
+        self.frames = frames
+        self.out = out
+        self.next = frames.bytes + size
+
+    def __call__(self, members_done: int, tar: IndexingTarFile) -> None:
+        if self.frames.bytes < self.next:
+            return
+        self.frames.drain()
+        self.out.flush()
+        os.fsync(self.out.fileobj.fileno())
+        state = {
+            "run": self.run,
+            "members_done": members_done,
+            "tar_offset": self.frames.bytes,
+            "compressed_offset": self.out.bytes,
+            "sha256": self.out.sha256.hexdigest(),
+            "parts": self.out.fileobj.parts,
+            "part_offset": self.out.fileobj.size,
+            "frames": self.frames.frames,
+            "policy_stats": self.frames.policy_stats,
+            "member_index": tar.member_index,
+            "inodes": [[ino, dev, name] for (ino, dev), name in tar.inodes.items()],
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.next = self.frames.bytes + self.size
+        logger.info(
+            f"Checkpoint: {members_done} entries, "
+            f"{format_size(self.out.bytes)} compressed"
+        )
+
+
+def load_checkpoint(
+    path: str, partial_path: Callable[[int], str], run: Dict[str, Any]
+) -> Optional[Tuple[Dict[str, Any], Any, Any]]:
+    """
+    Load the checkpoint of an interrupted run, if it can be resumed.
+
+    The checkpoint must have been taken for the same folder contents and
+    archive settings. The current partial file is truncated to the
+    checkpointed size and the written files are re-hashed (hash states
+    cannot be saved), which also checks that they were not damaged.
+
+    Returns:
+        (checkpoint state, sha256 hasher of the archive so far, sha256 hasher
+        of the current part), or None
+    """
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("run") != run:
+        logger.info("Checkpoint was taken for other folder contents, starting over")
+        return None
+
+    sha256 = hashlib.sha256()
+    try:
+        for number, (size, digest) in enumerate(state["parts"]):
+            part_sha256 = hashlib.sha256()
+            with open(partial_path(number), "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    sha256.update(chunk)
+                    part_sha256.update(chunk)
+            if part_sha256.hexdigest() != digest:
+                logger.info(
+                    f"Part {number + 1} does not match its checkpoint, starting over"
+                )
+                return None
+
+        current = partial_path(len(state["parts"]))
+        offset = state["part_offset"]
+        if os.path.getsize(current) < offset:
+            logger.info("Partial archive is shorter than its checkpoint, starting over")
+            return None
+        part_sha256 = hashlib.sha256()
+        with open(current, "r+b") as f:
+            f.truncate(offset)
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                sha256.update(chunk)
+                part_sha256.update(chunk)
+    except OSError:
+        return None
+    if sha256.hexdigest() != state["sha256"]:
+        logger.info("Partial archive does not match its checkpoint, starting over")
+        return None
+    return state, sha256, part_sha256
+
+
+def index_path(archive_file: str) -> str:
+    """Sidecar index of an archive"""
+    return archive_file + INDEX_SUFFIX
+
+
+def write_index(
+    path: str,
+    codec: str,
+    frames: List[Tuple[int, int, int, int]],
+    members: List[Tuple[str, int, int, str]],
+    parts: Optional[List[Tuple[str, int, int, str]]] = None,
+) -> None:
+    """
+    Atomically write the sidecar index of an archive.
+
+    frames: [uncompressed offset, uncompressed size, compressed offset,
+    compressed size] of every frame; members: [name, data offset in the
+    uncompressed tar stream, size, sha256] of every regular file; parts:
+    [file name, compressed offset, size, sha256] of every part of a
+    multi-part archive, compressed offsets counting across parts.
+    """
+    index = {"version": 2, "codec": codec, "frames": frames, "members": members}
+    if parts:
+        index["parts"] = parts
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", errors="surrogateescape") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def checksums_path(archive_file: str) -> str:
+    """Sidecar listing the SHA-256 of every member of an archive"""
+    return archive_file + CHECKSUMS_SUFFIX
+
+
+def write_checksums(path: str, members: List[Tuple[str, int, int, str]]) -> None:
+    """
+    Atomically write member checksums in sha256sum format, so an extracted
+    archive can be checked with `sha256sum -c` from the extraction directory.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", errors="surrogateescape") as f:
+        for name, _, _, sha256 in members:
+            if name != TOMBSTONE_MEMBER:
+                f.write(f"{sha256}  {name}\n")
+    os.replace(tmp_path, path)
+
+
+def remove_archive(archive_file: str) -> None:
+    """Delete an archive or its parts, its sidecars and any interrupted attempt"""
+    for path in [
+        archive_file,
+        index_path(archive_file),
+        checksums_path(archive_file),
+        archive_file + ".partial",
+        archive_file + ".checkpoint.json",
+        *existing_parts(archive_file),
+        *existing_parts(archive_file, ".partial"),
+    ]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def main() -> None:
+    """
+    Main function: archive one folder and log a summary.
+    """
+    parser = argparse.ArgumentParser(description="LiDAR Folder Archiver")
+    parser.add_argument("source_folder", help="Folder to archive")
+    parser.add_argument("output_file", help="Base archive to create or extend")
+    parser.add_argument(
+        "--codec",
+        choices=sorted(COMPRESSORS),
+        default="zstd",
+        help="Compression codec (default: zstd; lz4 archives are for benchmarks only)",
+    )
+    parser.add_argument(
+        "--level",
+        type=int,
+        default=None,
+        help="Compression level of ordinary files "
+        "(default: 3 for zstd, 6 for gzip, 0 for lz4)",
+    )
+    parser.add_argument(
+        "--policy",
+        choices=["content", "uniform"],
+        default="content",
+        help="content: store already-compressed files and use a higher level for "
+        "LAS/PCD/XYZ/CSV; uniform: one level for everything (default: content)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="Compression threads (default: sized from the cgroup CPU quota)",
+    )
+    parser.add_argument(
+        "--readers",
+        type=int,
+        default=READERS,
+        help=f"Threads reading files ahead, 0 to read them in turn (default: {READERS})",
+    )
+    parser.add_argument(
+        "--read-ahead",
+        type=int,
+        default=READ_AHEAD // (1024 * 1024),
+        help="Memory budget of small files read ahead, in MB (default: 64)",
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=30.0,
+        help="Seconds between progress log lines (default: 30)",
+    )
+    parser.add_argument(
+        "--progress-url",
+        default=None,
+        help="Also PUT progress, with an ETA, to this URL every progress interval",
+    )
+    parser.add_argument(
+        "--frame-size",
+        type=int,
+        default=FRAME_SIZE // (1024 * 1024),
+        help="Uncompressed size of each independently compressed frame, in MB "
+        "(default: 8); smaller frames make single-file extraction cheaper",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["full", "delta"],
+        default="full",
+        help="full: rewrite the base archive and drop its deltas; delta: archive "
+        "only the changes since the manifest, next to the base (default: full)",
+    )
+    parser.add_argument(
+        "--part-size",
+        type=int,
+        default=0,
+        help="Split full archives into parts of about this many MB, cut at file "
+        "boundaries (default: 0, a single file)",
+    )
+    parser.add_argument(
+        "--result-file",
+        default=None,
+        help="Write a JSON summary of the created archive to this file",
+    )
+    parser.add_argument(
+        "--checkpoint-size",
+        type=int,
+        default=CHECKPOINT_SIZE // (1024 * 1024),
+        help="Uncompressed MB between checkpoints an interrupted run resumes "
+        f"from (default: {CHECKPOINT_SIZE // (1024 * 1024)})",
+    )
+    args = parser.parse_args()
+
+    source_folder = args.source_folder
+    output_file = args.output_file
+    levels = dict(POLICY_LEVELS[args.codec])
+    if args.level is not None:
+        levels[POLICY_DEFAULT] = args.level
+    if args.policy == "uniform":
+        levels = {policy: levels[POLICY_DEFAULT] for policy in levels}
+    threads = args.threads or default_threads()
+    mode = args.mode
+
+    logger.info("Script started")
+    logger.info(f"Source folder: {source_folder}")
+    logger.info(f"Output file: {output_file}")
+    logger.info(
+        f"Using {args.codec} ({args.policy} policy, levels {levels}) with {threads} compression threads "
+        f"(cgroup CPU limit: {cgroup_cpu_limit() or 'none'})"
+    )
+    logger.info(
+        f"Reading ahead with {args.readers} threads, {args.read_ahead} MB budget"
+    )
+
+    if not os.path.isdir(source_folder):
+        logger.error(f"❌ ERROR: Source folder not found: {source_folder}")
+        sys.exit(1)
+
+    # Create output directory if it doesn't exist
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+
+    manifest_file = manifest_path(output_file)
+    current, entry_count = scan_folder(source_folder)
+
+    if mode == "delta" and not (
+        archive_exists(output_file) and os.path.exists(manifest_file)
+    ):
+        logger.info("No base archive with a manifest found, creating a full archive")
+        mode = "full"
+
+    if mode == "full":
+        seq = 0
+        archive_file = output_file
+        members: Optional[List[str]] = None
+        tombstones: Optional[List[str]] = None
+    else:
+        if args.part_size:
+            logger.info("Delta archives are written as a single file")
+        previous = read_manifest(manifest_file)
+        members = sorted(
+            rel_path
+            for rel_path, stat in current.items()
+            if previous.get(rel_path) != stat
+        )
+        tombstones = sorted(set(previous) - set(current))
+        deltas = delta_paths(output_file)
+        seq = deltas[-1][0] + 1 if deltas else 1
+        archive_file = (
+            f"{archive_stem(output_file)}.delta-{seq:04d}"
+            f"{CODEC_EXTENSIONS[args.codec]}"
+        )
+        logger.info(
+            f"Delta {seq} against {len(deltas)} previous deltas: {len(members)} "
+            f"added or modified files, {len(tombstones)} deleted files"
+        )
+
+    # The existing archive stays in place until the new one is complete
+    part_size = args.part_size * 1024 * 1024 if mode == "full" else 0
+    checkpoint_file = archive_file + ".checkpoint.json"
+
+    def partial_path(number: int) -> str:
+        if part_size:
+            return part_path(archive_file, number + 1) + ".partial"
+        return archive_file + ".partial"
+
+    run = {
+        "fingerprint": folder_fingerprint(current),
+        "mode": mode,
+        "seq": seq,
+        "codec": args.codec,
+        "levels": levels,
+        "frame_size": args.frame_size,
+        "part_size": part_size,
+    }
+    resumed = load_checkpoint(checkpoint_file, partial_path, run)
+    if resumed is None:
+        stale = [archive_file + ".partial", checkpoint_file]
+        for path in stale + existing_parts(archive_file, ".partial"):
+            if os.path.exists(path):
+                os.remove(path)
+        state, sha256, part_sha256 = None, None, None
+        members_done, prefix_size = 0, 0
+    else:
+        state, sha256, part_sha256 = resumed
+        members_done, prefix_size = state["members_done"], state["compressed_offset"]
+        logger.info(
+            f"Resuming from checkpoint: {members_done} entries, "
+            f"{format_size(prefix_size)} already written"
+        )
+
+    start_time = time.monotonic()
+    try:
+        compress = COMPRESSORS[args.codec](levels)
+        writer = PartWriter(
+            partial_path, part_size, resume=state, part_sha256=part_sha256
+        )
+        try:
+            out = ProgressWriter(writer, prefix_size, sha256)
+            tar_bytes = FrameWriter(
+                out, compress, threads, args.frame_size * 1024 * 1024, resume=state
+            )
+            checkpointer = Checkpointer(
+                checkpoint_file,
+                run,
+                args.checkpoint_size * 1024 * 1024,
+                tar_bytes,
+                out,
+            )
+
+            archived = current if members is None else members
+            # Progress counts tar entries, the unit of positions and checkpoints
+            reporter = ProgressReporter(
+                tar_bytes,
+                out,
+                args.progress_interval,
+                url=args.progress_url,
+                bytes_total=sum(current[rel_path][0] for rel_path in archived),
+                members_total=entry_count if members is None else len(members),
+            )
+            reporter.members_done = members_done
+
+            def on_member(position, tar) -> None:
+                # Parts start at a file boundary, after the frames before it
+                if writer.full():
+                    tar_bytes.drain()
+                    writer.next_part()
+                checkpointer(position, tar)
+                reporter.members_done = position
+
+            try:
+                with reporter:
+                    member_index = write_tar(
+                        tar_entries(source_folder, members),
+                        tar_bytes,
+                        tombstones,
+                        start=members_done,
+                        member_index=state["member_index"] if state else None,
+                        on_member=on_member,
+                        prefetcher=Prefetcher(
+                            args.readers, args.read_ahead * 1024 * 1024
+                        ),
+                        inodes=state.get("inodes") if state else None,
+                    )
+                    reporter.members_done = reporter.members_total
+            finally:
+                tar_bytes.close()
+        finally:
+            parts = writer.finish()
+
+        # Publish: a reader sees either the previous archive or the new one
+        # (for parts, no index until all of them are in place)
+        for sidecar in (index_path(archive_file), checksums_path(archive_file)):
+            if os.path.exists(sidecar):
+                os.remove(sidecar)
+        part_index = []
+        if part_size:
+            offset = 0
+            for number, (size, digest) in enumerate(parts):
+                path = part_path(archive_file, number + 1)
+                os.replace(partial_path(number), path)
+                part_index.append((os.path.basename(path), offset, size, digest))
+                offset += size
+            published = [part_path(archive_file, n + 1) for n in range(len(parts))]
+        else:
+            os.replace(partial_path(0), archive_file)
+            published = [archive_file]
+        # The previous archive may have been a single file or more parts
+        for path in [archive_file, *existing_parts(archive_file)]:
+            if path not in published and os.path.exists(path):
+                os.remove(path)
+        write_index(
+            index_path(archive_file),
+            args.codec,
+            tar_bytes.frames,
+            member_index,
+            part_index,
+        )
+        write_checksums(checksums_path(archive_file), member_index)
+        if os.path.exists(checkpoint_file):
+            os.remove(checkpoint_file)
+    except Exception as e:
+        # The partial archive and its checkpoint are kept for the next run
+        logger.error(f"❌ ERROR: Failed to create archive: {archive_file}: {e}")
+        sys.exit(1)
+    elapsed = max(time.monotonic() - start_time, 1e-6)
+
+    # The manifest describes base + deltas, so it moves only once the archive is complete
+    write_manifest(manifest_file, current)
+    if mode == "full":
+        for _, delta in delta_paths(output_file):
+            logger.info(f"Deleting consolidated delta: {delta}")
+            remove_archive(delta)
+
+    # Size of the files actually archived, from the member index
+    input_size = sum(
+        size for name, _, size, _ in member_index if name != TOMBSTONE_MEMBER
+    )
+    archive_sha256 = out.sha256.hexdigest()
+    ratio = out.bytes * 100 / tar_bytes.bytes if tar_bytes.bytes else 0.0
+    logger.info(f"✅ Archive created: {archive_file}")
+    logger.info(f"   Time taken: {elapsed:.1f}s")
+    logger.info(
+        f"   Original size: {format_size(input_size)} "
+        f"({format_size(tar_bytes.bytes)} tar stream)"
+    )
+    logger.info(
+        f"   Compressed size: {format_size(out.bytes)} ({ratio:.2f}% of original)"
+    )
+    logger.info(f"   Compression speed: {format_size(tar_bytes.bytes / elapsed)}/s")
+    logger.info(f"   Index: {len(tar_bytes.frames)} frames, {len(member_index)} files")
+    logger.info(f"   SHA-256: {archive_sha256}")
+    for path, _, size, digest in part_index:
+        logger.info(f"   Part {path}: {format_size(size)}, SHA-256 {digest}")
+    for policy, (policy_in, policy_out) in sorted(tar_bytes.policy_stats.items()):
+        logger.info(
+            f"   Policy {policy}: {format_size(policy_in)} -> {format_size(policy_out)}"
+        )
+
+    if args.result_file:
+        result = {
+            "mode": mode,
+            "seq": seq,
+            "archive_path": archive_file,
+            # Path of the base archive the folder is downloaded from
+            "output_path": output_file,
+            "archive_size": out.bytes,
+            "file_count": len(current) if members is None else len(members),
+            "deleted_count": len(tombstones or []),
+            "compression_policy": policy_summary(tar_bytes.policy_stats),
+            "compression_ratio": round(out.bytes / max(tar_bytes.bytes, 1), 4),
+            "archive_sha256": archive_sha256,
+            "input_size": input_size,
+        }
+        if part_index:
+            result["parts"] = [
+                {
+                    "path": os.path.join(os.path.dirname(archive_file), name),
+                    "size": size,
+                    "sha256": digest,
+                }
+                for name, _, size, digest in part_index
+            ]
+        with open(args.result_file, "w") as f:
+            json.dump(result, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Archive Codec Benchmark
+
+Archives sample folders with every combination of codec (gzip, zstd, lz4),
+level and thread count of the Python archiver (archive_folder.py, with one
+level for all files), and with the shell pipeline (archive_one_folder.sh:
+tar | pigz -p 8) when pigz is installed. gzip with more than one thread is
+the pigz-style parallel gzip of the archiver. Reports wall time,
+throughput, compression ratio and peak memory of each run, and records
+them in the backend's compression_benchmark table when --backend-url is
+given, to choose the archive codec and size the compression pods.
+
+Usage:
+    ./benchmark.py /lidar/<mission>/<folder> [...] --work-dir /tmp/bench \\
+        --zstd-levels 1 3 9 19 --threads 1 4 --backend-url http://backend-internal
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from archive_folder import CODEC_EXTENSIONS, default_threads
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Levels benchmarked for each codec unless overridden
+DEFAULT_LEVELS = {"gzip": [1, 6, 9], "zstd": [1, 3, 9, 19], "lz4": [0, 9]}
+# Thread count of the shell pipeline, fixed in archive_one_folder.sh
+SHELL_THREADS = 8
+
+
+def folder_size(path: str) -> int:
+    """Total size in bytes of the regular files below path"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.stat(os.path.join(root, name), follow_symlinks=False).st_size
+    return total
+
+
+def data_kind(path: str) -> str:
+    """Extension holding most of the bytes of a folder (las, laz, pcd, ...)"""
+    sizes: Counter = Counter()
+    for root, _, files in os.walk(path):
+        for name in files:
+            extension = os.path.splitext(name)[1].lower().lstrip(".")
+            sizes[extension or "other"] += os.stat(
+                os.path.join(root, name), follow_symlinks=False
+            ).st_size
+    return sizes.most_common(1)[0][0] if sizes else "empty"
+
+
+def build_variants(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    Expand the codec, level and thread grid into benchmark variants.
+
+    Returns:
+        Dicts with the variant name, codec, level and threads
+    """
+    variants = []
+    if "shell" in args.codecs:
+        if shutil.which("pigz"):
+            variants.append(
+                {
+                    "variant": "shell tar|pigz",
+                    "codec": "gzip",
+                    "level": 6,
+                    "threads": SHELL_THREADS,
+                }
+            )
+        else:
+            print("pigz is not installed, skipping the shell pipeline", file=sys.stderr)
+
+    for codec in ("gzip", "zstd", "lz4"):
+        if codec not in args.codecs:
+            continue
+        for level in getattr(args, f"{codec}_levels"):
+            for threads in args.threads:
+                variants.append(
+                    {
+                        "variant": f"{codec} -{level} x{threads}",
+                        "codec": codec,
+                        "level": level,
+                        "threads": threads,
+                    }
+                )
+    return variants
+
+
+def variant_command(variant: Dict[str, Any], source: str, output: str) -> List[str]:
+    """Command archiving source into output (without extension) for a variant"""
+    if variant["variant"] == "shell tar|pigz":
+        return [
+            "bash",
+            os.path.join(HERE, "archive_one_folder.sh"),
+            source,
+            output + ".tar.gz",
+        ]
+    return [
+        sys.executable,
+        os.path.join(HERE, "archive_folder.py"),
+        "--codec",
+        variant["codec"],
+        "--level",
+        str(variant["level"]),
+        "--threads",
+        str(variant["threads"]),
+        "--policy",
+        "uniform",
+        "--result-file",
+        output + ".result.json",
+        source,
+        output + CODEC_EXTENSIONS[variant["codec"]],
+    ]
+
+
+def run_variant(command: List[str]) -> Dict[str, float]:
+    """
+    Run one archiving command and measure it.
+
+    Returns:
+        Dict with elapsed seconds and peak RSS in MB of the whole process tree
+    """
+    # The archivers log errors to stdout; a file cannot fill up like a pipe
+    with tempfile.TemporaryFile() as log:
+        start = time.monotonic()
+        process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+        _, status, rusage = os.wait4(process.pid, 0)
+        elapsed = time.monotonic() - start
+        if os.waitstatus_to_exitcode(status) != 0:
+            log.seek(0)
+            lines = log.read().decode(errors="replace").strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else "unknown error")
+    return {"elapsed": elapsed, "peak_rss_mb": rusage.ru_maxrss / 1024}
+
+
+def post_results(backend_url: str, run_id: str, results: List[Dict[str, Any]]) -> None:
+    """Record a benchmark run in the backend's compression_benchmark table"""
+    request = urllib.request.Request(
+        f"{backend_url}/sqlite/compression_benchmark",
+        data=json.dumps({"run_id": run_id, "results": results}).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        response.read()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive Codec Benchmark")
+    parser.add_argument("folders", nargs="+", help="Sample folders to archive")
+    parser.add_argument(
+        "--work-dir",
+        default="/tmp/archive-benchmark",
+        help="Where temporary archives are written (default: /tmp/archive-benchmark)",
+    )
+    parser.add_argument(
+        "--codecs",
+        nargs="+",
+        choices=["shell", "gzip", "zstd", "lz4"],
+        default=["shell", "gzip", "zstd", "lz4"],
+        help="Codecs to benchmark; shell is archive_one_folder.sh (default: all)",
+    )
+    for codec, levels in DEFAULT_LEVELS.items():
+        parser.add_argument(
+            f"--{codec}-levels",
+            nargs="+",
+            type=int,
+            default=levels,
+            help=f"{codec} levels (default: {' '.join(map(str, levels))})",
+        )
+    parser.add_argument(
+        "--threads",
+        nargs="+",
+        type=int,
+        default=sorted({1, default_threads()}),
+        help="Compression thread counts (default: 1 and the cgroup CPU quota)",
+    )
+    parser.add_argument(
+        "--backend-url",
+        default=None,
+        help="Record the results in the backend, e.g. http://backend-internal",
+    )
+    parser.add_argument(
+        "--run-id",
+        default=None,
+        help="Identifier of this run in the backend (default: UTC start time)",
+    )
+    args = parser.parse_args()
+
+    run_id = args.run_id or time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    variants = build_variants(args)
+    os.makedirs(args.work_dir, exist_ok=True)
+    header = (
+        f"{'folder':<24} {'kind':<6} {'variant':<18} {'time s':>8} {'MB/s':>8} "
+        f"{'ratio %':>8} {'peak MB':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    results = []
+    for folder in args.folders:
+        name = os.path.basename(folder.rstrip("/"))
+        kind = data_kind(folder)
+        original: Optional[int] = None
+        for variant in variants:
+            output = os.path.join(args.work_dir, name)
+            command = variant_command(variant, folder, output)
+            try:
+                result = run_variant(command)
+            except RuntimeError as e:
+                print(f"{name:<24.24} {kind:<6.6} {variant['variant']:<18} failed: {e}")
+                continue
+
+            archive = command[-1]
+            archive_size = os.path.getsize(archive)
+            result_file = output + ".result.json"
+            if os.path.exists(result_file):
+                with open(result_file) as f:
+                    input_size = json.load(f)["input_size"]
+            else:
+                if original is None:
+                    original = folder_size(folder)
+                input_size = original
+            for path in (
+                archive,
+                archive + ".index.json.gz",
+                archive + ".sha256",
+                result_file,
+            ):
+                if os.path.exists(path):
+                    os.remove(path)
+
+            throughput = input_size / 1048576 / result["elapsed"]
+            ratio = archive_size / max(input_size, 1)
+            print(
+                f"{name:<24.24} {kind:<6.6} {variant['variant']:<18} "
+                f"{result['elapsed']:>8.1f} {throughput:>8.1f} "
+                f"{ratio * 100:>8.2f} {result['peak_rss_mb']:>8.0f}"
+            )
+            results.append(
+                {
+                    "folder": folder,
+                    "data_kind": kind,
+                    **variant,
+                    "input_size": input_size,
+                    "archive_size": archive_size,
+                    "elapsed": round(result["elapsed"], 3),
+                    "peak_rss_mb": round(result["peak_rss_mb"], 1),
+                }
+            )
+
+    shutil.rmtree(args.work_dir, ignore_errors=True)
+
+    if args.backend_url and results:
+        post_results(args.backend_url, run_id, results)
+        print(f"Recorded {len(results)} results as run {run_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Cold Archive Recompressor
+
+Rewrites the archives of a folder that has not changed for months (its base
+archive and deltas) at a high compression level, to reclaim NAS space. The
+frames of the sidecar index are decompressed and recompressed one by one, so
+the tar stream, the member index and the member checksums do not change:
+only the compressed offsets of the frames do. Stored frames (already
+compressed data) are copied as they are, and a frame keeps its previous
+compression when the high level does not make it smaller. Multi-part
+archives keep their part boundaries.
+
+The work is throttled to a throughput budget and stops at an optional
+deadline (the end of the off-peak window), leaving the archive untouched.
+The new archive is written next to the old one, verified by decompressing
+it again and comparing the SHA-256 of its tar stream with that of the old
+archive, and swapped in with an atomic rename.
+
+Usage:
+    ./recompress_archive.py /zips/<mission>/<folder>.tar.zst \\
+        --max-rate 50 --deadline 1760421600 --result-file result.json
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import zlib
+import hashlib
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from archive_folder import (
+    COMPRESSORS,
+    ProgressWriter,
+    PartWriter,
+    default_threads,
+    delta_paths,
+    existing_parts,
+    format_size,
+    index_path,
+    logger,
+    lz4,
+    part_path,
+    write_index,
+    zstandard,
+)
+
+# Level of the recompressed frames for each codec unless overridden
+HIGH_LEVELS = {"zstd": 19, "gzip": 9, "lz4": 12}
+# Suffix of the new archive (or parts) while it is written, distinct from the
+# .partial files of a compression job so the two never touch each other's files
+PARTIAL_SUFFIX = ".recompress.partial"
+# Exit status when the deadline is reached before the archive is swapped in
+EXIT_DEADLINE = 3
+
+
+class DeadlineReached(Exception):
+    """The off-peak window ended before the recompression completed"""
+
+
+class Throttle:
+    """Keep the average uncompressed throughput under rate bytes per second"""
+
+    def __init__(self, rate: float, deadline: Optional[float]):
+        self.rate = rate
+        self.deadline = deadline
+        self.start = time.monotonic()
+        self.bytes = 0
+
+    def __call__(self, size: int) -> None:
+        if self.deadline is not None and time.time() >= self.deadline:
+            raise DeadlineReached("off-peak window is over")
+        self.bytes += size
+        if self.rate > 0:
+            ahead = self.bytes / self.rate - (time.monotonic() - self.start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+
+def decompressor(codec: str) -> Callable[[bytes], bytes]:
+    """Decompress one standalone frame of an archive written with codec"""
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("python zstandard module is not installed")
+        # Frames do not always record their content size: decompress as a stream
+        return (
+            lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data)
+        )
+    if codec == "gzip":
+        return lambda data: zlib.decompress(data, 31)
+    if lz4 is None:
+        raise RuntimeError("python lz4 module is not installed")
+    return lz4.frame.decompress
+
+
+def read_index(archive_file: str) -> Dict[str, Any]:
+    """Load the sidecar index of an archive"""
+    with gzip.open(
+        index_path(archive_file), "rt", encoding="utf-8", errors="surrogateescape"
+    ) as f:
+        return json.load(f)
+
+
+def archive_files(archive_file: str, index: Dict[str, Any]) -> List[Tuple[str, int]]:
+    """(path, compressed offset) of the single file or of every part of an archive"""
+    if "parts" not in index:
+        return [(archive_file, 0)]
+    directory = os.path.dirname(archive_file)
+    return [
+        (os.path.join(directory, name), offset) for name, offset, _, _ in index["parts"]
+    ]
+
+
+def read_frames(
+    files: List[Tuple[str, int]], frames: List[List[int]], sha256=None
+) -> Iterator[Tuple[int, bytes]]:
+    """
+    Read the compressed frames of an archive in order.
+
+    Yields:
+        (number of the file holding the frame, compressed frame)
+    """
+    number = 0
+    f = open(files[0][0], "rb")
+    try:
+        for _, _, compressed_offset, compressed_size in frames:
+            while number + 1 < len(files) and compressed_offset >= files[number + 1][1]:
+                if f.read(1):
+                    raise ValueError(f"{files[number][0]} is longer than its index")
+                f.close()
+                number += 1
+                f = open(files[number][0], "rb")
+            data = f.read(compressed_size)
+            if len(data) != compressed_size:
+                raise ValueError(f"{files[number][0]} is shorter than its index")
+            if sha256 is not None:
+                sha256.update(data)
+            yield number, data
+        # Bytes after the last frame would not be covered by the index
+        if f.read(1):
+            raise ValueError(f"{files[number][0]} is longer than its index")
+    finally:
+        f.close()
+
+
+def file_identity(path: str) -> Tuple[int, int, int]:
+    """Inode, size and mtime of a file, to detect an archive rewritten meanwhile"""
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def recompress_archive(
+    archive_file: str, level: Optional[int], threads: int, throttle: Throttle
+) -> Dict[str, Any]:
+    """
+    Recompress one archive (single file or parts) and swap it in.
+
+    Returns:
+        Dict with the archive path, its new size, SHA-256 and compression
+        ratio, the SHA-256 of the archive it replaced and its parts
+    """
+    index = read_index(archive_file)
+    codec = index["codec"]
+    level = HIGH_LEVELS[codec] if level is None else level
+    high = COMPRESSORS[codec]({"high": level})
+    decompress = decompressor(codec)
+    files = archive_files(archive_file, index)
+    multipart = "parts" in index
+    before = [file_identity(path) for path, _ in files]
+    tar_size = sum(frame[1] for frame in index["frames"])
+    old_size = sum(size for _, size, _ in before)
+    logger.info(
+        f"Recompressing {archive_file}: {len(index['frames'])} frames, "
+        f"{format_size(old_size)} ({codec}, level {level})"
+    )
+
+    def partial_path(number: int) -> str:
+        if multipart:
+            return part_path(archive_file, number + 1) + PARTIAL_SUFFIX
+        return archive_file + PARTIAL_SUFFIX
+
+    def recompress(frame: List[int], data: bytes) -> Tuple[bytes, bytes]:
+        raw = decompress(data)
+        if len(raw) != frame[1]:
+            raise ValueError(f"Frame at {frame[0]} does not match the index")
+        # Stored frames are larger than their content: nothing to gain
+        if len(data) >= frame[1]:
+            return data, raw
+        smaller = high(raw, "high")
+        return (smaller if len(smaller) < len(data) else data), raw
+
+    source_sha256 = hashlib.sha256()
+    tar_sha256 = hashlib.sha256()
+    frames: List[Tuple[int, int, int, int]] = []
+    writer = PartWriter(partial_path, 1 if multipart else 0)
+    try:
+        out = ProgressWriter(writer)
+        pending: deque = deque()
+
+        def write_next() -> None:
+            frame, number, future = pending.popleft()
+            data, raw = future.result()
+            tar_sha256.update(raw)
+            if number > len(writer.parts):
+                writer.next_part()
+            frames.append((frame[0], frame[1], out.bytes, len(data)))
+            out.write(data)
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for frame, (number, data) in zip(
+                index["frames"], read_frames(files, index["frames"], source_sha256)
+            ):
+                throttle(frame[1])
+                pending.append((frame, number, pool.submit(recompress, frame, data)))
+                while len(pending) > 2 * threads:
+                    write_next()
+            while pending:
+                write_next()
+    finally:
+        parts = writer.finish()
+
+    # Verify: decompress the new archive again and compare its tar stream
+    new_files = [(partial_path(0), 0)]
+    offset = 0
+    for number, (size, _) in enumerate(parts[:-1]):
+        offset += size
+        new_files.append((partial_path(number + 1), offset))
+    check_sha256 = hashlib.sha256()
+    written_sha256 = hashlib.sha256()
+    for frame, (_, data) in zip(frames, read_frames(new_files, frames, written_sha256)):
+        raw = decompress(data)
+        if len(raw) != frame[1]:
+            raise ValueError(f"Recompressed frame at {frame[0]} has the wrong size")
+        check_sha256.update(raw)
+    if check_sha256.hexdigest() != tar_sha256.hexdigest():
+        raise ValueError("Recompressed archive does not match the original tar stream")
+    if written_sha256.hexdigest() != out.sha256.hexdigest():
+        raise ValueError("Recompressed archive was not written correctly")
+    if [file_identity(path) for path, _ in files] != before:
+        raise ValueError("Archive changed while it was recompressed")
+
+    # Swap: without an index, readers wait for the new one instead of using
+    # the old offsets on the new file
+    os.remove(index_path(archive_file))
+    part_index = []
+    offset = 0
+    for number, (size, digest) in enumerate(parts):
+        path = files[number][0]
+        os.replace(partial_path(number), path)
+        if multipart:
+            part_index.append((os.path.basename(path), offset, size, digest))
+        offset += size
+    write_index(index_path(archive_file), codec, frames, index["members"], part_index)
+
+    result = {
+        "archive_path": archive_file,
+        "archive_size": out.bytes,
+        "archive_sha256": out.sha256.hexdigest(),
+        "source_sha256": source_sha256.hexdigest(),
+        "compression_ratio": round(out.bytes / max(tar_size, 1), 4),
+    }
+    if multipart:
+        result["parts"] = [
+            {"path": files[number][0], "size": size, "sha256": digest}
+            for number, (size, digest) in enumerate(parts)
+        ]
+    logger.info(
+        f"   {format_size(old_size)} -> {format_size(out.bytes)} "
+        f"({out.bytes * 100 / max(tar_size, 1):.2f}% of the tar stream)"
+    )
+    return result
+
+
+def remove_partials(archive_file: str) -> None:
+    """Delete the files of an abandoned recompression"""
+    for path in [
+        archive_file + PARTIAL_SUFFIX,
+        *existing_parts(archive_file, PARTIAL_SUFFIX),
+    ]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def main() -> None:
+    """
+    Main function: recompress the base archive of a folder and its deltas.
+    """
+    parser = argparse.ArgumentParser(description="Cold Archive Recompressor")
+    parser.add_argument("archive", help="Base archive of the folder")
+    parser.add_argument(
+        "--level",
+        type=int,
+        default=None,
+        help="Compression level of the new frames "
+        "(default: 19 for zstd, 9 for gzip, 12 for lz4)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="Compression threads (default: sized from the cgroup CPU quota)",
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=50.0,
+        help="Throughput budget in MB/s of uncompressed data, 0 for none (default: 50)",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help="Epoch time at which to give up and keep the archives as they are",
+    )
+    parser.add_argument(
+        "--result-file",
+        default=None,
+        help="Write a JSON summary of the recompressed archives to this file",
+    )
+    args = parser.parse_args()
+
+    threads = args.threads or default_threads()
+    throttle = Throttle(args.max_rate * 1024 * 1024, args.deadline)
+    archives = [args.archive] + [path for _, path in delta_paths(args.archive)]
+    logger.info("Script started")
+    logger.info(
+        f"Recompressing {len(archives)} archives with {threads} threads, "
+        f"at most {args.max_rate} MB/s"
+    )
+
+    results: List[Dict[str, Any]] = []
+
+    def write_result(complete: bool) -> None:
+        # Archives swapped in before a deadline are reported too
+        if args.result_file:
+            with open(args.result_file, "w") as f:
+                json.dump({"archives": results, "complete": complete}, f)
+
+    for archive_file in archives:
+        if not os.path.exists(index_path(archive_file)):
+            logger.error(f"❌ ERROR: No index found for archive: {archive_file}")
+            sys.exit(1)
+        try:
+            results.append(
+                recompress_archive(archive_file, args.level, threads, throttle)
+            )
+        except DeadlineReached as e:
+            remove_partials(archive_file)
+            logger.info(f"Stopped at {archive_file}, left as it was: {e}")
+            write_result(False)
+            sys.exit(EXIT_DEADLINE)
+        except Exception as e:
+            remove_partials(archive_file)
+            logger.error(f"❌ ERROR: Failed to recompress archive: {archive_file}: {e}")
+            sys.exit(1)
+
+    logger.info(f"✅ Recompressed {len(results)} archives")
+    write_result(True)
+
+
+if __name__ == "__main__":
+    main()
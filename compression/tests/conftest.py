@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# archive_folder.py and recompress_archive.py are standalone scripts: import
+# them from their directory
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
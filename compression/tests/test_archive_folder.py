@@ -0,0 +1,218 @@
+import gzip
+import io
+import json
+import os
+import sys
+import tarfile
+from pathlib import Path
+
+import pytest
+import zstandard
+
+import archive_folder
+import recompress_archive
+
+
+def run(monkeypatch, module, *argv):
+    monkeypatch.setattr(sys, "argv", [module.__file__, *map(str, argv)])
+    module.main()
+
+
+def write_files(folder: Path, files):
+    for rel_path, data in files.items():
+        path = folder / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+
+
+def decompress(data: bytes) -> bytes:
+    return (
+        zstandard.ZstdDecompressor()
+        .stream_reader(io.BytesIO(data), read_across_frames=True)
+        .read()
+    )
+
+
+def read_members(archive_path):
+    """Files of an archive, read at the offsets of its sidecar index"""
+    with gzip.open(f"{archive_path}{archive_folder.INDEX_SUFFIX}", "rt") as f:
+        index = json.load(f)
+    if "parts" in index:
+        files = [Path(archive_path).parent / part[0] for part in index["parts"]]
+    else:
+        files = [Path(archive_path)]
+    tar = decompress(b"".join(path.read_bytes() for path in files))
+    return {
+        name: tar[offset : offset + size] for name, offset, size, _ in index["members"]
+    }
+
+
+def untar(data: bytes):
+    """Regular files of a zstd-compressed tar stream"""
+    with tarfile.open(fileobj=io.BytesIO(decompress(data)), mode="r:") as archive:
+        return {
+            member.name: archive.extractfile(member).read()
+            for member in archive
+            if member.isfile()
+        }
+
+
+def test_delta_round_trip_with_tombstones(monkeypatch, tmp_path):
+    source = tmp_path / "mission" / "folder"
+    write_files(source, {"a.txt": b"a", "b.txt": b"b", "sub/c.txt": b"c"})
+    base = tmp_path / "zips" / "folder.tar.zst"
+    run(monkeypatch, archive_folder, source, base, "--result-file", tmp_path / "r0")
+
+    (source / "b.txt").unlink()
+    write_files(source, {"sub/c.txt": b"changed", "d.txt": b"d"})
+    run(
+        monkeypatch,
+        archive_folder,
+        source,
+        base,
+        "--mode",
+        "delta",
+        "--result-file",
+        tmp_path / "r1",
+    )
+
+    result = json.loads((tmp_path / "r1").read_text())
+    assert (result["mode"], result["seq"]) == ("delta", 1)
+    assert (result["file_count"], result["deleted_count"]) == (2, 1)
+    assert result["output_path"] == str(base)
+
+    delta = read_members(result["archive_path"])
+    assert delta.pop(archive_folder.TOMBSTONE_MEMBER) == b"b.txt\n"
+    assert delta == {"folder/sub/c.txt": b"changed", "folder/d.txt": b"d"}
+
+    # Base, then the delta on top of it, gives the folder as it is now
+    files = read_members(base)
+    files.update(delta)
+    del files["folder/b.txt"]
+    assert files == {
+        "folder/a.txt": b"a",
+        "folder/sub/c.txt": b"changed",
+        "folder/d.txt": b"d",
+    }
+
+
+def test_parts_hold_whole_files(monkeypatch, tmp_path):
+    source = tmp_path / "folder"
+    files = {f"f{i}.bin": os.urandom(700 * 1024) for i in range(10)}
+    write_files(source, files)
+    base = tmp_path / "zips" / "folder.tar.zst"
+    run(
+        monkeypatch,
+        archive_folder,
+        source,
+        base,
+        "--part-size",
+        1,
+        "--frame-size",
+        1,
+        # At most two frames wait to be written, so parts are cut early on
+        "--threads",
+        1,
+        "--result-file",
+        tmp_path / "result",
+    )
+
+    parts = json.loads((tmp_path / "result").read_text())["parts"]
+    assert len(parts) > 1
+    assert not base.exists()
+
+    extracted = {}
+    for part in parts:
+        data = Path(part["path"]).read_bytes()
+        assert len(data) == part["size"]
+        # Every part can be decompressed and extracted on its own
+        extracted.update(untar(data))
+    assert extracted == {f"folder/{name}": data for name, data in files.items()}
+    assert read_members(base) == extracted
+
+
+def test_resumed_archive_matches_uninterrupted_one(monkeypatch, tmp_path):
+    source = tmp_path / "folder"
+    write_files(source, {f"f{i}.bin": os.urandom(600 * 1024) for i in range(6)})
+    os.link(source / "f0.bin", source / "z_link.bin")
+    options = ["--checkpoint-size", 1, "--threads", 2]
+
+    uninterrupted = tmp_path / "a" / "folder.tar.zst"
+    run(monkeypatch, archive_folder, source, uninterrupted, *options)
+
+    class Interrupted(archive_folder.Checkpointer):
+        def __call__(self, members_done, tar):
+            saved = self.next
+            super().__call__(members_done, tar)
+            if self.next != saved:
+                raise RuntimeError("interrupted after a checkpoint")
+
+    resumed = tmp_path / "b" / "folder.tar.zst"
+    with monkeypatch.context() as patch:
+        patch.setattr(archive_folder, "Checkpointer", Interrupted)
+        with pytest.raises(SystemExit):
+            run(monkeypatch, archive_folder, source, resumed, *options)
+    checkpoint = json.loads(Path(f"{resumed}.checkpoint.json").read_text())
+    assert 0 < checkpoint["members_done"] < 7
+    assert not resumed.exists()
+
+    run(monkeypatch, archive_folder, source, resumed, *options)
+    assert resumed.read_bytes() == uninterrupted.read_bytes()
+    assert not Path(f"{resumed}.checkpoint.json").exists()
+
+
+def test_recompression_keeps_the_tar_stream(monkeypatch, tmp_path):
+    source = tmp_path / "folder"
+    write_files(source, {"points.xyz": b"1.0 2.0 3.0\n" * 50000, "a.txt": b"a"})
+    base = tmp_path / "zips" / "folder.tar.zst"
+    run(monkeypatch, archive_folder, source, base, "--level", 1)
+    before = read_members(base)
+    size = base.stat().st_size
+
+    # Past the deadline, the archive is left as it was
+    with pytest.raises(SystemExit) as stopped:
+        run(monkeypatch, recompress_archive, base, "--deadline", 1)
+    assert stopped.value.code == recompress_archive.EXIT_DEADLINE
+    assert base.stat().st_size == size
+
+    run(
+        monkeypatch,
+        recompress_archive,
+        base,
+        "--max-rate",
+        0,
+        "--result-file",
+        tmp_path / "result",
+    )
+    assert json.loads((tmp_path / "result").read_text())["complete"]
+    assert base.stat().st_size <= size
+    assert read_members(base) == before
+    assert untar(base.read_bytes()) == before
+
+
+def test_progress_counts_every_entry(monkeypatch, tmp_path):
+    source = tmp_path / "folder"
+    write_files(source, {"a.txt": b"a", "sub/b.txt": b"b"})
+    os.symlink("sub", source / "dir_link")
+    os.symlink("a.txt", source / "file_link")
+    os.link(source / "a.txt", source / "hard_link")
+    os.mkfifo(source / "fifo")
+
+    reports = []
+    monkeypatch.setattr(
+        archive_folder.ProgressReporter,
+        "_send",
+        lambda self, read, average: reports.append(
+            (self.members_done, self.members_total)
+        ),
+    )
+    run(
+        monkeypatch,
+        archive_folder,
+        source,
+        tmp_path / "zips" / "folder.tar.zst",
+        "--progress-url",
+        "http://backend/progress",
+    )
+    # folder, sub, sub/b.txt and the five entries above
+    assert reports[-1] == (8, 8)
@@ -0,0 +1,83 @@
+#!/bin/bash
+set -e
+
+# Expected environment variables:
+#   INPUT_FILE:   The .metacloud file listing point cloud files to process
+#   INPUT_DIR:    The directory the paths in the .metacloud file are relative to
+#   OUTPUT_FILE:  The .copc.laz file to write
+
+# Check for required conversion variables
+if [ -z "$INPUT_FILE" ]; then
+  echo "ERROR: INPUT_FILE is not set"
+  exit 1
+fi
+
+if [ -z "$INPUT_DIR" ]; then
+  echo "ERROR: INPUT_DIR is not set"
+  exit 1
+fi
+
+if [ -z "$OUTPUT_FILE" ]; then
+  echo "ERROR: OUTPUT_FILE is not set"
+  exit 1
+fi
+
+# Ensure INPUT_FILE is a .metacloud file
+if [[ ! "$INPUT_FILE" == *.metacloud ]]; then
+  echo "ERROR: INPUT_FILE must be a .metacloud file"
+  exit 1
+fi
+
+echo "INPUT_FILE=$INPUT_FILE"
+echo "INPUT_DIR=$INPUT_DIR"
+echo "OUTPUT_FILE=$OUTPUT_FILE"
+
+mkdir -p "$(dirname "$OUTPUT_FILE")"
+
+# Parse the .metacloud file like the Potree converter does
+PARSING_POINTS_FILES=false
+POINT_CLOUD_FILES=()
+
+while IFS= read -r line; do
+  # Skip comments and empty lines
+  [[ "$line" =~ ^#.*$ || -z "$line" ]] && continue
+
+  # Check section markers
+  if [[ "$line" == "POINTS_FILES" ]]; then
+    PARSING_POINTS_FILES=true
+    continue
+  elif [[ "$line" =~ ^[A-Z_]+$ ]]; then
+    PARSING_POINTS_FILES=false
+    continue
+  fi
+
+  if [ "$PARSING_POINTS_FILES" = true ]; then
+    point_cloud_file="${INPUT_DIR}${line#./}"
+    if [ ! -f "$point_cloud_file" ]; then
+      echo "WARNING: File not found: $point_cloud_file"
+    else
+      POINT_CLOUD_FILES+=("$point_cloud_file")
+    fi
+  fi
+done < "$INPUT_FILE"
+
+if [ ${#POINT_CLOUD_FILES[@]} -eq 0 ]; then
+  echo "ERROR: No point cloud files found in the metacloud file."
+  exit 1
+fi
+
+echo "Found ${#POINT_CLOUD_FILES[@]} files to process."
+
+# One pipeline: PDAL merges all the readers into the COPC writer. Write
+# next to the target and rename, so readers never see a partial file.
+TMP_FILE="${OUTPUT_FILE%.copc.laz}.tmp.copc.laz"
+PIPELINE=/tmp/copc-pipeline.json
+jq -n --arg out "$TMP_FILE" --arg threads "$(nproc)" \
+  '$ARGS.positional + [{"type": "writers.copc", "filename": $out, "threads": ($threads | tonumber)}]' \
+  --args "${POINT_CLOUD_FILES[@]}" > "$PIPELINE"
+
+echo "Starting COPC conversion..."
+pdal pipeline "$PIPELINE"
+mv -f "$TMP_FILE" "$OUTPUT_FILE"
+
+echo "Conversion completed: $OUTPUT_FILE ($(stat -c%s "$OUTPUT_FILE") bytes)"
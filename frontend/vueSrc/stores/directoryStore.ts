@@ -28,6 +28,14 @@ export interface PotreeMetacloudState {
   last_processed_time: string | null;
 }
 
+export interface BrowseEntry {
+  name: string;
+  type: "directory" | "file";
+  size_bytes: number;
+  file_count: number;
+  mtime: number;
+}
+
 export const useDirectoryStore = defineStore("directory", () => {
   const directoryData = ref<DirectoryNode[]>([]);
   const isLoading = ref(false);
@@ -107,6 +115,26 @@ export const useDirectoryStore = defineStore("directory", () => {
     }
   }
 
+  // Browse one page of a directory, served from the scanner's manifests
+  async function browseDirectory(path: string, limit = 100, offset = 0) {
+    try {
+      const cleanPath = path.replace(/^\/+/, "");
+      const response = await fetch(
+        `${apiBasePath.value}/sqlite/browse/${cleanPath}?limit=${limit}&offset=${offset}`,
+      );
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! Status: ${response.status}`);
+      }
+
+      const { data, count } = await response.json();
+      return { entries: data as BrowseEntry[], count: count as number };
+    } catch (err) {
+      console.error(`Error browsing ${path}:`, err);
+      throw err;
+    }
+  }
+
   // Fetch list of all available missions
   async function fetchAllMissions() {
     try {
@@ -220,6 +248,7 @@ export const useDirectoryStore = defineStore("directory", () => {
     fetchAllDirectoryData,
     fetchPointcloudGeojson,
     fetchMissionData,
+    browseDirectory,
     getDownloadUrl,
     configurePaths,
     setActiveMission,
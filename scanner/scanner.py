@@ -16,14 +16,20 @@ to create compressed archives of changed directories.
 
 import os
 import json
-import subprocess
 import time
 import uuid
 import logging
 import sys
 import argparse
 import hashlib
-from typing import Dict, List, Optional, Tuple, Set
+import gzip
+import math
+import struct
+import statistics
+import threading
+import collections
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Set
 from datetime import datetime
 
 try:
@@ -52,16 +58,186 @@ ZIP: str = ""
 FTS_ADDLIDAR_PVC: str = ""
 # Default backend URL, can be overridden by command line argument
 BACKEND_URL: str = ""
+# Threads used to walk a single folder, can be overridden by command line argument
+WALK_THREADS: int = 1
+# Codec of the archives created by compression jobs, can be overridden by command line argument
+ARCHIVE_CODEC: str = "zstd"
+# Whether compression jobs write delta archives, can be overridden by command line argument
+ARCHIVE_MODE: str = "full"
+# Size in MB of the parts full archives are split into (0: single file), can be overridden by command line argument
+ARCHIVE_PART_SIZE: int = 0
+# Throughput budget in MB/s of the cold archive recompression job, can be overridden by command line argument
+RECOMPRESS_MAX_RATE: float = 50.0
+# Time in seconds the recompression job may run past the off-peak window to verify and swap its last archive
+RECOMPRESS_GRACE: int = 3600
 # We'll store parsed args globally so they can be accessed from other functions
 args = None
 
+# Reasons a folder is queued for archiving, in priority order (lower runs first)
+REASON_NEW = "new"
+REASON_CHANGED = "changed"
+REASON_RETRY = "retry"
+REASON_PRIORITY = {REASON_NEW: 0, REASON_CHANGED: 1, REASON_RETRY: 2}
+
+# Compressed size / original size assumed for folders never archived
+# (mostly LAZ, which is stored as it is)
+DEFAULT_COMPRESSION_RATIO = 1.0
+
+# Archive file extension for each codec supported by compression/archive_folder.py
+ARCHIVE_EXTENSIONS = {"zstd": ".tar.zst", "gzip": ".tar.gz"}
+
+# Resource classes of Potree conversion jobs, smallest first: a mission goes to
+# the first class whose max_points its inputs do not exceed, and each class gets
+# its own Job. default_seconds is the expected conversion time of a mission
+# when there is no history to predict it from.
+POTREE_RESOURCE_CLASSES = [
+    {
+        "name": "small",
+        "max_points": 200_000_000,
+        "cpu": "2",
+        "memory": "4Gi",
+        "cpu_request": "500m",
+        "memory_request": "1Gi",
+        "max_parallelism": 4,
+        "default_seconds": 1800,
+    },
+    {
+        "name": "medium",
+        "max_points": 2_000_000_000,
+        "cpu": "4",
+        "memory": "16Gi",
+        "cpu_request": "1",
+        "memory_request": "8Gi",
+        "max_parallelism": 2,
+        "default_seconds": 3 * 3600,
+    },
+    {
+        "name": "large",
+        "max_points": None,
+        "cpu": "8",
+        "memory": "32Gi",
+        "cpu_request": "2",
+        "memory_request": "16Gi",
+        "max_parallelism": 1,
+        "default_seconds": 12 * 3600,
+    },
+]
+# Wall-clock time a Potree job aims for: more of its pods run in parallel,
+# up to the limit of its class, when its missions need longer in total
+POTREE_TARGET_SECONDS = 4 * 3600
+# activeDeadlineSeconds of a Potree job: its predicted duration times this factor, within bounds
+POTREE_DEADLINE_FACTOR = 2.0
+POTREE_MIN_DEADLINE = 3600
+POTREE_MAX_DEADLINE = 7 * 86400
+
+
+class AdaptiveApiClient:
+    """
+    Thread-safe HTTP client for the backend with AIMD concurrency control.
+
+    The number of requests allowed in flight grows by one per window of
+    successful, fast responses (additive increase) and is halved when the
+    backend answers 429/503 or when latency exceeds the target
+    (multiplicative decrease). Rejected requests are retried after the
+    backend's Retry-After delay.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 4,
+        max_limit: float = 32,
+        target_latency: float = 2.0,
+        max_retries: int = 5,
+    ):
+        self.limit = initial_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.inflight = 0
+        self.last_decrease = 0.0
+        self.session = requests.Session()
+        self._cond = threading.Condition()
+
+    def _acquire(self) -> None:
+        with self._cond:
+            while self.inflight >= int(self.limit):
+                self._cond.wait()
+            self.inflight += 1
+
+    def _release(self) -> None:
+        with self._cond:
+            self.inflight -= 1
+            self._cond.notify_all()
+
+    def _increase(self) -> None:
+        with self._cond:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def _decrease(self, latency: float) -> None:
+        with self._cond:
+            # Decrease at most once per observed round trip, so a burst of
+            # slow responses to the same overload only halves the limit once
+            now = time.monotonic()
+            if now - self.last_decrease < latency:
+                return
+            self.last_decrease = now
+            self.limit = max(1.0, self.limit / 2)
+            logger.debug(f"Backend API concurrency limit reduced to {self.limit:.1f}")
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        for attempt in range(self.max_retries + 1):
+            self._acquire()
+            start = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            finally:
+                self._release()
+            latency = time.monotonic() - start
+
+            if response.status_code in (429, 503):
+                self._decrease(latency)
+                if attempt == self.max_retries:
+                    return response
+                retry_after = response.headers.get("Retry-After", "")
+                delay = int(retry_after) if retry_after.isdigit() else 2**attempt
+                logger.warning(
+                    f"Backend busy ({response.status_code}) on {method} {url}, "
+                    f"retrying in {delay}s (limit {self.limit:.1f})"
+                )
+                time.sleep(min(delay, 60))
+                continue
+
+            if latency > self.target_latency:
+                self._decrease(latency)
+            else:
+                self._increase()
+            return response
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", url, **kwargs)
+
+
+# Shared backend client, reconfigured from the command line in main()
+api_client = AdaptiveApiClient()
+
 
 # API Client Functions
 def api_get_folder_state(folder_key: str) -> Optional[Dict]:
     """Get folder state from API by folder key"""
     try:
         url = f"{BACKEND_URL}/sqlite/folder_state/{folder_key}"
-        response = requests.get(url, timeout=30)
+        response = api_client.get(url, timeout=30)
         if response.status_code == 404:
             return None
         response.raise_for_status()
@@ -75,11 +251,37 @@ def api_get_folder_state(folder_key: str) -> Optional[Dict]:
         return None
 
 
+def api_get_requested_folders(min_requests: int) -> Optional[Set[str]]:
+    """Get the folders whose archive users downloaded at least min_requests times recently"""
+    try:
+        url = f"{BACKEND_URL}/sqlite/archive_demand"
+        response = api_client.get(
+            url, params={"min_requests": min_requests, "limit": 10000}, timeout=30
+        )
+        response.raise_for_status()
+        return {row["folder_key"] for row in response.json().get("data", [])}
+    except Exception as e:
+        logger.error(f"Error fetching archive demand: {e}")
+        return None
+
+
+def api_get_recompression_candidates(limit: int) -> List[Dict]:
+    """Get the cold folders to recompress from the API (none outside off-peak hours)"""
+    try:
+        url = f"{BACKEND_URL}/sqlite/recompression_candidates"
+        response = api_client.get(url, params={"limit": limit}, timeout=30)
+        response.raise_for_status()
+        return response.json().get("data", [])
+    except Exception as e:
+        logger.error(f"Error fetching recompression candidates: {e}")
+        return []
+
+
 def api_check_mission_exists(mission_key: str) -> bool:
     """Check if mission exists in folder_state via API"""
     try:
         url = f"{BACKEND_URL}/sqlite/folder_state/mission/{mission_key}"
-        response = requests.get(url, timeout=30)
+        response = api_client.get(url, timeout=30)
         if response.status_code == 404:
             return False
         response.raise_for_status()
@@ -94,7 +296,7 @@ def api_get_potree_metacloud_state(mission_key: str) -> Optional[Dict]:
     """Get potree metacloud state from API by mission key"""
     try:
         url = f"{BACKEND_URL}/sqlite/potree_metacloud_state/{mission_key}"
-        response = requests.get(url, timeout=30)
+        response = api_client.get(url, timeout=30)
         if response.status_code == 404:
             return None
         response.raise_for_status()
@@ -104,15 +306,54 @@ def api_get_potree_metacloud_state(mission_key: str) -> Optional[Dict]:
         return None
 
 
+def api_get_potree_inputs(mission_key: str) -> Optional[Dict[str, str]]:
+    """Get the input_path -> fingerprint set a mission was last queued with"""
+    try:
+        url = f"{BACKEND_URL}/sqlite/potree_input_state/{mission_key}"
+        response = api_client.get(url, timeout=30)
+        response.raise_for_status()
+        return {row["input_path"]: row["fp"] for row in response.json()["data"]}
+    except Exception as e:
+        logger.error(f"Error fetching potree inputs for {mission_key}: {e}")
+        return None
+
+
+def api_put_potree_inputs(
+    mission_key: str, inputs: List[Dict[str, Any]], fp: Optional[str] = None
+) -> bool:
+    """Record the input set of a mission, and the .metacloud fingerprint if given"""
+    try:
+        url = f"{BACKEND_URL}/sqlite/potree_input_state/{mission_key}"
+        payload = {"inputs": inputs, "fingerprint": fp}
+        response = api_client.put(url, json=payload, timeout=60)
+        response.raise_for_status()
+        return True
+    except Exception as e:
+        logger.error(f"Error storing potree inputs for {mission_key}: {e}")
+        return False
+
+
 def api_create_folder_state(
-    folder_key: str, mission_key: str, fp: str, size: int, count: int, output_path: str
+    folder_key: str,
+    mission_key: str,
+    fp: str,
+    size: int,
+    count: int,
+    output_path: str,
+    queue_reason: Optional[str] = None,
+    processing_status: str = "pending",
 ) -> bool:
     """Create or update folder state via API"""
     try:
         # First try to update existing record via API
         url = f"{BACKEND_URL}/sqlite/folder_state/{folder_key}"
-        payload = {"fingerprint": fp, "processing_status": "pending"}
-        response = requests.put(url, json=payload, timeout=30)
+        payload = {
+            "fingerprint": fp,
+            "processing_status": processing_status,
+            "queue_reason": queue_reason,
+            "output_path": output_path,
+        }
+        response = api_client.put(url, json=payload, timeout=30)
 
         if response.status_code == 404:
             # Record doesn't exist - create it via API
@@ -125,9 +366,12 @@ def api_create_folder_state(
                 "size_kb": size,
                 "file_count": count,
                 "output_path": output_path,
-                "processing_status": "pending",
+                "processing_status": processing_status,
+                "queue_reason": queue_reason,
             }
-            create_response = requests.post(create_url, json=create_payload, timeout=30)
+            create_response = api_client.post(
+                create_url, json=create_payload, timeout=30
+            )
             create_response.raise_for_status()
             return True
 
@@ -138,17 +382,36 @@ def api_create_folder_state(
         return False
 
 
+def api_get_potree_history() -> List[Dict]:
+    """Get the potree metacloud state of all missions, with their past processing times"""
+    try:
+        url = f"{BACKEND_URL}/sqlite/potree_metacloud_state"
+        response = api_client.get(url, params={"limit": 1000}, timeout=30)
+        response.raise_for_status()
+        return response.json().get("data", [])
+    except Exception as e:
+        logger.error(f"Error fetching potree metacloud history: {e}")
+        return []
+
+
 def api_create_potree_metacloud_state(
     mission_key: str,
     fp: str,
     output_path: str,
+    input_points: Optional[int] = None,
+    input_size: Optional[int] = None,
 ) -> bool:
     """Create or update potree metacloud state via API"""
     try:
         # Try to update existing record via API
         url = f"{BACKEND_URL}/sqlite/potree_metacloud_state/{mission_key}"
-        payload = {"fingerprint": fp, "processing_status": "pending"}
-        response = requests.put(url, json=payload, timeout=30)
+        payload = {
+            "fingerprint": fp,
+            "processing_status": "pending",
+            "input_points": input_points,
+            "input_size": input_size,
+        }
+        response = api_client.put(url, json=payload, timeout=30)
 
         if response.status_code == 404:
             # Record doesn't exist - create it via API
@@ -161,8 +424,12 @@ def api_create_potree_metacloud_state(
                 "fingerprint": fp,
                 "output_path": output_path,
                 "processing_status": "pending",
+                "input_points": input_points,
+                "input_size": input_size,
             }
-            create_response = requests.post(create_url, json=create_payload, timeout=30)
+            create_response = api_client.post(
+                create_url, json=create_payload, timeout=30
+            )
             create_response.raise_for_status()
             return True
 
@@ -179,7 +446,7 @@ def api_update_potree_metacloud_last_checked(mission_key: str) -> bool:
     """Update only the last_checked timestamp for potree metacloud state"""
     try:
         url = f"{BACKEND_URL}/sqlite/potree_metacloud_state/{mission_key}/last_checked"
-        response = requests.patch(url, timeout=30)
+        response = api_client.patch(url, timeout=30)
         if response.status_code == 404:
             logger.warning(
                 f"Potree metacloud state not found for mission {mission_key}"
@@ -194,11 +461,66 @@ def api_update_potree_metacloud_last_checked(mission_key: str) -> bool:
         return False
 
 
+def api_get_copc_state(mission_key: str) -> Optional[Dict]:
+    """Get the COPC conversion state of a mission from API"""
+    try:
+        url = f"{BACKEND_URL}/sqlite/copc_state/{mission_key}"
+        response = api_client.get(url, timeout=30)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        logger.error(f"Error fetching COPC state for {mission_key}: {e}")
+        return None
+
+
+def api_create_copc_state(
+    mission_key: str,
+    fp: str,
+    output_path: str,
+    input_points: Optional[int] = None,
+    input_size: Optional[int] = None,
+) -> bool:
+    """Create or reset the COPC state of a mission as pending via API"""
+    try:
+        url = f"{BACKEND_URL}/sqlite/copc_state"
+        payload = {
+            "mission_key": mission_key,
+            "fingerprint": fp,
+            "output_path": output_path,
+            "processing_status": "pending",
+            "input_points": input_points,
+            "input_size": input_size,
+        }
+        response = api_client.post(url, json=payload, timeout=30)
+        response.raise_for_status()
+        return True
+    except Exception as e:
+        logger.error(f"Error creating COPC state for {mission_key}: {e}")
+        return False
+
+
+def api_update_copc_last_checked(mission_key: str) -> bool:
+    """Update only the last_checked timestamp for COPC state"""
+    try:
+        url = f"{BACKEND_URL}/sqlite/copc_state/{mission_key}/last_checked"
+        response = api_client.patch(url, timeout=30)
+        if response.status_code == 404:
+            logger.warning(f"COPC state not found for mission {mission_key}")
+            return False
+        response.raise_for_status()
+        return True
+    except Exception as e:
+        logger.error(f"Error updating last_checked for COPC state {mission_key}: {e}")
+        return False
+
+
 def api_update_folder_last_checked(folder_key: str) -> bool:
     """Update only the last_checked timestamp for folder state"""
     try:
         url = f"{BACKEND_URL}/sqlite/folder_state/{folder_key}/last_checked"
-        response = requests.patch(url, timeout=30)
+        response = api_client.patch(url, timeout=30)
         if response.status_code == 404:
             logger.warning(f"Folder state not found for {folder_key}")
             return False
@@ -209,6 +531,53 @@ def api_update_folder_last_checked(folder_key: str) -> bool:
         return False
 
 
+def api_get_folder_manifest_fp(folder_key: str) -> Optional[str]:
+    """Get the fingerprint of the stored file manifest for a folder, if any"""
+    try:
+        url = f"{BACKEND_URL}/sqlite/folder_manifest/{folder_key}"
+        response = api_client.get(url, timeout=30)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json().get("fp")
+    except Exception as e:
+        logger.error(f"Error fetching folder manifest for {folder_key}: {e}")
+        return None
+
+
+def api_put_folder_manifest(folder_key: str, fp: str, manifest: bytes) -> bool:
+    """Upload the gzip-compressed file manifest of a folder via API"""
+    try:
+        url = f"{BACKEND_URL}/sqlite/folder_manifest/{folder_key}"
+        headers = {"Content-Type": "application/gzip", "X-Fingerprint": fp}
+        response = api_client.put(url, data=manifest, headers=headers, timeout=120)
+        response.raise_for_status()
+        return True
+    except Exception as e:
+        logger.error(f"Error uploading folder manifest for {folder_key}: {e}")
+        return False
+
+
+def api_register_job_batch(
+    job_uid: str, job_name: str, kind: str, items: List[List[str]]
+) -> bool:
+    """Register the [key, fingerprint] processed by each completion index of a Job"""
+    try:
+        url = f"{BACKEND_URL}/sqlite/job_batch"
+        payload = {
+            "job_uid": job_uid,
+            "job_name": job_name,
+            "kind": kind,
+            "items": items,
+        }
+        response = api_client.post(url, json=payload, timeout=60)
+        response.raise_for_status()
+        return True
+    except Exception as e:
+        logger.error(f"Error registering job {job_name} ({job_uid}): {e}")
+        return False
+
+
 def fingerprint_file(file_path: str) -> str:
     """
     Generate a unique fingerprint for a single file.
@@ -233,6 +602,170 @@ def fingerprint_file(file_path: str) -> str:
         raise
 
 
+class WorkStealingWalker:
+    """
+    Walk a single directory tree with several threads.
+
+    Each worker owns a deque of directories: it pops its own work from the
+    tail (depth first, good locality) and, when empty, steals from the head
+    of another worker's deque (the oldest, usually largest, subtrees). On
+    high-latency NFS most of the time is spent waiting on getdents/stat, so
+    threads overlap those waits even under the GIL.
+
+    Directory handling matches os.walk(followlinks=False): symlinks to
+    directories are neither followed nor listed as files, and unreadable
+    directories are skipped.
+    """
+
+    def __init__(self, path: str, workers: int):
+        self.path = path
+        self.workers = workers
+        self.deques: List[collections.deque] = [
+            collections.deque() for _ in range(workers)
+        ]
+        self.results: List[List[Tuple[str, int, float]]] = [[] for _ in range(workers)]
+        # Directories queued or being listed; the walk ends when it reaches 0
+        self.pending = 0
+        self.error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+
+    def _next_task(self, index: int) -> Optional[Tuple[str, str]]:
+        """Pop local work or steal some; None once the walk is over"""
+        with self._cond:
+            while True:
+                if self.error is not None:
+                    return None
+                if self.deques[index]:
+                    return self.deques[index].pop()
+                for offset in range(1, self.workers):
+                    victim = self.deques[(index + offset) % self.workers]
+                    if victim:
+                        return victim.popleft()
+                if self.pending == 0:
+                    return None
+                self._cond.wait()
+
+    def _list(self, rel_dir: str, full_dir: str, index: int) -> List[Tuple[str, str]]:
+        subdirs = []
+        try:
+            with os.scandir(full_dir) as entries:
+                entries = list(entries)
+        except OSError:
+            return subdirs
+
+        for entry in entries:
+            rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if not entry.is_symlink():
+                    subdirs.append((rel_path, entry.path))
+                continue
+            stat_result = entry.stat(follow_symlinks=False)
+            self.results[index].append(
+                (rel_path, stat_result.st_size, stat_result.st_mtime)
+            )
+        return subdirs
+
+    def _work(self, index: int) -> None:
+        while True:
+            task = self._next_task(index)
+            if task is None:
+                return
+            try:
+                subdirs = self._list(task[0], task[1], index)
+            except BaseException as e:
+                with self._cond:
+                    self.error = e
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self.deques[index].extend(subdirs)
+                self.pending += len(subdirs) - 1
+                self._cond.notify_all()
+
+    def walk(self) -> List[Tuple[str, int, float]]:
+        self.deques[0].append(("", self.path))
+        self.pending = 1
+        threads = [
+            threading.Thread(target=self._work, args=(i,), daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.error is not None:
+            raise self.error
+
+        file_info = [entry for result in self.results for entry in result]
+        file_info.sort()
+        return file_info
+
+
+def walk_directory(path: str, workers: int = 0) -> List[Tuple[str, int, float]]:
+    """
+    List every file below a directory with its size and modification time.
+
+    Args:
+        path: Directory path to walk
+        workers: Walker threads (0 uses --walk-threads, 1 walks serially)
+
+    Returns:
+        Sorted list of (relative_path, size_bytes, mod_time) tuples
+    """
+    workers = workers or WALK_THREADS
+    if workers > 1:
+        return WorkStealingWalker(path, workers).walk()
+
+    # List to store file information tuples (relative_path, size_bytes, mod_time)
+    file_info = []
+
+    # Walk through the directory tree
+    for root, _, files in os.walk(path):
+        for file in files:
+            full_path = os.path.join(root, file)
+            # Get relative path from the base directory
+            rel_path = os.path.relpath(full_path, path)
+
+            # Get file stats
+            stat_result = os.stat(full_path, follow_symlinks=False)
+            size_bytes = stat_result.st_size
+            mod_time = stat_result.st_mtime
+
+            # Store information as a tuple
+            file_info.append((rel_path, size_bytes, mod_time))
+
+    # Sort the list to ensure consistent ordering
+    file_info.sort()
+    return file_info
+
+
+def fingerprint_entries(file_info: List[Tuple[str, int, float]]) -> str:
+    """
+    Hash a sorted file listing as produced by walk_directory.
+
+    Args:
+        file_info: Sorted list of (relative_path, size_bytes, mod_time) tuples
+
+    Returns:
+        SHA-256 hash representing the directory content state
+    """
+    # Create a hash object
+    hasher = hashlib.sha256()
+
+    # Add each file's information to the hash
+    for rel_path, size_bytes, mod_time in file_info:
+        # Format: relative_path|size|modification_time
+        file_data = f"{rel_path}|{size_bytes}|{mod_time}\n".encode("utf-8")
+        hasher.update(file_data)
+
+    # Return the hexadecimal digest
+    return hasher.hexdigest()
+
+
 def fingerprint(path: str) -> str:
     """
     Generate a unique fingerprint for a directory based on file attributes.
@@ -243,72 +776,269 @@ def fingerprint(path: str) -> str:
     Returns:
         SHA-256 hash representing the directory content state
     """
-    import hashlib
-    import os
-
     try:
-        # List to store file information tuples (relative_path, size_bytes, mod_time)
-        file_info = []
+        return fingerprint_entries(walk_directory(path))
+    except Exception as e:
+        logger.error(f"Failed to generate fingerprint for {path}: {e}")
+        raise
 
-        # Walk through the directory tree
-        for root, _, files in os.walk(path):
-            for file in files:
-                full_path = os.path.join(root, file)
-                # Get relative path from the base directory
-                rel_path = os.path.relpath(full_path, path)
 
-                # Get file stats
-                stat_result = os.stat(full_path, follow_symlinks=False)
-                size_bytes = stat_result.st_size
-                mod_time = stat_result.st_mtime
+def build_manifest(file_info: List[Tuple[str, int, float]]) -> bytes:
+    """
+    Serialise a file listing into a gzip-compressed manifest.
 
-                # Store information as a tuple
-                file_info.append((rel_path, size_bytes, mod_time))
+    One line per file, tab separated: relative_path, size_bytes, mod_time.
+    The backend parses it from the right, so tabs inside names are preserved.
 
-        # Sort the list to ensure consistent ordering
-        file_info.sort()
+    Args:
+        file_info: Sorted list of (relative_path, size_bytes, mod_time) tuples
 
-        # Create a hash object
-        hasher = hashlib.sha256()
+    Returns:
+        Compressed manifest bytes
+    """
+    lines = "".join(
+        f"{rel_path}\t{size_bytes}\t{mod_time}\n"
+        for rel_path, size_bytes, mod_time in file_info
+    )
+    return gzip.compress(lines.encode("utf-8", "surrogateescape"))
 
-        # Add each file's information to the hash
-        for rel_path, size_bytes, mod_time in file_info:
-            # Format: relative_path|size|modification_time
-            file_data = f"{rel_path}|{size_bytes}|{mod_time}\n".encode("utf-8")
-            hasher.update(file_data)
 
-        # Return the hexadecimal digest
-        return hasher.hexdigest()
+def get_directory_stats(
+    path: str,
+) -> Tuple[str, int, int, List[Tuple[str, int, float]]]:
+    """
+    Get directory statistics: fingerprint, size in KB, file count and file listing.
+
+    Size and count come from the listing the fingerprint is built from, so a
+    folder is walked once: the size is the sum of the file sizes rather than
+    the disk usage `du` reports.
+
+    Args:
+        path: Path to directory
+
+    Returns:
+        Tuple containing (fingerprint, size_kb, file_count, file_info)
+    """
+    try:
+        file_info = walk_directory(path)
+        fp = fingerprint_entries(file_info)
     except Exception as e:
         logger.error(f"Failed to generate fingerprint for {path}: {e}")
         raise
+    size = -(-sum(size_bytes for _, size_bytes, _ in file_info) // 1024)
+    return fp, size, len(file_info), file_info
+
 
+def metacloud_inputs(metacloud_file: str) -> List[str]:
+    """Paths of the point cloud files listed in the POINTS_FILES section of a .metacloud.
 
-def get_directory_stats(path: str) -> Tuple[str, int, int]:
+    Parsed like potree-converter/entrypoint.sh: paths are relative to the
+    directory of the .metacloud file.
     """
-    Get directory statistics: fingerprint, size in KB, and file count.
+    base = os.path.dirname(metacloud_file)
+    paths = []
+    in_points_files = False
+    with open(metacloud_file, "r", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if not line or line.startswith("#"):
+                continue
+            if line == "POINTS_FILES":
+                in_points_files = True
+            elif line.isupper() and line.replace("_", "").isalpha():
+                in_points_files = False
+            elif in_points_files:
+                paths.append(os.path.join(base, line.removeprefix("./")))
+    return paths
+
+
+def las_point_count(path: str) -> Optional[int]:
+    """Number of points from the header of a LAS or LAZ file (LAZ headers are not compressed)"""
+    with open(path, "rb") as f:
+        header = f.read(255)
+    if len(header) < 111 or header[:4] != b"LASF":
+        return None
+    legacy_count = struct.unpack_from("<I", header, 107)[0]
+    # LAS 1.4 has a 64-bit count, the legacy one is 0 above 2^32 points
+    if (header[24], header[25]) >= (1, 4) and len(header) == 255:
+        return struct.unpack_from("<Q", header, 247)[0] or legacy_count
+    return legacy_count
+
+
+def stat_metacloud_inputs(metacloud_file: str) -> List[Dict[str, Any]]:
+    """
+    Fingerprint the point cloud files a .metacloud lists.
+
+    Like folders, each input is fingerprinted from its path, size and
+    modification time, so unchanged missions cost one stat per input.
+
+    Returns:
+        One dict per existing input with input_path (relative to the
+        mission), fp, size_bytes, mod_time and points (None, see size_metacloud)
+    """
+    base = os.path.dirname(metacloud_file)
+    inputs = []
+    for path in metacloud_inputs(metacloud_file):
+        rel_path = os.path.relpath(path, base)
+        try:
+            stat_result = os.stat(path)
+        except OSError as e:
+            logger.warning(f"Cannot stat point cloud file {path}: {e}")
+            continue
+        inputs.append(
+            {
+                "input_path": rel_path,
+                "fp": fingerprint_entries(
+                    [(rel_path, stat_result.st_size, stat_result.st_mtime)]
+                ),
+                "size_bytes": stat_result.st_size,
+                "mod_time": stat_result.st_mtime,
+                "points": None,
+            }
+        )
+    return inputs
+
+
+def size_metacloud(
+    metacloud_file: str, inputs: List[Dict[str, Any]]
+) -> Tuple[int, int]:
+    """
+    Size the Potree conversion of a .metacloud file.
+
+    Reads the point count of each input of stat_metacloud_inputs into its
+    points field.
+
+    Returns:
+        Tuple of (points, bytes) of its inputs; files that are not LAS/LAZ
+        count for their bytes only
+    """
+    base = os.path.dirname(metacloud_file)
+    for item in inputs:
+        path = os.path.join(base, item["input_path"])
+        try:
+            item["points"] = las_point_count(path)
+        except OSError as e:
+            logger.warning(f"Cannot read the header of point cloud file {path}: {e}")
+    points = sum(item["points"] or 0 for item in inputs)
+    return points, sum(item["size_bytes"] for item in inputs)
+
+
+def diff_metacloud_inputs(
+    inputs: List[Dict[str, Any]], stored: Dict[str, str]
+) -> Tuple[List[str], List[str]]:
+    """
+    Compare the inputs of a mission with those it was last queued with.
 
     Args:
-        path: Path to directory
+        inputs: Current inputs from stat_metacloud_inputs
+        stored: input_path -> fingerprint of the recorded input set
 
     Returns:
-        Tuple containing (fingerprint, size_kb, file_count)
+        Tuple of (added or modified input paths, removed input paths)
     """
-    fp = fingerprint(path)
-    try:
-        size = int(subprocess.check_output(["du", "-sk", path]).split()[0])
-        count = int(
-            subprocess.check_output(
-                ["bash", "-c", f"find '{path}' -type f | wc -l"]
-            ).strip()
+    changed = [
+        item["input_path"]
+        for item in inputs
+        if stored.get(item["input_path"]) != item["fp"]
+    ]
+    current = {item["input_path"] for item in inputs}
+    removed = sorted(path for path in stored if path not in current)
+    return changed, removed
+
+
+def potree_resource_class(points: int) -> Dict[str, Any]:
+    """Resource class of a Potree conversion of that many points"""
+    for resource_class in POTREE_RESOURCE_CLASSES:
+        if (
+            resource_class["max_points"] is None
+            or points <= resource_class["max_points"]
+        ):
+            return resource_class
+    return POTREE_RESOURCE_CLASSES[-1]
+
+
+def potree_seconds_per_point(history: List[Dict]) -> Optional[float]:
+    """Median conversion time per point of the past successful conversions, if any"""
+    rates = [
+        row["processing_time"] / row["input_points"]
+        for row in history
+        if row.get("processing_status") == "success"
+        and row.get("processing_time")
+        and row.get("input_points")
+    ]
+    return statistics.median(rates) if rates else None
+
+
+def plan_potree_jobs(
+    metacloud_files: List[List[Any]], history: List[Dict]
+) -> List[Dict[str, Any]]:
+    """
+    Group metacloud files into one Job per resource class.
+
+    The conversion time of each mission is predicted from its point count
+    and the median time per point of past conversions, or from its own
+    last processing_time, or from the default of its class. The predicted
+    total decides how many pods of the Job run in parallel, and the
+    predicted duration of the Job its activeDeadlineSeconds.
+
+    Args:
+        metacloud_files: [mission_key, metacloud_path, fingerprint, points, bytes] lists
+        history: Rows of potree_metacloud_state
+
+    Returns:
+        List of dicts with resource_class, metacloud_files, parallelism,
+        active_deadline_seconds and predicted_seconds, one per non-empty class
+    """
+    seconds_per_point = potree_seconds_per_point(history)
+    past = {row["mission_key"]: row for row in history}
+    plans = []
+    for resource_class in POTREE_RESOURCE_CLASSES:
+        files = [
+            file
+            for file in metacloud_files
+            if potree_resource_class(file[3]) is resource_class
+        ]
+        if not files:
+            continue
+        predicted = []
+        for mission_key, _, _, points, _ in files:
+            row = past.get(mission_key, {})
+            if seconds_per_point and points:
+                predicted.append(points * seconds_per_point)
+            elif row.get("processing_status") == "success" and row.get(
+                "processing_time"
+            ):
+                predicted.append(row["processing_time"])
+            else:
+                predicted.append(resource_class["default_seconds"])
+        total = sum(predicted)
+        parallelism = max(
+            1,
+            min(
+                resource_class["max_parallelism"],
+                len(files),
+                math.ceil(total / POTREE_TARGET_SECONDS),
+            ),
         )
-        return fp, size, count
-    except subprocess.SubprocessError as e:
-        logger.error(f"Failed to get stats for directory {path}: {e}")
-        raise
+        duration = max(total / parallelism, max(predicted))
+        plans.append(
+            {
+                "resource_class": resource_class,
+                "metacloud_files": files,
+                "parallelism": parallelism,
+                "active_deadline_seconds": int(
+                    min(
+                        POTREE_MAX_DEADLINE,
+                        max(POTREE_MIN_DEADLINE, POTREE_DEADLINE_FACTOR * duration),
+                    )
+                ),
+                "predicted_seconds": int(total),
+            }
+        )
+    return plans
 
 
-def scan_for_metacloud_files(dry_run: bool = False) -> List[List[str]]:
+def scan_for_metacloud_files(dry_run: bool = False) -> List[List[Any]]:
     """
     Scan directories for .metacloud files and track changes.
 
@@ -316,10 +1046,10 @@ def scan_for_metacloud_files(dry_run: bool = False) -> List[List[str]]:
         dry_run: Whether to perform a dry run without modifying the database
 
     Returns:
-        List of lists containing [mission_key, metacloud_path, fingerprint] that have changed
+        List of [mission_key, metacloud_path, fingerprint, points, bytes] lists that have changed
     """
     global ORIG
-    metacloud_changes: List[List[str]] = []
+    metacloud_changes: List[List[Any]] = []
     current_time = int(time.time())
 
     # First, list all level1 directories (missions)
@@ -346,140 +1076,562 @@ def scan_for_metacloud_files(dry_run: bool = False) -> List[List[str]]:
                 f"Found .metacloud file in {level1}, fingerprint: {metacloud_fp}"
             )
 
-            # Check if the metacloud file has changed or needs reprocessing
-            row = api_get_potree_metacloud_state(level1)
+            # Check if the metacloud file has changed or needs reprocessing
+            row = api_get_potree_metacloud_state(level1)
+            inputs = stat_metacloud_inputs(metacloud_file)
+            stored = api_get_potree_inputs(level1) if row else {}
+
+            # Check if metacloud file needs processing:
+            # 1. New file (not in database)
+            # 2. Previous processing failed or is still pending
+            # 3. A point cloud file it lists was added, modified or removed
+            # 4. No input set recorded yet and the .metacloud changed
+            # An edit of the .metacloud that leaves its inputs unchanged only
+            # records the new fingerprint.
+            needs_processing = False
+            record_fp = False
+            if not row:
+                logger.info(f"New .metacloud file detected for mission {level1}")
+                needs_processing = True
+            elif row.get("processing_status") in ("pending", "failed", None):
+                logger.info(
+                    f"Incomplete processing detected for .metacloud file in mission {level1} (status: {row.get('processing_status')})"
+                )
+                needs_processing = True
+            elif stored is None:
+                # Backend unreachable: decide on the next scan
+                pass
+            elif not stored:
+                if row.get("fp") != metacloud_fp:
+                    logger.info(
+                        f"Fingerprint change detected in .metacloud file for mission {level1}"
+                    )
+                    needs_processing = True
+                else:
+                    # Converted before inputs were tracked: adopt them as converted
+                    record_fp = True
+            else:
+                changed, removed = diff_metacloud_inputs(inputs, stored)
+                if changed or removed:
+                    logger.info(
+                        f"Point cloud inputs of mission {level1} changed: "
+                        f"{len(changed)} added or modified, {len(removed)} removed "
+                        f"({', '.join((changed + removed)[:5])})"
+                    )
+                    needs_processing = True
+                elif row.get("fp") != metacloud_fp:
+                    logger.info(
+                        f".metacloud file of mission {level1} changed without changing its inputs, skipping conversion"
+                    )
+                    record_fp = True
+
+            if needs_processing:
+                logger.info(
+                    f"Adding .metacloud file for mission {level1} to processing queue"
+                )
+                points, size = size_metacloud(metacloud_file, inputs)
+                logger.info(
+                    f"Mission {level1} converts {points} points ({size // 1024} KB)"
+                )
+                metacloud_changes.append(
+                    [level1, metacloud_file, metacloud_fp, points, size]
+                )
+
+                if not dry_run:
+                    output_path = os.path.join(os.path.dirname(ZIP), "Potree", level1)
+
+                    if api_create_potree_metacloud_state(
+                        level1, metacloud_fp, output_path, points, size
+                    ):
+                        api_put_potree_inputs(level1, inputs)
+            else:
+                # Just update the last_checked timestamp for successful completions
+                if not dry_run:
+                    if record_fp:
+                        api_put_potree_inputs(level1, inputs, metacloud_fp)
+                    api_update_potree_metacloud_last_checked(level1)
+                logger.debug(
+                    f"No processing needed for .metacloud file in mission {level1} (status: {row.get('processing_status') if row else 'N/A'})"
+                )
+
+        except Exception as e:
+            logger.error(f"Error processing metacloud file in {level1}: {e}")
+
+    return metacloud_changes
+
+
+def scan_for_copc_missions(dry_run: bool = False) -> List[List[Any]]:
+    """
+    Find the missions whose COPC file is missing or out of date.
+
+    A mission's COPC file merges the point cloud files its .metacloud lists,
+    so it is fingerprinted from those inputs (see stat_metacloud_inputs):
+    editing the .metacloud alone does not rewrite it.
+
+    Args:
+        dry_run: Whether to perform a dry run without modifying the database
+
+    Returns:
+        List of [mission_key, metacloud_path, fingerprint, points, bytes] lists to convert
+    """
+    global ORIG
+    copc_changes: List[List[Any]] = []
+
+    for level1 in os.listdir(ORIG):
+        p1 = os.path.join(ORIG, level1)
+        if not os.path.isdir(p1):
+            continue
+        metacloud_file = next(
+            (
+                os.path.join(p1, file)
+                for file in os.listdir(p1)
+                if file.endswith(".metacloud")
+            ),
+            None,
+        )
+        if not metacloud_file:
+            continue
+
+        try:
+            inputs = stat_metacloud_inputs(metacloud_file)
+            fp = fingerprint_entries(
+                [(i["input_path"], i["size_bytes"], i["mod_time"]) for i in inputs]
+            )
+            row = api_get_copc_state(level1)
+            if row and row.get("fp") == fp:
+                if row.get("processing_status") not in ("pending", "failed", None):
+                    if not dry_run:
+                        api_update_copc_last_checked(level1)
+                    continue
+                logger.info(
+                    f"Incomplete COPC conversion of mission {level1} (status: {row.get('processing_status')})"
+                )
+            else:
+                logger.info(
+                    f"{'Changed' if row else 'New'} point cloud inputs for the COPC file of mission {level1}"
+                )
+
+            points, size = size_metacloud(metacloud_file, inputs)
+            copc_changes.append([level1, metacloud_file, fp, points, size])
+            if not dry_run:
+                output_path = os.path.join(
+                    os.path.dirname(ZIP), "COPC", f"{level1}.copc.laz"
+                )
+                api_create_copc_state(level1, fp, output_path, points, size)
+        except Exception as e:
+            logger.error(f"Error checking the COPC file of mission {level1}: {e}")
+
+    return copc_changes
+
+
+def classify_folder(
+    rel: str,
+    fp: str,
+    size: int,
+    count: int,
+    file_info: List[Tuple[str, int, float]],
+    dry_run: bool = False,
+    requested: Optional[Set[str]] = None,
+) -> Optional[List[Any]]:
+    """
+    Compare a walked folder with its database row and sync its manifest.
+
+    Args:
+        rel: Folder path relative to ORIG
+        fp, size, count, file_info: Result of get_directory_stats for the folder
+        dry_run: Whether to perform a dry run without modifying the database
+        requested: Folders to pre-archive (see --archive-min-requests), all when None
+
+    Returns:
+        [rel, fingerprint, reason, size_kb, compression_ratio, file_count] if the
+        folder needs processing, None otherwise
+    """
+    try:
+        row = api_get_folder_state(rel)
+
+        # Keep the browsable manifest in sync with what was just walked
+        if not dry_run and api_get_folder_manifest_fp(rel) != fp:
+            api_put_folder_manifest(rel, fp, build_manifest(file_info))
+
+        # Check if folder needs processing:
+        # 1. New folder (not in database)
+        # 2. Fingerprint has changed
+        # 3. Previous processing failed or is still pending
+        # The reason is kept with the folder so the scheduler can
+        # order the queue (see SCHEDULING_POLICIES); a folder deferred
+        # for lack of space, or left on demand until it is requested
+        # often enough, was never attempted and keeps its own
+        status = row.get("processing_status") if row else None
+        wanted = requested is None or rel in requested
+        reason = None
+        if not row:
+            logger.info(f"New folder detected: {rel}")
+            reason = REASON_NEW
+        elif row.get("fp") != fp:
+            logger.info(f"Fingerprint change detected in {rel}")
+            reason = REASON_CHANGED
+        elif (status == "deferred" or (status == "on_demand" and wanted)) and row.get(
+            "queue_reason"
+        ) in REASON_PRIORITY:
+            logger.info(f"{status.capitalize()} folder detected: {rel}")
+            reason = row["queue_reason"]
+        elif row.get("processing_status") in (
+            "pending",
+            "failed",
+            "deferred",
+            None,
+        ):
+            logger.info(
+                f"Incomplete processing detected in {rel} (status: {row.get('processing_status')})"
+            )
+            reason = REASON_RETRY
+
+        if reason:
+            logger.info(f"Adding {rel} to processing queue ({reason})")
+            # The ratio of the previous archive predicts the size of the next one
+            ratio = row.get("compression_ratio") if row else None
+            return [rel, fp, reason, size, ratio, count]
+
+        # Just update the last_checked timestamp for successful completions
+        if not dry_run:
+            answer = api_update_folder_last_checked(rel)
+            logger.debug(f"Updated last_checked for {rel}: {answer}")
+        logger.debug(
+            f"No processing needed for {rel} (status: {row.get('processing_status') if row else 'N/A'})"
+        )
+    except Exception as e:
+        logger.error(f"Error processing directory {rel}: {e}")
+    return None
+
+
+def collect_changed_folders(
+    dry_run: bool = False, requested: Optional[Set[str]] = None
+) -> List[List[Any]]:
+    """
+    Scan directories and collect paths of changed folders without immediately queueing jobs.
+
+    Folders are walked in turn while their API calls (state lookup, manifest
+    sync, last_checked) run on a thread pool as wide as the API client's
+    concurrency limit, so the AIMD limit of api_client is what bounds the
+    load put on the backend. Results keep the filesystem listing order.
+
+    Folders are only marked pending once they are scheduled (see
+    mark_folders_pending), so a folder left out by --max-jobs keeps its
+    reason on the next scan.
+
+    Args:
+        dry_run: Whether to perform a dry run without modifying the database
+        requested: Folders to pre-archive (see --archive-min-requests), all when
+            None; an on_demand folder is only collected again once requested
+
+    Returns:
+        List of [rel, fingerprint, reason, size_kb, compression_ratio, file_count] lists for folders that have changed
+    """
+    global ORIG
+    changed_folders: List[List[Any]] = []
+    workers = max(1, int(api_client.max_limit))
+    # Walked folders waiting for their API calls, bounded so their file
+    # listings do not pile up in memory while the backend is slow
+    pending: Deque[Future] = collections.deque()
+
+    def collect_oldest() -> None:
+        folder = pending.popleft().result()
+        if folder:
+            changed_folders.append(folder)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for level1 in os.listdir(ORIG):
+            p1 = os.path.join(ORIG, level1)
+            if not os.path.isdir(p1):
+                continue
+
+            for level2 in os.listdir(p1):
+                rel = os.path.join(level1, level2)
+                src = os.path.join(ORIG, rel)
+                if not os.path.isdir(src):
+                    continue
+
+                try:
+                    logger.info(f"Processing directory: {rel}")
+                    fp, size, count, file_info = get_directory_stats(src)
+                    logger.info(
+                        f"Fingerprint: {fp}, Size: {size} KB, File Count: {count}"
+                    )
+                except Exception as e:
+                    logger.error(f"Error processing directory {rel}: {e}")
+                    continue
+
+                pending.append(
+                    executor.submit(
+                        classify_folder,
+                        rel,
+                        fp,
+                        size,
+                        count,
+                        file_info,
+                        dry_run,
+                        requested,
+                    )
+                )
+                while len(pending) > 2 * workers:
+                    collect_oldest()
+
+        while pending:
+            collect_oldest()
+
+    return changed_folders
+
+
+def mark_folders_pending(folders: List[List[Any]]) -> None:
+    """
+    Record the folders a compression job is queued for as pending, with their
+    new fingerprint and the reason they were queued.
+
+    Args:
+        folders: Scheduled and admitted folders, as returned by collect_changed_folders
+    """
+    for rel, fp, reason, size, _, count in folders:
+        api_create_folder_state(
+            rel,
+            rel.split(os.sep, 1)[0],
+            fp,
+            size,
+            count,
+            os.path.join(ZIP, f"{rel}{ARCHIVE_EXTENSIONS[ARCHIVE_CODEC]}"),
+            queue_reason=reason,
+        )
+
+
+def mark_folders_on_demand(folders: List[List[Any]]) -> None:
+    """
+    Record changed folders left to on-demand archives with the on_demand
+    status, their new fingerprint and the reason they changed. They are not
+    collected again until they change or are requested often enough.
+
+    Args:
+        folders: Folders filtered out by --archive-min-requests
+    """
+    for rel, fp, reason, size, _, count in folders:
+        api_create_folder_state(
+            rel,
+            rel.split(os.sep, 1)[0],
+            fp,
+            size,
+            count,
+            os.path.join(ZIP, f"{rel}{ARCHIVE_EXTENSIONS[ARCHIVE_CODEC]}"),
+            queue_reason=reason,
+            processing_status="on_demand",
+        )
 
-            # Check if metacloud file needs processing:
-            # 1. New file (not in database)
-            # 2. Fingerprint has changed
-            # 3. Previous processing failed or is still pending
-            needs_processing = False
-            if not row:
-                logger.info(f"New .metacloud file detected for mission {level1}")
-                needs_processing = True
-            elif row.get("fp") != metacloud_fp:
-                logger.info(
-                    f"Fingerprint change detected in .metacloud file for mission {level1}"
-                )
-                needs_processing = True
-            elif row.get("processing_status") in ("pending", "failed", None):
-                logger.info(
-                    f"Incomplete processing detected for .metacloud file in mission {level1} (status: {row.get('processing_status')})"
-                )
-                needs_processing = True
 
-            if needs_processing:
-                logger.info(
-                    f"Adding .metacloud file for mission {level1} to processing queue"
-                )
-                metacloud_changes.append([level1, metacloud_file, metacloud_fp])
+def order_fifo(folders: List[List[Any]]) -> List[List[Any]]:
+    """
+    Keep folders in filesystem listing order (the historical behaviour).
 
-                if not dry_run:
-                    output_path = os.path.join(os.path.dirname(ZIP), "Potree", level1)
+    Args:
+        folders: List of [rel, fingerprint, reason, size_kb, compression_ratio, file_count] lists
 
-                    api_create_potree_metacloud_state(level1, metacloud_fp, output_path)
-            else:
-                # Just update the last_checked timestamp for successful completions
-                if not dry_run:
-                    api_update_potree_metacloud_last_checked(level1)
-                logger.debug(
-                    f"No processing needed for .metacloud file in mission {level1} (status: {row.get('processing_status') if row else 'N/A'})"
-                )
+    Returns:
+        The folders, unchanged
+    """
+    return list(folders)
 
-        except Exception as e:
-            logger.error(f"Error processing metacloud file in {level1}: {e}")
 
-    return metacloud_changes
+def order_priority(folders: List[List[Any]]) -> List[List[Any]]:
+    """
+    Order folders by reason (new, then changed, then retry), and within a
+    reason round-robin across missions, smallest folders first.
 
+    Interleaving missions stops a single large mission from monopolising the
+    --max-jobs budget, and favouring small folders lowers the mean time until
+    a folder's archive is available.
 
-def collect_changed_folders(dry_run: bool = False) -> List[List[str]]:
+    Args:
+        folders: List of [rel, fingerprint, reason, size_kb, compression_ratio, file_count] lists
+
+    Returns:
+        The folders in scheduling order
     """
-    Scan directories and collect paths of changed folders without immediately queueing jobs.
+    ordered: List[List[Any]] = []
+    lanes: Dict[int, Dict[str, List[List[Any]]]] = {}
+    for folder in folders:
+        rel, _, reason, *_ = folder
+        priority = REASON_PRIORITY.get(reason, len(REASON_PRIORITY))
+        mission = rel.split(os.sep, 1)[0]
+        lanes.setdefault(priority, {}).setdefault(mission, []).append(folder)
+
+    for priority in sorted(lanes):
+        missions = lanes[priority]
+        for queue in missions.values():
+            queue.sort(key=lambda folder: (folder[3], folder[0]))
+        # Missions whose smallest folder is smallest get the first turn
+        order = sorted(missions, key=lambda m: (missions[m][0][3], m))
+        for turn in range(max(len(q) for q in missions.values())):
+            for mission in order:
+                if turn < len(missions[mission]):
+                    ordered.append(missions[mission][turn])
+
+    return ordered
+
+
+# Ordering policies selectable with --scheduling-policy
+SCHEDULING_POLICIES: Dict[str, Callable[[List[List[Any]]], List[List[Any]]]] = {
+    "fifo": order_fifo,
+    "priority": order_priority,
+}
+
+
+def schedule_folders(
+    folders: List[List[Any]], policy: str, max_jobs: int = 0
+) -> Tuple[List[List[Any]], List[List[Any]]]:
+    """
+    Order changed folders with the given policy and apply the --max-jobs budget.
 
     Args:
-        dry_run: Whether to perform a dry run without modifying the database
+        folders: List of [rel, fingerprint, reason, size_kb, compression_ratio, file_count] lists
+        policy: Name of a policy in SCHEDULING_POLICIES
+        max_jobs: Maximum number of folders to schedule (0 for unlimited)
 
     Returns:
-        List of relative paths to folders that have changed
+        Tuple of (scheduled folders, folders left for a later scan)
     """
-    global ORIG
-    changed_folders: List[List[str]] = []
+    ordered = SCHEDULING_POLICIES[policy](folders)
+    if max_jobs > 0 and len(ordered) > max_jobs:
+        return ordered[:max_jobs], ordered[max_jobs:]
+    return ordered, []
 
-    for level1 in os.listdir(ORIG):
-        p1 = os.path.join(ORIG, level1)
-        if not os.path.isdir(p1):
+
+def log_scan_report(
+    policy: str, scheduled: List[List[Any]], postponed: List[List[Any]]
+) -> None:
+    """
+    Log a summary of the scheduling decision, per reason.
+
+    Args:
+        policy: Name of the scheduling policy used
+        scheduled: Folders that will be archived by this scan
+        postponed: Folders left out by the --max-jobs budget
+    """
+    logger.info(f"Scan report (scheduling policy: {policy})")
+    for reason in sorted(REASON_PRIORITY, key=REASON_PRIORITY.get):
+        queued = [f for f in scheduled if f[2] == reason]
+        left = [f for f in postponed if f[2] == reason]
+        if not queued and not left:
             continue
+        logger.info(
+            f"  {reason:<8} scheduled={len(queued)} "
+            f"({sum(f[3] for f in queued)} KB), postponed={len(left)}"
+        )
+    for position, folder in enumerate(scheduled, start=1):
+        logger.debug(f"  #{position} {folder[0]} ({folder[2]}, {folder[3]} KB)")
 
-        for level2 in os.listdir(p1):
-            rel = os.path.join(level1, level2)
-            src = os.path.join(ORIG, rel)
-            if not os.path.isdir(src):
-                continue
 
-            try:
-                logger.info(f"Processing directory: {rel}")
-                fp, size, count = get_directory_stats(src)
-                logger.info(f"Fingerprint: {fp}, Size: {size} KB, File Count: {count}")
-
-                row = api_get_folder_state(rel)
-
-                # Check if folder needs processing:
-                # 1. New folder (not in database)
-                # 2. Fingerprint has changed
-                # 3. Previous processing failed or is still pending
-                needs_processing = False
-                if not row:
-                    logger.info(f"New folder detected: {rel}")
-                    needs_processing = True
-                elif row.get("fp") != fp:
-                    logger.info(f"Fingerprint change detected in {rel}")
-                    needs_processing = True
-                elif row.get("processing_status") in ("pending", "failed", None):
-                    logger.info(
-                        f"Incomplete processing detected in {rel} (status: {row.get('processing_status')})"
-                    )
-                    needs_processing = True
+def estimate_archive_kb(folder: List[Any]) -> int:
+    """Expected archive size of a folder, from its size and previous compression ratio"""
+    ratio = folder[4] if folder[4] is not None else DEFAULT_COMPRESSION_RATIO
+    return int(folder[3] * ratio)
 
-                if needs_processing:
-                    logger.info(f"Adding {rel} to processing queue")
-                    changed_folders.append([rel, fp])
 
-                    if not dry_run:
-                        api_create_folder_state(
-                            rel,
-                            level1,
-                            fp,
-                            size,
-                            count,
-                            os.path.join(ZIP, f"{rel}.tar.gz"),
-                        )
-                else:
-                    # Just update the last_checked timestamp for successful completions
-                    if not dry_run:
-                        answer = api_update_folder_last_checked(rel)
-                        logger.debug(f"Updated last_checked for {rel}: {answer}")
-                    logger.debug(
-                        f"No processing needed for {rel} (status: {row.get('processing_status') if row else 'N/A'})"
-                    )
+def admit_by_free_space(
+    folders: List[List[Any]], zip_root: str, headroom_percent: float
+) -> Tuple[List[List[Any]], List[List[Any]], int]:
+    """
+    Admit the scheduled folders whose archives fit on the zip volume.
 
-            except Exception as e:
-                logger.error(f"Error processing directory {rel}: {e}")
+    The archiver keeps the previous archive until the new one is complete,
+    so each folder needs the full estimated size of its new archive. Folders
+    are admitted in scheduling order while the estimates fit in the free
+    space minus headroom_percent of the volume; a folder that does not fit
+    is deferred, and smaller ones after it may still be admitted.
 
-    return changed_folders
+    Args:
+        folders: Scheduled folders, as returned by schedule_folders
+        zip_root: Mount point of the archive volume
+        headroom_percent: Share of the volume kept free
+
+    Returns:
+        Tuple of (admitted folders, deferred folders, KB available for archives)
+    """
+    try:
+        st = os.statvfs(zip_root)
+    except OSError as e:
+        logger.warning(f"Cannot check free space on {zip_root}, admitting all: {e}")
+        return folders, [], -1
+    free_kb = st.f_bavail * st.f_frsize // 1024
+    total_kb = st.f_blocks * st.f_frsize // 1024
+    available_kb = int(free_kb - total_kb * headroom_percent / 100)
+
+    admitted: List[List[Any]] = []
+    deferred: List[List[Any]] = []
+    budget_kb = available_kb
+    for folder in folders:
+        needed_kb = estimate_archive_kb(folder)
+        if needed_kb <= budget_kb:
+            admitted.append(folder)
+            budget_kb -= needed_kb
+        else:
+            deferred.append(folder)
+    logger.info(
+        f"Free space on {zip_root}: {free_kb} KB of {total_kb} KB, "
+        f"{available_kb} KB usable with {headroom_percent:g}% headroom; admitted "
+        f"{len(admitted)} folders (~{available_kb - budget_kb} KB), "
+        f"deferred {len(deferred)}"
+    )
+    return admitted, deferred, available_kb
+
+
+def api_defer_folder(folder: List[Any], available_kb: int) -> bool:
+    """Mark a folder as deferred for lack of space on the zip volume via API"""
+    rel, fp, reason = folder[0], folder[1], folder[2]
+    message = (
+        f"Deferred: archive needs ~{estimate_archive_kb(folder)} KB, "
+        f"{max(available_kb, 0)} KB available on the zip volume"
+    )
+    try:
+        url = f"{BACKEND_URL}/sqlite/folder_state/{rel}"
+        payload = {
+            "fingerprint": fp,
+            "processing_status": "deferred",
+            "error_message": message,
+            "queue_reason": reason,
+        }
+        response = api_client.put(url, json=payload, timeout=30)
+        if response.status_code == 404:
+            # A new folder has no record yet
+            api_create_folder_state(
+                rel,
+                rel.split(os.sep, 1)[0],
+                fp,
+                folder[3],
+                folder[5],
+                os.path.join(ZIP, f"{rel}{ARCHIVE_EXTENSIONS[ARCHIVE_CODEC]}"),
+                queue_reason=reason,
+                processing_status="deferred",
+            )
+            response = api_client.put(url, json=payload, timeout=30)
+        response.raise_for_status()
+        return True
+    except Exception as e:
+        logger.error(f"Error deferring folder {rel}: {e}")
+        return False
 
 
 def queue_potree_conversion_jobs(
-    metacloud_files: List[List[str]], export_only: bool = False
+    metacloud_files: List[List[Any]], export_only: bool = False
 ) -> Optional[int]:
     """
-    Create a Kubernetes batch job for Potree conversion of metacloud files using a template.
+    Create Kubernetes batch jobs for Potree conversion of metacloud files using a template.
+
+    One job is created per resource class (see plan_potree_jobs), with the
+    CPU and memory of its class and a parallelism and deadline sized from
+    the past conversion times.
 
     Args:
-        metacloud_files: List containing [mission_key, metacloud_path, fingerprint] lists
+        metacloud_files: List containing [mission_key, metacloud_path, fingerprint, points, bytes] lists
         export_only: Whether to only export the job YAML without creating it
 
     Returns:
-        Optional[int]: Number of jobs created (1 if batch job created) or None if no action was taken
+        Optional[int]: Number of jobs created or None if no action was taken
     """
     global ORIG, ZIP, FTS_ADDLIDAR_PVC, BACKEND_URL, args
 
@@ -507,58 +1659,152 @@ def queue_potree_conversion_jobs(
         # Generate timestamp for unique job name
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
 
-        # Prepare template context
-        parallelism = min(
-            len(metacloud_files), 4
-        )  # Limit parallelism based on number of files
+        import yaml
+        from kubernetes import utils
 
-        context = {
-            "timestamp": timestamp,
-            "metacloud_files": metacloud_files,
-            "parallelism": parallelism,
-            "fts_addlidar_pvc_name": FTS_ADDLIDAR_PVC,
-            "backend_url": BACKEND_URL,
-            "potree_converter_image_registry": os.environ.get(
-                "POTREE_CONVERTER_IMAGE_REGISTRY"
-            ),
-            "potree_converter_image_name": os.environ.get(
-                "POTREE_CONVERTER_IMAGE_NAME"
-            ),
-            "potree_converter_image_tag": os.environ.get("POTREE_CONVERTER_IMAGE_TAG"),
-            "potree_converter_image_sha256": os.environ.get(
-                "POTREE_CONVERTER_IMAGE_SHA256"
-            ),
-        }
+        created = 0
+        for plan in plan_potree_jobs(metacloud_files, api_get_potree_history()):
+            resource_class = plan["resource_class"]
+            files = plan["metacloud_files"]
+            context = {
+                "timestamp": timestamp,
+                "job_name": f"potree-converter-{resource_class['name']}",
+                "resource_class": resource_class["name"],
+                "metacloud_files": files,
+                "parallelism": plan["parallelism"],
+                "active_deadline_seconds": plan["active_deadline_seconds"],
+                "cpu_limit": resource_class["cpu"],
+                "memory_limit": resource_class["memory"],
+                "cpu_request": resource_class["cpu_request"],
+                "memory_request": resource_class["memory_request"],
+                "fts_addlidar_pvc_name": FTS_ADDLIDAR_PVC,
+                "backend_url": BACKEND_URL,
+                "potree_converter_image_registry": os.environ.get(
+                    "POTREE_CONVERTER_IMAGE_REGISTRY"
+                ),
+                "potree_converter_image_name": os.environ.get(
+                    "POTREE_CONVERTER_IMAGE_NAME"
+                ),
+                "potree_converter_image_tag": os.environ.get(
+                    "POTREE_CONVERTER_IMAGE_TAG"
+                ),
+                "potree_converter_image_sha256": os.environ.get(
+                    "POTREE_CONVERTER_IMAGE_SHA256"
+                ),
+            }
+            logger.info(
+                f"Potree class {resource_class['name']}: {len(files)} missions, "
+                f"predicted {plan['predicted_seconds']}s, parallelism "
+                f"{plan['parallelism']}, deadline {plan['active_deadline_seconds']}s"
+            )
 
-        # Render the template
-        job_yaml = template.render(**context)
+            # Render the template
+            job_yaml = template.render(**context)
+
+            if export_only:
+                print(job_yaml)
+                logger.info(
+                    f"Printed batch Potree job YAML for {len(files)} metacloud files"
+                )
+                created += 1
+                continue
+
+            # Create job from YAML
+            job_dict = yaml.safe_load(job_yaml)
+            try:
+                result = utils.create_from_dict(client.ApiClient(), job_dict, True)
+                job_name = job_dict["metadata"]["name"]
+                logger.info(
+                    f"Created batch Potree conversion job '{job_name}' for {len(files)} metacloud files"
+                )
+                # Lets the backend's job watch record outcomes whose callback is lost
+                api_register_job_batch(
+                    result[0].metadata.uid,
+                    job_name,
+                    "potree",
+                    [[mission_key, fp] for mission_key, _, fp, *_ in files],
+                )
+                logger.debug(f"Job creation result: {result}")
+                created += 1
+            except Exception as api_ex:
+                logger.error(f"Failed to create Kubernetes batch job via API: {api_ex}")
+
+        return created or None
+
+    except Exception as e:
+        logger.error(f"Failed to create Potree conversion batch job: {e}")
+        return None
+
+
+def queue_copc_jobs(
+    missions: List[List[Any]], export_only: bool = False
+) -> Optional[int]:
+    """
+    Create a Kubernetes batch job converting missions to COPC files using a template.
+
+    Args:
+        missions: List containing [mission_key, metacloud_path, fingerprint, points, bytes] lists
+        export_only: Whether to only export the job YAML without creating it
+
+    Returns:
+        Optional[int]: Number of missions queued or None if no action was taken
+    """
+    global FTS_ADDLIDAR_PVC, BACKEND_URL, args
+
+    if not missions:
+        logger.info("No missions to convert to COPC, skipping job creation")
+        return None
+
+    try:
+        template_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "job-batch-copc.template.yaml",
+        )
+        if not os.path.exists(template_path):
+            logger.error(f"COPC template file not found at {template_path}")
+            return None
+
+        with open(template_path, "r") as f:
+            template = jinja2.Template(f.read())
+
+        job_yaml = template.render(
+            missions=missions,
+            parallelism=min(len(missions), args.parallelism if args else 2),
+            fts_addlidar_pvc_name=FTS_ADDLIDAR_PVC,
+            backend_url=BACKEND_URL,
+            copc_converter_image_registry=os.environ.get(
+                "COPC_CONVERTER_IMAGE_REGISTRY"
+            ),
+            copc_converter_image_name=os.environ.get("COPC_CONVERTER_IMAGE_NAME"),
+            copc_converter_image_tag=os.environ.get("COPC_CONVERTER_IMAGE_TAG"),
+            copc_converter_image_sha256=os.environ.get("COPC_CONVERTER_IMAGE_SHA256"),
+        )
 
         if export_only:
             print(job_yaml)
-            logger.info(
-                f"Printed batch Potree job YAML for {len(metacloud_files)} metacloud files"
-            )
-            return 1
+            logger.info(f"Printed batch COPC job YAML for {len(missions)} missions")
+            return len(missions)
 
-        # Create job from YAML
         import yaml
         from kubernetes import utils
 
         job_dict = yaml.safe_load(job_yaml)
-        try:
-            result = utils.create_from_dict(client.ApiClient(), job_dict, True)
-            job_name = job_dict["metadata"]["name"]
-            logger.info(
-                f"Created batch Potree conversion job '{job_name}' for {len(metacloud_files)} metacloud files"
-            )
-            logger.debug(f"Job creation result: {result}")
-            return 1
-        except Exception as api_ex:
-            logger.error(f"Failed to create Kubernetes batch job via API: {api_ex}")
-            return None
+        result = utils.create_from_dict(client.ApiClient(), job_dict, True)
+        job_name = job_dict["metadata"]["name"]
+        logger.info(
+            f"Created batch COPC conversion job '{job_name}' for {len(missions)} missions"
+        )
+        # Lets the backend's job watch record outcomes whose callback is lost
+        api_register_job_batch(
+            result[0].metadata.uid,
+            job_name,
+            "copc",
+            [[mission_key, fp] for mission_key, _, fp, *_ in missions],
+        )
+        return len(missions)
 
     except Exception as e:
-        logger.error(f"Failed to create Potree conversion batch job: {e}")
+        logger.error(f"Failed to create COPC conversion batch job: {e}")
         return None
 
 
@@ -569,13 +1815,13 @@ def queue_batch_zip_job(
     Create a single batch Kubernetes job to process multiple folders.
 
     Args:
-        folders: List of relative folder paths to archive with their fingerprints [rel, fp]
+        folders: List of [rel, fp, reason, size_kb, compression_ratio] lists as returned by schedule_folders
         export_only: Whether to only export the job YAML without creating it
 
     Returns:
         Optional[int]: Number of folders processed or None if no action was taken
     """
-    global ORIG, ZIP, FTS_ADDLIDAR_PVC, BACKEND_URL, args
+    global ORIG, ZIP, FTS_ADDLIDAR_PVC, BACKEND_URL, ARCHIVE_CODEC, ARCHIVE_MODE, args
 
     if not folders:
         logger.info("No folders to process, skipping batch job creation")
@@ -610,6 +1856,10 @@ def queue_batch_zip_job(
             "zip_dir": ZIP,
             "fts_addlidar_pvc_name": FTS_ADDLIDAR_PVC,
             "backend_url": BACKEND_URL,
+            "archive_codec": ARCHIVE_CODEC,
+            "archive_mode": ARCHIVE_MODE,
+            "archive_part_size": ARCHIVE_PART_SIZE,
+            "archive_extension": ARCHIVE_EXTENSIONS[ARCHIVE_CODEC],
             "compression_image_registry": os.environ.get("COMPRESSION_IMAGE_REGISTRY"),
             "compression_image_name": os.environ.get("COMPRESSION_IMAGE_NAME"),
             "compression_image_tag": os.environ.get("COMPRESSION_IMAGE_TAG"),
@@ -633,6 +1883,13 @@ def queue_batch_zip_job(
             result = utils.create_from_dict(client.ApiClient(), job_dict, True)
             job_name = job_dict["metadata"]["name"]
             logger.info(f"Created batch job '{job_name}' for {len(folders)} folders")
+            # Lets the backend's job watch record outcomes whose callback is lost
+            api_register_job_batch(
+                result[0].metadata.uid,
+                job_name,
+                "compression",
+                [[rel, fp] for rel, fp, *_ in folders],
+            )
             logger.debug(f"Job creation result: {result}")
             return len(folders)
         except Exception as api_ex:
@@ -643,12 +1900,90 @@ def queue_batch_zip_job(
         raise
 
 
+def queue_recompression_job(
+    candidates: List[Dict], export_only: bool = False
+) -> Optional[int]:
+    """
+    Create a Kubernetes job recompressing the archives of cold folders at a high level.
+
+    Args:
+        candidates: Folders returned by the backend's recompression_candidates endpoint
+        export_only: Whether to only export the job YAML without creating it
+
+    Returns:
+        Optional[int]: Number of folders queued or None if no action was taken
+    """
+    global ZIP, FTS_ADDLIDAR_PVC, BACKEND_URL, RECOMPRESS_MAX_RATE
+
+    if not candidates:
+        logger.info("No cold archives to recompress, skipping job creation")
+        return None
+
+    try:
+        template_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "job-recompression.template.yaml",
+        )
+
+        if not os.path.exists(template_path):
+            logger.error(f"Recompression template file not found at {template_path}")
+            return None
+
+        with open(template_path, "r") as f:
+            template = jinja2.Template(f.read())
+
+        deadline = max(candidate["deadline"] for candidate in candidates)
+        context = {
+            "folders": [
+                [candidate["folder_key"], candidate["deadline"]]
+                for candidate in candidates
+            ],
+            "active_deadline_seconds": max(0, deadline - int(time.time()))
+            + RECOMPRESS_GRACE,
+            "zip_dir": ZIP,
+            "fts_addlidar_pvc_name": FTS_ADDLIDAR_PVC,
+            "backend_url": BACKEND_URL,
+            "max_rate": RECOMPRESS_MAX_RATE,
+            "compression_image_registry": os.environ.get("COMPRESSION_IMAGE_REGISTRY"),
+            "compression_image_name": os.environ.get("COMPRESSION_IMAGE_NAME"),
+            "compression_image_tag": os.environ.get("COMPRESSION_IMAGE_TAG"),
+            "compression_image_sha256": os.environ.get("COMPRESSION_IMAGE_SHA256"),
+        }
+
+        job_yaml = template.render(**context)
+
+        if export_only:
+            print(job_yaml)
+            logger.info(f"Printed recompression job YAML for {len(candidates)} folders")
+            return len(candidates)
+
+        import yaml
+        from kubernetes import utils
+
+        job_dict = yaml.safe_load(job_yaml)
+        try:
+            utils.create_from_dict(client.ApiClient(), job_dict, True)
+        except Exception as api_ex:
+            # A previous recompression job is still running or not cleaned up yet
+            logger.warning(f"Failed to create recompression job via API: {api_ex}")
+            return None
+        logger.info(
+            f"Created recompression job '{job_dict['metadata']['name']}' "
+            f"for {len(candidates)} cold folders"
+        )
+        return len(candidates)
+    except Exception as e:
+        logger.error(f"Failed to create recompression job: {e}")
+        return None
+
+
 def main() -> None:
     """
     Main function to scan directories and enqueue archive jobs.
     """
     # Access global constants and args to modify them
-    global ORIG, ZIP, FTS_ADDLIDAR_PVC, BACKEND_URL, args
+    global ORIG, ZIP, FTS_ADDLIDAR_PVC, BACKEND_URL, WALK_THREADS, api_client, args
+    global ARCHIVE_CODEC, ARCHIVE_MODE, ARCHIVE_PART_SIZE, RECOMPRESS_MAX_RATE
 
     parser = argparse.ArgumentParser(
         description="LiDAR Archive Scanner and Job Enqueuer"
@@ -703,6 +2038,84 @@ def main() -> None:
         default=0,
         help="Stop after the specified number of archive jobs have been queued (0 for unlimited)",
     )
+    parser.add_argument(
+        "--walk-threads",
+        type=int,
+        default=8,
+        help="Threads walking each folder; helps on high-latency NFS (default: 8, 1 for serial os.walk)",
+    )
+    parser.add_argument(
+        "--api-max-inflight",
+        type=int,
+        default=32,
+        help="Upper bound for concurrent backend API requests (default: 32)",
+    )
+    parser.add_argument(
+        "--api-target-latency",
+        type=float,
+        default=2.0,
+        help="Backend API latency in seconds above which concurrency is reduced (default: 2.0)",
+    )
+    parser.add_argument(
+        "--scheduling-policy",
+        choices=sorted(SCHEDULING_POLICIES),
+        default="priority",
+        help="Order in which changed folders are queued under --max-jobs (default: priority)",
+    )
+    parser.add_argument(
+        "--archive-codec",
+        choices=sorted(ARCHIVE_EXTENSIONS),
+        default="zstd",
+        help="Codec of the folder archives: zstd (.tar.zst) or gzip (.tar.gz) (default: zstd)",
+    )
+    parser.add_argument(
+        "--archive-mode",
+        choices=["full", "differential"],
+        default="full",
+        help="full: recompress changed folders entirely; differential: archive only "
+        "changed files as deltas until the backend asks for a consolidation (default: full)",
+    )
+    parser.add_argument(
+        "--archive-part-size",
+        type=int,
+        default=0,
+        help="Split full archives into independently extractable parts of about this "
+        "many MB, for parallel transfer and restore (default: 0, a single file)",
+    )
+    parser.add_argument(
+        "--zip-headroom-percent",
+        type=float,
+        default=10.0,
+        help="Share of the zip volume kept free: folders whose estimated archives do "
+        "not fit are deferred to a later scan (default: 10)",
+    )
+    parser.add_argument(
+        "--archive-min-requests",
+        type=int,
+        default=0,
+        help="Only pre-archive changed folders downloaded at least this many times "
+        "recently; the backend streams the others on demand (default: 0, archive all)",
+    )
+    parser.add_argument(
+        "--recompress-cold",
+        type=int,
+        default=0,
+        help="Queue a job recompressing the archives of up to this many folders the "
+        "backend considers cold, during its off-peak window (default: 0, disabled)",
+    )
+    parser.add_argument(
+        "--recompress-max-rate",
+        type=float,
+        default=RECOMPRESS_MAX_RATE,
+        help="Throughput budget of the recompression job in MB/s of uncompressed "
+        f"data (default: {RECOMPRESS_MAX_RATE:g})",
+    )
+    parser.add_argument(
+        "--copc",
+        action="store_true",
+        help="Also convert each mission's point clouds to a Cloud-Optimized Point "
+        "Cloud (.copc.laz) the backend serves for range streaming",
+    )
     parser.add_argument(
         "--parallelism",
         type=int,
@@ -721,6 +2134,16 @@ def main() -> None:
     ZIP = args.zip_root
     FTS_ADDLIDAR_PVC = args.fts_addlidar_pvc
     BACKEND_URL = args.backend_url
+    WALK_THREADS = max(1, args.walk_threads)
+    ARCHIVE_CODEC = args.archive_codec
+    ARCHIVE_MODE = args.archive_mode
+    ARCHIVE_PART_SIZE = max(0, args.archive_part_size)
+    RECOMPRESS_MAX_RATE = args.recompress_max_rate
+    api_client = AdaptiveApiClient(
+        initial_limit=min(4, args.api_max_inflight),
+        max_limit=args.api_max_inflight,
+        target_latency=args.api_target_latency,
+    )
     execution_env = "batch"
 
     dry_run: bool = args.dry_run
@@ -760,22 +2183,57 @@ def main() -> None:
 
     logger.info(f"Scanner initialized. Using backend at {BACKEND_URL}")
 
+    # Rarely requested folders are left to the backend's on-demand archives
+    requested = None
+    if args.archive_min_requests > 0:
+        requested = api_get_requested_folders(args.archive_min_requests)
+        if requested is None:
+            logger.warning("Archive demand unavailable, archiving all changed folders")
+
     # Process based on execution environment
     # Collect all changed folders first
-    changed_folders = collect_changed_folders(dry_run)
+    changed_folders = collect_changed_folders(dry_run, requested)
 
-    # Limit folders if max_jobs is specified
+    if requested is not None:
+        on_demand = [f for f in changed_folders if f[0] not in requested]
+        changed_folders = [f for f in changed_folders if f[0] in requested]
+        logger.info(
+            f"Leaving {len(on_demand)} rarely requested folders to on-demand archives"
+        )
+        if not dry_run:
+            mark_folders_on_demand(on_demand)
+
+    # Order folders and limit them if max_jobs is specified
     max_jobs = args.max_jobs
     length_changed_folders = len(changed_folders)
-    if max_jobs > 0 and length_changed_folders > max_jobs:
+    changed_folders, postponed_folders = schedule_folders(
+        changed_folders, args.scheduling_policy, max_jobs
+    )
+    if postponed_folders:
         logger.info(
             f"Limiting to {max_jobs} out of {length_changed_folders} changed folders"
         )
-        changed_folders = changed_folders[:max_jobs]
+    log_scan_report(args.scheduling_policy, changed_folders, postponed_folders)
+
+    # Only queue the archives the zip volume can hold
+    changed_folders, deferred_folders, available_kb = admit_by_free_space(
+        changed_folders, ZIP, args.zip_headroom_percent
+    )
+    for folder in deferred_folders:
+        logger.warning(
+            f"Deferring {folder[0]}: needs ~{estimate_archive_kb(folder)} KB, "
+            f"not enough free space on {ZIP}"
+        )
+        if not dry_run:
+            api_defer_folder(folder, available_kb)
+
+    # Only the folders a job is queued for are marked pending
+    if not dry_run:
+        mark_folders_pending(changed_folders)
 
     # Create a single batch job for all folders
     if changed_folders:
-        logger.info(f"Creating batch job for {length_changed_folders} changed folders")
+        logger.info(f"Creating batch job for {len(changed_folders)} changed folders")
         processed_count = queue_batch_zip_job(changed_folders, export_only)
         if processed_count:
             logger.info(f"Successfully created {processed_count} jobs")
@@ -801,8 +2259,27 @@ def main() -> None:
         potree_job_count = queue_potree_conversion_jobs(metacloud_changes, export_only)
         if potree_job_count:
             logger.info(
-                f"Successfully created potree conversion job for {metacloud_count} files"
+                f"Successfully created {potree_job_count} potree conversion jobs for {metacloud_count} files"
+            )
+
+    # Convert missions to COPC files if requested
+    if args.copc:
+        logger.info("Scanning missions for COPC conversion...")
+        copc_changes = scan_for_copc_missions(dry_run)
+        if max_jobs > 0 and len(copc_changes) > max_jobs:
+            logger.info(
+                f"Limiting to {max_jobs} out of {len(copc_changes)} COPC conversions"
             )
+            copc_changes = copc_changes[:max_jobs]
+        if copc_changes and queue_copc_jobs(copc_changes, export_only):
+            logger.info(f"Queued COPC conversion of {len(copc_changes)} missions")
+
+    # Recompress cold archives when the backend says it is off-peak
+    if args.recompress_cold > 0 and not dry_run:
+        candidates = api_get_recompression_candidates(args.recompress_cold)
+        if candidates:
+            logger.info(f"Found {len(candidates)} cold folders to recompress")
+            queue_recompression_job(candidates, export_only)
 
     # Update completion message to include metacloud information
     logger.info(
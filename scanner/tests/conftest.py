@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# scanner.py is a standalone script: import it from its directory
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,116 @@
+import types
+
+import scanner
+
+
+def folder(rel, reason="new", size_kb=10, ratio=None):
+    return [rel, "fp", reason, size_kb, ratio, 1]
+
+
+def rels(folders):
+    return [f[0] for f in folders]
+
+
+def test_priority_orders_by_reason_then_round_robin():
+    folders = [
+        folder("A/retry", "retry", 1),
+        folder("A/big", size_kb=300),
+        folder("A/small", size_kb=100),
+        folder("B/one", size_kb=200),
+        folder("A/changed", "changed", 5),
+        folder("B/two", size_kb=50),
+    ]
+    assert rels(scanner.order_priority(folders)) == [
+        # B has the smallest new folder, so it takes the first turn
+        "B/two",
+        "A/small",
+        "B/one",
+        "A/big",
+        "A/changed",
+        "A/retry",
+    ]
+    assert scanner.order_fifo(folders) == folders
+
+
+def test_schedule_applies_the_job_budget():
+    folders = [folder("A/a", size_kb=3), folder("A/b", size_kb=1), folder("B/c")]
+    scheduled, postponed = scanner.schedule_folders(folders, "priority", max_jobs=2)
+    assert rels(scheduled) == ["A/b", "B/c"]
+    assert rels(postponed) == ["A/a"]
+
+    scheduled, postponed = scanner.schedule_folders(folders, "fifo")
+    assert (scheduled, postponed) == (folders, [])
+
+
+def test_admission_by_free_space(monkeypatch):
+    # 1000 KB volume with 400 KB free; 10% headroom leaves 300 KB
+    st = types.SimpleNamespace(f_bavail=400, f_blocks=1000, f_frsize=1024)
+    monkeypatch.setattr(scanner.os, "statvfs", lambda path: st)
+    folders = [
+        folder("A/a", size_kb=400, ratio=0.5),
+        folder("A/b", size_kb=200),
+        folder("A/c", size_kb=50, ratio=0.5),
+    ]
+    admitted, deferred, available_kb = scanner.admit_by_free_space(folders, "/zips", 10)
+    # A folder that does not fit does not stop smaller ones after it
+    assert rels(admitted) == ["A/a", "A/c"]
+    assert rels(deferred) == ["A/b"]
+    assert available_kb == 300
+
+
+def test_admission_without_free_space_information(monkeypatch):
+    def statvfs(path):
+        raise OSError("not mounted")
+
+    monkeypatch.setattr(scanner.os, "statvfs", statvfs)
+    folders = [folder("A/a")]
+    assert scanner.admit_by_free_space(folders, "/zips", 10) == (folders, [], -1)
+
+
+def test_potree_jobs_per_resource_class():
+    files = [
+        ["m1", "m1/a.metacloud", "fp", 1_000_000, 0],
+        ["m2", "m2/a.metacloud", "fp", 2_000_000, 0],
+        ["m3", "m3/a.metacloud", "fp", 3_000_000_000, 0],
+    ]
+    history = [
+        {
+            "mission_key": "m0",
+            "processing_status": "success",
+            "processing_time": 3600,
+            "input_points": 1_000_000,
+        }
+    ]
+    small, large = scanner.plan_potree_jobs(files, history)
+
+    # 3600 s per million points: 3 hours of small conversions fit in one pod
+    assert small["resource_class"]["name"] == "small"
+    assert [f[0] for f in small["metacloud_files"]] == ["m1", "m2"]
+    assert small["predicted_seconds"] == 3 * 3600
+    assert small["parallelism"] == 1
+    assert large["resource_class"]["name"] == "large"
+    assert large["active_deadline_seconds"] == scanner.POTREE_MAX_DEADLINE
+
+
+def test_potree_jobs_without_history():
+    files = [["m1", "m1/a.metacloud", "fp", 0, 0] for _ in range(3)]
+    (plan,) = scanner.plan_potree_jobs(files, [])
+    default = plan["resource_class"]["default_seconds"]
+    assert plan["predicted_seconds"] == 3 * default
+    assert plan["active_deadline_seconds"] == max(
+        scanner.POTREE_MIN_DEADLINE,
+        scanner.POTREE_DEADLINE_FACTOR * 3 * default / plan["parallelism"],
+    )
+
+
+def test_metacloud_input_diff():
+    inputs = [
+        {"input_path": "a.laz", "fp": "1"},
+        {"input_path": "b.laz", "fp": "2"},
+        {"input_path": "c.laz", "fp": "3"},
+    ]
+    stored = {"a.laz": "1", "b.laz": "old", "z.laz": "9", "y.laz": "8"}
+    assert scanner.diff_metacloud_inputs(inputs, stored) == (
+        ["b.laz", "c.laz"],
+        ["y.laz", "z.laz"],
+    )